@@ -1,10 +1,12 @@
 import streamlit as st
 import os
-import yt_dlp
-import whisper
-import csv
-from googleapiclient.discovery import build
+import subprocess
+import sys
+import time
+import pandas as pd
 from datetime import datetime
+from handle_resolver import parse_channel_input
+from job_queue import DEFAULT_QUEUE_PATH, JobQueue
 
 # -----------------------------
 # 1. Timestamp Helper
@@ -12,6 +14,9 @@ from datetime import datetime
 def get_timestamp():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+def format_time(seconds):
+    return datetime.fromtimestamp(seconds).strftime("%Y-%m-%d %H:%M:%S") if seconds else ""
+
 # -----------------------------
 # 2. Language Code Mapping
 # -----------------------------
@@ -28,185 +33,165 @@ def get_language_code(selected_language):
     return language_map.get(selected_language, None)
 
 # -----------------------------
-# 3. Get Channel ID from Handle
+# 3. Job Queue
 # -----------------------------
-def get_channel_id_from_handle(youtube_url_or_handle, api_key):
+@st.cache_resource
+def get_job_queue(db_path):
+    return JobQueue(db_path)
+
+def start_background_worker(db_path, output_path):
     """
-    Extracts the handle from a URL like 'https://www.youtube.com/@SangamTalks'
-    or simply uses the input if it's just '@SangamTalks'.
-    Then performs a search via the YouTube Data API to return the channel's ID.
+    Starts `python job_queue.py worker` in its own session, so it keeps
+    running when the browser tab or the Streamlit server goes away. Its
+    output is appended to <output_path>/worker.log.
     """
-    from urllib.parse import urlparse
-
-    # If user enters the handle with or without 'www.youtube.com'
-    if youtube_url_or_handle.startswith("http") or youtube_url_or_handle.startswith("www"):
-        parsed_url = urlparse(youtube_url_or_handle)
-        path = parsed_url.path  # e.g. "/@SangamTalks"
-        handle = path.lstrip("/")  # remove leading slash -> "@SangamTalks"
-    else:
-        handle = youtube_url_or_handle
-
-    if not handle.startswith("@"):
-        st.error("Invalid handle. It should start with '@' (e.g. '@SangamTalks').")
-        return None
-
-    search_query = handle[1:]
-
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    response = youtube.search().list(
-        q=search_query,
-        type="channel",
-        part="id",
-        maxResults=1
-    ).execute()
-
-    items = response.get("items", [])
-    if not items:
-        st.error("Could not find a channel matching that handle.")
-        return None
-
-    # Extract the channel ID
-    channel_id = items[0]["id"]["channelId"]
-    return channel_id
-
-# -----------------------------
-# 4. Get *All* Video IDs
-# -----------------------------
-def get_all_video_ids(channel_id, api_key):
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    video_ids = []
-    next_page_token = None
-
-    # Keep fetching until all are retrieved
-    while True:
-        request = youtube.search().list(
-            part="id",
-            channelId=channel_id,
-            maxResults=50,  # up to 50 per call
-            pageToken=next_page_token
+    os.makedirs(output_path, exist_ok=True)
+    # The worker keeps its own copy of the log file handle
+    with open(os.path.join(output_path, "worker.log"), "a") as log_file:
+        subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_queue.py"),
+             "--queue", db_path, "worker"],
+            stdout=log_file,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
         )
-        response = request.execute()
-
-        for item in response.get('items', []):
-            if item['id']['kind'] == 'youtube#video':
-                video_ids.append(item['id']['videoId'])
-
-        next_page_token = response.get('nextPageToken')
-        if not next_page_token:
-            break
-
-    return video_ids
 
 # -----------------------------
-# 5. Download Audio
-# -----------------------------
-def download_youtube_audio(video_id, output_path='.'):
-    try:
-        os.makedirs(output_path, exist_ok=True)
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': os.path.join(output_path, f'{video_id}.%(ext)s'),
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        return os.path.join(output_path, f"{video_id}.mp3")
-    except Exception as e:
-        st.error(f"[{get_timestamp()}] Error while downloading audio for video ID {video_id}: {e}")
-        return None
-
-# -----------------------------
-# 6. Transcribe Audio
-# -----------------------------
-def transcribe_audio(audio_file, language_code):
-    try:
-        model = whisper.load_model("large")
-        result = model.transcribe(audio_file, language=language_code)
-        return result
-    except Exception as e:
-        st.error(f"[{get_timestamp()}] Error while transcribing audio: {e}")
-        return None
-
-# -----------------------------
-# 7. Streamlit App
+# 4. Streamlit App
 # -----------------------------
 st.title("YouTube Channel Audio Downloader and Multi-Language Transcriber")
 
-# 7a. Input YouTube Handle/URL and API Key
-youtube_input = st.text_input(
-    "Enter YouTube channel handle or URL (e.g. '@SangamTalks' or 'https://www.youtube.com/@SangamTalks')",
+# 4a. Input: YouTube handles/URLs and API Key (one job per channel)
+channel_inputs = st.text_area(
+    "Enter YouTube channel handles or URLs, one per line (e.g. '@SangamTalks' or 'https://www.youtube.com/@SangamTalks')",
     value=""
 )
 api_key = st.text_input("Enter YouTube Data API Key", type="password")
 
-# 7b. Language selection
+# 4b. Language selection
 selected_language = st.selectbox(
     "Select transcription language",
     ["Kannada", "Hindi", "Tamil", "Marathi", "Gujarati", "Punjabi", "Bengali"]
 )
 language_code = get_language_code(selected_language)
 
-# 7c. Output directory for audio files
+# 4c. Output directory for audio files
 output_path = "audio_files"
 
-# 7d. Button to Process
-if st.button("Process Channel"):
-    if youtube_input and api_key:
-        # Convert handle/URL -> channel_id
-        with st.spinner(f"[{get_timestamp()}] Trying to resolve channel handle/URL..."):
-            channel_id = get_channel_id_from_handle(youtube_input, api_key)
-
-        # If resolved, proceed
-        if channel_id:
-            st.success(f"[{get_timestamp()}] Resolved Channel ID: {channel_id}")
-
-            # Fetch all videos
-            with st.spinner(f"[{get_timestamp()}] Fetching all video IDs for channel..."):
-                video_ids = get_all_video_ids(channel_id, api_key)
-
-            if video_ids:
-                st.success(f"[{get_timestamp()}] Found {len(video_ids)} videos. Processing all of them...")
-
-                # Loop through each video
-                for video_id in video_ids:
-                    with st.spinner(f"[{get_timestamp()}] Processing video ID: {video_id}"):
-                        audio_file = download_youtube_audio(video_id, output_path)
-                        if audio_file:
-                            st.success(f"[{get_timestamp()}] Audio downloaded for video ID: {video_id}")
-                            try:
-                                result = transcribe_audio(audio_file, language_code)
-
-                                if result:
-                                    # Save transcription and timestamps to CSV
-                                    csv_filename = os.path.join(output_path, f"{video_id}_transcription.csv")
-                                    with open(csv_filename, mode='w', newline='', encoding='utf-8') as file:
-                                        writer = csv.writer(file)
-                                        writer.writerow(["Video ID", "Start Time (s)", "End Time (s)", "Transcript"])
-                                        for segment in result["segments"]:
-                                            writer.writerow([
-                                                video_id,
-                                                round(segment["start"], 2),
-                                                round(segment["end"], 2),
-                                                segment["text"]
-                                            ])
-
-                                    st.success(f"[{get_timestamp()}] Transcription saved to {csv_filename}")
-                                    st.download_button(
-                                        label="📥 Download Transcription CSV",
-                                        data=open(csv_filename, "r"),
-                                        file_name=f"{video_id}_transcription.csv",
-                                        mime="text/csv",
-                                    )
-                            except Exception as e:
-                                st.error(f"[{get_timestamp()}] Error during transcription: {e}")
-                        else:
-                            st.error(f"[{get_timestamp()}] Audio download failed for video ID: {video_id}")
-            else:
-                st.error(f"[{get_timestamp()}] No videos found in the channel.")
+# 4c-1. Audio ingestion: MP3 is only needed as an archive copy
+archive_mp3 = st.checkbox("Also keep an MP3 archive copy of each video's audio", value=False)
+
+job_queue = get_job_queue(DEFAULT_QUEUE_PATH)
+
+# 4d. Submit: the work itself runs in a background worker process
+if st.button("Process Channels"):
+    channels = [line.strip() for line in channel_inputs.splitlines() if line.strip()]
+    invalid = [channel for channel in channels if parse_channel_input(channel) is None]
+    if not channels or not api_key:
+        st.error(f"[{get_timestamp()}] Please enter at least one channel handle/URL and an API Key.")
+    elif invalid:
+        st.error(f"[{get_timestamp()}] Invalid handle(s): {', '.join(invalid)}. They should start with '@'.")
     else:
-        st.error(f"[{get_timestamp()}] Please enter a valid channel handle/URL and API Key.")
+        settings = {
+            "language_code": language_code,
+            "output_path": output_path,
+            "model_name": "large",
+            "archive_mp3": archive_mp3,
+        }
+        # The same channel with the same settings already queued or running (e.g. by another
+        # analyst) is not queued again: this session follows that job instead
+        attached = {channel: job_queue.find_active(channel, settings) for channel in channels}
+        job_ids = [
+            job_queue.submit(channel, api_key, settings) for channel in channels if attached[channel] is None
+        ]
+        if job_ids:
+            st.success(f"[{get_timestamp()}] Queued {len(job_ids)} job(s): {', '.join(map(str, job_ids))}")
+        for channel, job_id in attached.items():
+            if job_id is not None:
+                st.info(f"[{get_timestamp()}] {channel} is already being processed with these settings (job {job_id}).")
+
+# 4e. Job progress (read from the queue; closing the tab does not stop anything)
+st.subheader("Jobs")
+col_refresh, col_worker = st.columns(2)
+col_refresh.button("Refresh")
+if col_worker.button("Start a background worker"):
+    start_background_worker(DEFAULT_QUEUE_PATH, output_path)
+    st.info(f"[{get_timestamp()}] Worker started (log: {os.path.join(output_path, 'worker.log')}).")
+
+# 4e-1. Queue depth and worker utilization (workers report every few seconds)
+workers = job_queue.list_workers()
+col_queued, col_workers, col_busy = st.columns(3)
+col_queued.metric("Queued jobs", job_queue.queue_depth())
+col_workers.metric("Workers", len(workers))
+job_slots = sum(worker["job_slots"] for worker in workers)
+col_busy.metric(
+    "Job slots in use",
+    f"{sum(len(worker['running_jobs']) for worker in workers)}/{job_slots}" if job_slots else "-",
+)
+if workers:
+    st.dataframe(pd.DataFrame([
+        {
+            "Worker": worker["pid"],
+            "Jobs": ", ".join(map(str, worker["running_jobs"])) or "idle",
+            "Utilization": f"{worker['utilization']:.0%}",
+            "Transcribing": (worker["scheduler"] or {}).get("running", 0),
+            "Waiting for ASR": (worker["scheduler"] or {}).get("queued", 0),
+            "Duplicate Requests Served": (worker["scheduler"] or {}).get("attached", 0),
+            "Last Seen": format_time(worker["heartbeat_at"]),
+        }
+        for worker in workers
+    ]), hide_index=True)
+
+jobs = job_queue.list_jobs()
+if jobs:
+    st.dataframe(pd.DataFrame([
+        {
+            "Job": job["job_id"],
+            "Channel": job["channel_input"],
+            "Status": job["status"],
+            "Done": job["done"],
+            "Failed": job["failed"],
+            "Videos": job["total"],
+            "Last Update": job["error"] or job["message"] or "",
+            "Submitted": format_time(job["submitted_at"]),
+            "Finished": format_time(job["finished_at"]),
+        }
+        for job in jobs
+    ]), hide_index=True)
+
+    active = [job for job in jobs if job["status"] in ("queued", "running")]
+    if active:
+        cancel_id = st.selectbox("Cancel a job", [None] + [job["job_id"] for job in active])
+        if cancel_id and st.button("Cancel"):
+            job_queue.cancel(cancel_id)
+
+    # Results of a finished job: combined Excel file and where its time went
+    finished = [job for job in jobs if job["result"]]
+    if finished:
+        job = st.selectbox(
+            "Results of", finished, format_func=lambda job: f"Job {job['job_id']}: {job['channel_input']}"
+        )
+        if job["result"].get("api"):
+            st.caption(
+                f"YouTube Data API: {job['result']['api']['quota_used']} quota units spent "
+                f"in {job['result']['api']['calls']} calls."
+            )
+        if job["result"].get("perf"):
+            with st.expander("Performance (time per stage)"):
+                st.table(pd.DataFrame(job["result"]["perf"]))
+        xlsx_path = job["result"]["outputs"].get("xlsx")
+        if xlsx_path and os.path.exists(xlsx_path):
+            with open(xlsx_path, "rb") as f:
+                st.download_button(
+                    label="📅 Download Multi-Sheet Excel",
+                    data=f,
+                    file_name=f"{job['result']['channel_id']}_transcripts.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+
+    # Poll while anything is still queued or running
+    if active and st.checkbox("Auto-refresh every 5 seconds", value=True):
+        time.sleep(5)
+        st.rerun()
+else:
+    st.info("No jobs yet. Submit a channel above, then start a worker (or run `python job_queue.py worker`).")
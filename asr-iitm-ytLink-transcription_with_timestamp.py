@@ -1,8 +1,12 @@
 import streamlit as st
-import requests
 import csv
+import io
 import os
 import yt_dlp
+from audio_io import audio_format_selector
+from remote_asr import RemoteASRClient
+from job_store import atomic_write
+from subtitles import iter_vtt_cues
 
 
 # Function to download audio from YouTube
@@ -10,7 +14,7 @@ def download_youtube_audio(url, output_path="audio_files"):
     try:
         os.makedirs(output_path, exist_ok=True)
         ydl_opts = {
-            'format': 'bestaudio/best',
+            'format': audio_format_selector(),  # smallest audio-only stream, never a video
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'mp3',
@@ -28,21 +32,18 @@ def download_youtube_audio(url, output_path="audio_files"):
         return None, None
 
 
+# Shared ASR client: one pooled HTTP session reused across reruns
+@st.cache_resource
+def get_asr_client(chunk_seconds, max_concurrency):
+    return RemoteASRClient(chunk_seconds=chunk_seconds, max_concurrency=max_concurrency)
+
+
 # Function to transcribe audio using the API
-def transcribe_audio(file_path, language="hindi"):
+def transcribe_audio(file_path, language="hindi", chunk_seconds=300, max_concurrency=4):
     try:
-        with open(file_path, 'rb') as audio_file:
-            files = {
-                'file': audio_file,
-                'language': (None, language),
-                'vtt': (None, 'true'),
-            }
-            response = requests.post('https://asr.iitm.ac.in/internal/asr/decode', files=files)
-            if response.status_code == 200:
-                return response.json()  # Returns a JSON response with transcript and VTT
-            else:
-                st.error(f"Error during transcription: {response.text}")
-                return None
+        # Long audio is split into overlapping chunks that are uploaded in parallel
+        # (with retries) and stitched back into one VTT timeline
+        return get_asr_client(chunk_seconds, max_concurrency).transcribe(file_path, language)
     except Exception as e:
         st.error(f"An error occurred while transcribing: {e}")
         return None
@@ -51,42 +52,25 @@ def transcribe_audio(file_path, language="hindi"):
 # Function to parse VTT and save transcription to CSV
 def save_transcription_to_csv(video_id, vtt_text, output_path="transcription.csv"):
     try:
-        with open(output_path, mode='w', newline='', encoding='utf-8') as file:
+        # Written to a temp file and renamed, so an interrupted run never leaves half a CSV
+        with atomic_write(output_path, mode='w', newline='', encoding='utf-8') as file:
             writer = csv.writer(file)
             writer.writerow(["Video ID", "Start Time (s)", "End Time (s)", "Transcript"])  # CSV headers
 
-            # Parse the VTT content
-            lines = vtt_text.splitlines()
-            for i in range(len(lines)):
-                if "-->" in lines[i]:  # Look for the timestamp line
-                    # Extract timestamps
-                    times = lines[i].split(" --> ")
-                    start_time = convert_vtt_time_to_seconds(times[0])
-                    end_time = convert_vtt_time_to_seconds(times[1])
-
-                    # Extract the transcript text
-                    transcript = lines[i + 1] if i + 1 < len(lines) else ""
-
-                    # Write to CSV
-                    writer.writerow([
-                        f"https://youtu.be/{video_id}",
-                        round(start_time, 2),  # Start time in seconds
-                        round(end_time, 2),    # End time in seconds
-                        transcript.strip()     # Remove extra spaces
-                    ])
+            # Cues are parsed one at a time (multi-line cues, cue settings, MM:SS.mmm times)
+            for start_time, end_time, transcript in iter_vtt_cues(io.StringIO(vtt_text)):
+                writer.writerow([
+                    f"https://youtu.be/{video_id}",
+                    round(start_time, 2),  # Start time in seconds
+                    round(end_time, 2),    # End time in seconds
+                    transcript             # All lines of the cue
+                ])
         return output_path
     except Exception as e:
         st.error(f"An error occurred while saving to CSV: {e}")
         return None
 
 
-# Function to convert VTT time format to seconds
-def convert_vtt_time_to_seconds(vtt_time):
-    h, m, s = vtt_time.split(":")
-    s, ms = map(float, s.split("."))
-    return int(h) * 3600 + int(m) * 60 + s + ms / 1000
-
-
 # Streamlit App
 st.title("YouTube Audio Transcription")
 
@@ -103,6 +87,11 @@ languages = {
 }
 selected_language = st.selectbox("Select Language for Transcription", list(languages.keys()), format_func=lambda x: languages[x])
 
+# Upload settings for long audio
+with st.expander("Upload settings"):
+    chunk_seconds = st.number_input("Chunk length (seconds)", min_value=30, max_value=3600, value=300)
+    max_concurrency = st.number_input("Parallel chunk uploads", min_value=1, max_value=16, value=4)
+
 # Process button
 if st.button("Transcribe and Save"):
     if youtube_url and selected_language:
@@ -115,7 +104,9 @@ if st.button("Transcribe and Save"):
 
             # Step 2: Transcribe the audio
             st.info("Transcribing audio, please wait...")
-            transcription_result = transcribe_audio(audio_file_path, selected_language)
+            transcription_result = transcribe_audio(
+                audio_file_path, selected_language, int(chunk_seconds), int(max_concurrency)
+            )
 
             if transcription_result:
                 st.success("Transcription completed successfully!")
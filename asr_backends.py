@@ -0,0 +1,318 @@
+import os
+import tempfile
+import wave
+
+from model_cache import ModelRegistry, get_default_device, get_default_registry
+from subtitles import cues_to_segments, parse_vtt_cues
+
+# IITM's endpoint takes language names instead of ISO codes
+IITM_LANGUAGE_NAMES = {
+    "hi": "hindi",
+    "ta": "tamil",
+    "kn": "kannada",
+    "te": "telugu",
+    "ml": "malayalam",
+    "mr": "marathi",
+    "gu": "gujarati",
+    "pa": "punjabi",
+    "bn": "bengali",
+}
+
+# -----------------------------
+# 1. Backend Interface
+# -----------------------------
+class ASRBackend:
+    """
+    Common interface for every speech recognition engine.
+
+    transcribe() takes an audio file path or a 16 kHz mono float32 array and
+    returns a list of normalized segments: {"start": s, "end": s, "text": str}
+    with times in seconds from the start of the audio.
+    """
+
+    name = None
+
+    def __init__(self, model_name=None, device=None, replica=0):
+        self.model_name = model_name
+        self.device = device
+        self.replica = replica
+
+    def load(self):
+        """
+        Loads (or fetches from the model cache) whatever transcribe() needs,
+        so model load time can be measured separately from decoding.
+        """
+        return None
+
+    def transcribe(self, audio, language):
+        raise NotImplementedError
+
+    def transcribe_batch(self, clips, language):
+        """
+        Transcribes several short arrays (up to 30 s each) of one language and
+        returns one segment list per clip. Engines that can decode a batch in
+        a single forward pass override this; the default decodes one by one.
+        """
+        return [self.transcribe(clip, language) for clip in clips]
+
+    def detect_language(self, audio):
+        """
+        Spoken-language probabilities {code: p} for up to 30 s of 16 kHz
+        audio, or None when the engine cannot tell (the caller then uses the
+        language it was given).
+        """
+        return None
+
+    def info(self):
+        return {"backend": self.name, "model": self.model_name, "device": self.device}
+
+
+def normalize_segments(segments):
+    return [
+        {"start": float(segment["start"]), "end": float(segment["end"]), "text": segment["text"]}
+        for segment in segments
+    ]
+
+# -----------------------------
+# 2. OpenAI Whisper (PyTorch)
+# -----------------------------
+# Whisper's own fallback thresholds (see whisper.transcribe)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+
+def tokens_to_segments(tokens, tokenizer, clip_seconds):
+    """
+    Splits a decoded token sequence at its timestamp tokens
+    (<|0.00|> text <|2.40|><|2.40|> text <|5.00|>) into segment dicts.
+    """
+    segments = []
+    start = None
+    text_tokens = []
+    for token in tokens:
+        if token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+        time_seconds = (token - tokenizer.timestamp_begin) * 0.02
+        if start is not None and text_tokens:
+            segments.append({"start": start, "end": time_seconds, "text": tokenizer.decode(text_tokens).strip()})
+            start, text_tokens = None, []
+        else:
+            start = time_seconds
+    if text_tokens:
+        segments.append({"start": start or 0.0, "end": clip_seconds, "text": tokenizer.decode(text_tokens).strip()})
+    return [segment for segment in segments if segment["text"]]
+
+
+def decode_whisper_batch(model, clips, language, fp16=False):
+    """
+    Runs Whisper's encoder and greedy decoder once over a stacked mel tensor
+    of up to 30 s clips. Clips the batch decode gets wrong (repetition loops
+    or very low confidence) are decoded again on their own with
+    model.transcribe's temperature fallback.
+    """
+    import numpy as np
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    mel = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(np.ascontiguousarray(clip))), model.dims.n_mels)
+        for clip in clips
+    ]).to(model.device)
+    options = whisper.DecodingOptions(language=language, task="transcribe", fp16=fp16, without_timestamps=False)
+    results = whisper.decode(model, mel, options)
+    tokenizer = get_tokenizer(
+        model.is_multilingual, num_languages=model.num_languages, language=language, task="transcribe"
+    )
+
+    batch_segments = []
+    for clip, result in zip(clips, results):
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+            batch_segments.append([])
+        elif result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD:
+            fallback = model.transcribe(np.ascontiguousarray(clip), language=language, fp16=fp16)
+            batch_segments.append(normalize_segments(fallback["segments"]))
+        else:
+            batch_segments.append(tokens_to_segments(result.tokens, tokenizer, len(clip) / 16000))
+    return batch_segments
+
+
+class WhisperBackend(ASRBackend):
+    name = "whisper"
+
+    def __init__(self, model_name="turbo", device=None, replica=0):
+        super().__init__(model_name, device or get_default_device(), replica)
+
+    def load(self):
+        return get_default_registry().get(self.model_name, device=self.device, replica=self.replica)
+
+    def transcribe(self, audio, language):
+        model = self.load()
+        result = model.transcribe(audio, language=language, fp16=self.device != "cpu")
+        return normalize_segments(result["segments"])
+
+    def transcribe_batch(self, clips, language):
+        return decode_whisper_batch(self.load(), clips, language, fp16=self.device != "cpu")
+
+    def detect_language(self, audio):
+        # One encoder pass and a single decoder step over a 30 s mel
+        import numpy as np
+        import torch
+        import whisper
+
+        model = self.load()
+        if not model.is_multilingual:
+            return None
+        mel = whisper.log_mel_spectrogram(
+            whisper.pad_or_trim(torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32))), model.dims.n_mels
+        )
+        _, probabilities = model.detect_language(mel.to(model.device))
+        return dict(probabilities)
+
+# -----------------------------
+# 3. faster-whisper (CTranslate2, int8 on CPU)
+# -----------------------------
+def load_faster_whisper_model(name, device, dtype):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(name, device=device, compute_type=dtype, cpu_threads=os.cpu_count() or 1)
+
+
+def estimate_faster_whisper_bytes(model, name, dtype):
+    """
+    Estimates a CTranslate2 model's resident size from its files on disk
+    (a local folder, or the download WhisperModel just cached), scaled from
+    the float16 weights they are published in to `dtype` (int8 types keep
+    int8 weights). Returns 0 if the files cannot be found.
+    """
+    model_path = name
+    if not os.path.isdir(model_path):
+        try:
+            from faster_whisper.utils import download_model
+
+            model_path = download_model(name, local_files_only=True)
+        except Exception:
+            return 0
+    file_bytes = sum(
+        os.path.getsize(os.path.join(model_path, file_name))
+        for file_name in os.listdir(model_path)
+        if os.path.isfile(os.path.join(model_path, file_name))
+    )
+    if dtype.startswith("int8"):
+        return file_bytes // 2
+    if dtype == "float32":
+        return file_bytes * 2
+    return file_bytes  # float16, bfloat16, int16, or the stored type ("default"/"auto")
+
+
+# Separate registry: CTranslate2 models have their own loader, dtypes and sizes
+_faster_whisper_registry = ModelRegistry(loader=load_faster_whisper_model, sizer=estimate_faster_whisper_bytes)
+
+
+class FasterWhisperBackend(ASRBackend):
+    """
+    CTranslate2 re-implementation of Whisper. With compute_type="int8" it
+    usually runs several times faster than PyTorch Whisper on CPU with a
+    fraction of the memory (`pip install faster-whisper`).
+    """
+
+    name = "faster-whisper"
+
+    def __init__(self, model_name="turbo", device=None, replica=0, compute_type=None):
+        super().__init__(model_name, device or get_default_device(), replica)
+        self.compute_type = compute_type or ("int8" if self.device == "cpu" else "float16")
+
+    def load(self):
+        return _faster_whisper_registry.get(self.model_name, self.device, self.compute_type, self.replica)
+
+    def transcribe(self, audio, language):
+        model = self.load()
+        segments, _ = model.transcribe(audio, language=language, beam_size=5)
+        # faster-whisper yields segments lazily; decoding happens while iterating
+        return [
+            {"start": segment.start, "end": segment.end, "text": segment.text}
+            for segment in segments
+        ]
+
+    def detect_language(self, audio):
+        import numpy as np
+
+        # Only language detection runs here: the segments generator is never iterated
+        _, info = self.load().transcribe(np.asarray(audio, dtype=np.float32), language=None, beam_size=1)
+        all_probabilities = getattr(info, "all_language_probs", None)
+        return dict(all_probabilities) if all_probabilities else {info.language: info.language_probability}
+
+    def info(self):
+        return dict(super().info(), compute_type=self.compute_type)
+
+# -----------------------------
+# 4. IITM Remote ASR
+# -----------------------------
+def write_wav(audio, path, sample_rate=16000):
+    """
+    Writes a float32 array as 16-bit PCM WAV (for backends that need a file).
+    """
+    import numpy as np
+
+    pcm = (np.clip(np.asarray(audio, dtype=np.float32), -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+
+
+class IITMBackend(ASRBackend):
+    name = "iitm"
+
+    def __init__(self, model_name=None, device=None, replica=0, client=None):
+        super().__init__(model_name or "iitm-asr", "remote", replica)
+        from remote_asr import RemoteASRClient
+
+        self.client = client or RemoteASRClient()
+
+    def transcribe(self, audio, language):
+        language = IITM_LANGUAGE_NAMES.get(language, language)
+        if isinstance(audio, str):
+            result = self.client.transcribe(audio, language)
+        else:
+            handle, wav_path = tempfile.mkstemp(suffix=".wav")
+            os.close(handle)
+            try:
+                write_wav(audio, wav_path)
+                result = self.client.transcribe(wav_path, language)
+            finally:
+                os.remove(wav_path)
+        return cues_to_segments(parse_vtt_cues(result.get("vtt", "")))
+
+# -----------------------------
+# 5. Backend Lookup
+# -----------------------------
+BACKENDS = {
+    WhisperBackend.name: WhisperBackend,
+    FasterWhisperBackend.name: FasterWhisperBackend,
+    IITMBackend.name: IITMBackend,
+}
+
+
+def get_backend(name, model_name=None, device=None, replica=0):
+    """
+    Creates the backend registered under `name` ("whisper", "faster-whisper"
+    or "iitm"). Models are cached by the registries, so this is cheap.
+    """
+    backend_class = BACKENDS[name]
+    if model_name:
+        return backend_class(model_name=model_name, device=device, replica=replica)
+    return backend_class(device=device, replica=replica)
+
+
+def get_model_stats():
+    """
+    Load time / resident size / hit stats for every model loaded by any backend.
+    """
+    return (
+        [dict(info, backend=WhisperBackend.name) for info in get_default_registry().stats()]
+        + [dict(info, backend=FasterWhisperBackend.name) for info in _faster_whisper_registry.stats()]
+    )
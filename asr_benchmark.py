@@ -0,0 +1,131 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+from audio_io import load_audio_array
+
+# Default fixture: a short clip in the fixtures folder with its reference
+# transcript next to it (same name, .txt). If the clip is missing, a
+# synthetic one is generated there (speed and memory only, no WER).
+DEFAULT_FIXTURE = os.path.join("fixtures", "benchmark_clip.wav")
+DEFAULT_FIXTURE_SECONDS = 30
+
+# -----------------------------
+# 1. Word Error Rate
+# -----------------------------
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level Levenshtein distance divided by the reference length.
+    """
+    ref = reference.split()
+    hyp = hypothesis.split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,                               # deletion
+                current[j - 1] + 1,                            # insertion
+                previous[j - 1] + (ref_word != hyp_word),      # substitution
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def get_peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# -----------------------------
+# 2. Single-Backend Run (own process)
+# -----------------------------
+def _run_backend(backend_name, model_name, audio_file, language, reference, results):
+    from asr_backends import get_backend
+
+    try:
+        audio = load_audio_array(audio_file)
+        duration = len(audio) / 16000
+        backend = get_backend(backend_name, model_name)
+
+        start = time.perf_counter()
+        backend.transcribe(audio[:16000 * 5], language)  # warm-up: load weights
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        segments = backend.transcribe(audio, language)
+        wall_seconds = time.perf_counter() - start
+
+        hypothesis = " ".join(segment["text"].strip() for segment in segments)
+        results.put({
+            "backend": backend_name,
+            "model": model_name,
+            "language": language,
+            "audio_seconds": round(duration, 2),
+            "wall_seconds": round(wall_seconds, 2),
+            "warmup_seconds": round(load_seconds, 2),
+            "real_time_factor": round(wall_seconds / duration, 4) if duration else None,
+            "peak_rss_mb": round(get_peak_rss_mb(), 1),
+            "wer": round(word_error_rate(reference, hypothesis), 4) if reference else None,
+        })
+    except Exception as e:
+        results.put({"backend": backend_name, "model": model_name, "error": str(e)})
+
+
+def benchmark_backends(backends, audio_file, language, reference=None):
+    """
+    Runs each (backend, model) pair in a fresh process on the same clip so
+    peak RSS is measured per engine, and reports real-time factor
+    (wall seconds per audio second; lower is faster), peak RSS and WER.
+    """
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for backend_name, model_name in backends:
+        results = context.Queue()
+        process = context.Process(
+            target=_run_backend, args=(backend_name, model_name, audio_file, language, reference, results)
+        )
+        process.start()
+        report.append(results.get())
+        process.join()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare ASR backends on a local fixture clip.")
+    parser.add_argument("--audio", default=DEFAULT_FIXTURE, help="Fixture audio clip")
+    parser.add_argument("--reference", default=None, help="Reference transcript (default: <audio>.txt)")
+    parser.add_argument("--language", default="hi", help="Language code (default: hi)")
+    parser.add_argument(
+        "--backend", action="append", default=None,
+        help="backend[:model], repeatable (default: whisper:turbo and faster-whisper:turbo)",
+    )
+    args = parser.parse_args()
+
+    if args.audio == DEFAULT_FIXTURE and not os.path.exists(DEFAULT_FIXTURE):
+        from pipeline_benchmark import make_fixture_wav
+
+        os.makedirs(os.path.dirname(DEFAULT_FIXTURE), exist_ok=True)
+        make_fixture_wav(DEFAULT_FIXTURE, DEFAULT_FIXTURE_SECONDS)
+        print(f"Generated a {DEFAULT_FIXTURE_SECONDS} s synthetic clip at {DEFAULT_FIXTURE} "
+              "(no reference transcript, so no WER).", file=sys.stderr)
+
+    reference_path = args.reference or os.path.splitext(args.audio)[0] + ".txt"
+    reference = None
+    if os.path.exists(reference_path):
+        with open(reference_path, encoding="utf-8") as file:
+            reference = file.read()
+
+    backends = [
+        tuple(spec.split(":", 1)) if ":" in spec else (spec, None)
+        for spec in (args.backend or ["whisper:turbo", "faster-whisper:turbo"])
+    ]
+    for row in benchmark_backends(backends, args.audio, args.language, reference):
+        print(json.dumps(row, ensure_ascii=False))
@@ -0,0 +1,223 @@
+import os
+import subprocess
+
+import yt_dlp
+
+# Whisper (and most ASR models) expect 16 kHz mono float32 PCM; it is kept
+# on disk as 16-bit samples (~115 MB per hour instead of ~230 MB) and
+# converted to float32 as it is loaded
+SAMPLE_RATE = 16000
+PCM_SUFFIX = ".16k.s16"
+PCM_BYTES_PER_SAMPLE = 2
+
+# Native audio containers YouTube serves for bestaudio
+NATIVE_AUDIO_EXTENSIONS = ("m4a", "webm", "opus", "ogg", "mp4", "mp3")
+
+# Lowest audio bitrate picked for ASR; speech models see 16 kHz mono, so
+# YouTube's ~50 kbps Opus / 48 kbps AAC streams lose nothing they use
+MIN_AUDIO_KBPS = 48
+
+# -----------------------------
+# 1. Download Native Audio
+# -----------------------------
+def find_native_audio(video_id, output_path):
+    for ext in NATIVE_AUDIO_EXTENSIONS:
+        path = os.path.join(output_path, f"{video_id}.{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def audio_format_selector(min_kbps=MIN_AUDIO_KBPS):
+    """
+    yt-dlp format string for the smallest audio-only stream of at least
+    `min_kbps`. Falls back to the best audio-only stream when none is that
+    good, and only then to the smallest muxed stream (never the best video).
+    """
+    return f"worstaudio[abr>={min_kbps}]/bestaudio/worst"
+
+
+def download_native_audio(video_id, output_path=".", archive_mp3=False, min_kbps=MIN_AUDIO_KBPS, ydl_options=None):
+    """
+    Downloads the smallest audio-only stream of a video that meets
+    `min_kbps` in its native container (m4a/webm/opus) without re-encoding it.
+
+    With archive_mp3=True a 192 kbps MP3 copy is also kept next to it
+    (the old archival output). `ydl_options` are merged into the yt-dlp
+    options (rate limits, fragment concurrency, progress hooks). Returns
+    the path of the native file.
+    """
+    os.makedirs(output_path, exist_ok=True)
+    existing = find_native_audio(video_id, output_path)
+    if existing and (not archive_mp3 or os.path.exists(os.path.join(output_path, f"{video_id}.mp3"))):
+        return existing
+
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    ydl_opts = {
+        'format': audio_format_selector(min_kbps),
+        'outtmpl': os.path.join(output_path, f'{video_id}.%(ext)s'),
+        **(ydl_options or {}),
+    }
+    if archive_mp3:
+        ydl_opts['postprocessors'] = [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }]
+        ydl_opts['keepvideo'] = True  # keep the native file as well as the MP3
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+        return ydl.prepare_filename(info)
+
+# -----------------------------
+# 2. Decode Once to 16 kHz Mono PCM
+# -----------------------------
+def get_pcm_path(audio_file):
+    return os.path.splitext(audio_file)[0] + PCM_SUFFIX
+
+
+def decode_to_pcm_file(audio_file, pcm_path=None):
+    """
+    Decodes any audio/video file with a single ffmpeg pass straight into a raw
+    16 kHz mono 16-bit (little-endian) file that can be memory-mapped.
+    Returns the PCM path.
+    """
+    pcm_path = pcm_path or get_pcm_path(audio_file)
+    if os.path.exists(pcm_path):
+        return pcm_path
+
+    tmp_path = pcm_path + ".part"
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            "-i", audio_file,
+            "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-f", "s16le", tmp_path,
+        ],
+        check=True,
+    )
+    os.replace(tmp_path, pcm_path)
+    return pcm_path
+
+
+def is_pcm_file(path):
+    return path.endswith(PCM_SUFFIX)
+
+
+def load_pcm(pcm_path, start=0, stop=None):
+    """
+    Returns samples [start, stop) of a raw 16-bit PCM file as a float32
+    array in [-1, 1). The file is memory-mapped and only the requested
+    range is read and converted, so a window of a long video costs the
+    window's size in memory, not the file's.
+    """
+    import numpy as np
+
+    return to_float32(np.memmap(pcm_path, dtype="<i2", mode="r")[start:stop])
+
+
+def to_float32(samples):
+    """
+    Converts 16-bit samples to float32 in [-1, 1); float arrays are only
+    cast.
+    """
+    import numpy as np
+
+    if samples.dtype == np.int16:
+        return samples.astype(np.float32) / 32768.0
+    return np.asarray(samples, dtype=np.float32)
+
+
+def pcm_duration(pcm_path):
+    return os.path.getsize(pcm_path) / (PCM_BYTES_PER_SAMPLE * SAMPLE_RATE)
+
+
+def load_audio_for_asr(audio_file):
+    """
+    Returns what should be passed to model.transcribe: a float32 array for
+    decoded PCM files, or the path itself for anything else (Whisper then
+    decodes it with ffmpeg as before).
+    """
+    if is_pcm_file(audio_file):
+        return load_pcm(audio_file)
+    return audio_file
+
+
+def load_audio_array(audio_file):
+    """
+    Returns the audio as a 16 kHz mono float32 array: converted from the
+    16-bit PCM file, or decoded through an ffmpeg pipe for anything else.
+    """
+    import numpy as np
+
+    if is_pcm_file(audio_file):
+        return load_pcm(audio_file)
+    output = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", audio_file,
+            "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-f", "f32le", "-",
+        ],
+        capture_output=True, check=True,
+    ).stdout
+    return np.frombuffer(output, dtype=np.float32)
+
+
+def load_audio_samples(audio_file):
+    """
+    Returns the audio as a 16 kHz mono array without converting it: the
+    16-bit memory map for PCM files (nothing is read until it is sliced),
+    an ffmpeg decode for anything else. Pass slices through to_float32.
+    """
+    import numpy as np
+
+    if is_pcm_file(audio_file):
+        return np.memmap(audio_file, dtype="<i2", mode="r")
+    return load_audio_array(audio_file)
+
+
+def load_audio_window(audio_file, start, seconds):
+    """
+    Returns `seconds` of audio from `start` as a 16 kHz mono float32 array
+    without decoding the rest of the file: a converted slice of the memory
+    map for PCM files, a seeked ffmpeg decode for anything else.
+    """
+    import numpy as np
+
+    if is_pcm_file(audio_file):
+        return load_pcm(audio_file, int(start * SAMPLE_RATE), int((start + seconds) * SAMPLE_RATE))
+    output = subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-ss", str(start), "-t", str(seconds),
+            "-i", audio_file,
+            "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "-f", "f32le", "-",
+        ],
+        capture_output=True, check=True,
+    ).stdout
+    return np.frombuffer(output, dtype=np.float32)
+
+
+def probe_duration(audio_file):
+    """
+    Returns the duration of an audio file in seconds (using ffprobe for
+    encoded files), or 0.0 if it cannot be determined.
+    """
+    if is_pcm_file(audio_file):
+        return pcm_duration(audio_file)
+    try:
+        output = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                audio_file,
+            ],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        return float(output.strip())
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return 0.0
@@ -0,0 +1,803 @@
+import argparse
+import csv
+import functools
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from asr_backends import BACKENDS, get_backend
+from audio_io import (
+    PCM_SUFFIX,
+    MIN_AUDIO_KBPS,
+    decode_to_pcm_file,
+    load_audio_array,
+    load_audio_for_asr,
+    load_audio_samples,
+    pcm_duration,
+    probe_duration,
+    to_float32,
+)
+from channel_sync import ChannelManifest, sync_channel
+from chunked_transcribe import transcribe_in_chunks
+from clip_batcher import ClipBatcher
+from download_manager import AUDIO_RETENTION_MODES, DownloadManager
+from handle_resolver import HandleCache, resolve_channel_ids
+from job_store import VideoJobStore, make_run_key
+from language_detection import LanguageCache, LanguageRouter, parse_language_models
+from perf_trace import SpanRecorder, file_size
+from pipeline import run_pipeline
+from transcript_cache import TranscriptCache
+from transcript_export import StreamingTranscriptExporter
+from transcript_search import TranscriptIndex
+from transcript_store import TranscriptStore
+from transcription_farm import TranscriptionFarm
+from vad import transcribe_with_vad
+from work_planner import PRIORITY_POLICIES, describe_plan, measure_rates, plan_work
+from work_scheduler import WorkScheduler
+from youtube_client import YouTubeAPI
+
+# Everything a channel run can be configured with; jobs store only overrides
+DEFAULT_SETTINGS = {
+    "language_code": "hi",
+    "output_path": "audio_files",
+    "backend": "whisper",
+    "model_name": "turbo",
+    "archive_mp3": False,
+    "min_audio_kbps": MIN_AUDIO_KBPS,
+    "fragment_downloads": 4,
+    "rate_limit_mbps": 0,
+    "audio_retention": "keep",
+    "disk_quota_mb": 0,
+    "incremental_sync": True,
+    "only_pending": False,
+    "retry_failed_only": False,
+    "download_workers": 2,
+    "transcribe_workers": 1,
+    "max_pending_audio": 4,
+    "use_process_pool": False,
+    "farm_workers": 1,
+    "farm_threads": 0,
+    "vad_method": None,
+    "chunk_minutes": 0,
+    "chunk_overlap_seconds": 10,
+    "chunk_workers": 2,
+    "batch_size": 0,
+    "batch_max_seconds": 180,
+    "cache_max_mb": 2048,
+    "export_formats": ["xlsx"],
+    "xlsx_engine": "openpyxl",
+    "prometheus_metrics": False,
+    "search_index": True,
+    "asr_slots": 0,
+    "api_quota_budget": 0,
+    "api_workers": 8,
+    "min_duration_seconds": 0,
+    "max_duration_seconds": 0,
+    "published_after": None,
+    "published_before": None,
+    "exclude_shorts": False,
+    "exclude_live": False,
+    "title_regex": None,
+    "priority": "newest",
+    "audio_hours_budget": 0,
+    "detect_language": False,
+    "language_confidence": 0.6,
+    "detection_windows": 1,
+    "candidate_languages": [],
+    "language_models": {},
+}
+
+
+class JobCancelled(Exception):
+    pass
+
+# -----------------------------
+# 1. Timestamp Helper
+# -----------------------------
+def get_timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+# -----------------------------
+# 2. Shared Stores (one per process, like st.cache_resource in the apps)
+# -----------------------------
+@functools.lru_cache(maxsize=None)
+def get_handle_cache(db_path):
+    return HandleCache(db_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_channel_manifest(db_path):
+    return ChannelManifest(db_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_video_job_store(db_path):
+    return VideoJobStore(db_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_transcript_cache(cache_dir, max_mb):
+    return TranscriptCache(cache_dir, max_bytes=max_mb * 1024 * 1024)
+
+
+@functools.lru_cache(maxsize=None)
+def get_transcript_index(db_path):
+    return TranscriptIndex(db_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_language_cache(db_path):
+    return LanguageCache(db_path)
+
+
+@functools.lru_cache(maxsize=None)
+def get_transcript_store(directory):
+    return TranscriptStore(directory)
+
+
+@functools.lru_cache(maxsize=None)
+def get_asr_scheduler():
+    # Every run in this process shares it: identical transcriptions run once, under one concurrency cap
+    return WorkScheduler()
+
+
+@functools.lru_cache(maxsize=None)
+def get_download_scheduler():
+    return WorkScheduler()
+
+
+@functools.lru_cache(maxsize=None)
+def get_language_detector(backend_name, model_name):
+    # One detection model for every worker and run in the process; detection only
+    # decodes a short sample, so callers take turns on it under the lock
+    return get_backend(backend_name, model_name, replica="detect"), threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_clip_batcher(backend_name, model_name, batch_size):
+    # One scheduler (and model copy) shared by every transcription worker
+    return ClipBatcher(get_backend(backend_name, model_name, replica="batch"), batch_size=batch_size)
+
+
+def get_decoding_options(settings):
+    # Same options as the Streamlit app, so both share cached transcripts. The process
+    # pool decodes every file whole and unbatched, so its transcripts are keyed without them
+    options = {"vad": settings["vad_method"]} if settings["vad_method"] else {}
+    if settings["use_process_pool"]:
+        return options
+    if settings["chunk_minutes"]:
+        options["chunk"] = [settings["chunk_minutes"] * 60, settings["chunk_overlap_seconds"]]
+    if settings["batch_size"] > 1:
+        options["batch"] = [settings["batch_max_seconds"]]
+    return options
+
+
+def is_batched(audio_file, settings):
+    # Short clips go through the shared batch scheduler instead of their own decode
+    return settings["batch_size"] > 1 and probe_duration(audio_file) <= settings["batch_max_seconds"]
+
+# -----------------------------
+# 3. Per-Video Transcription
+# -----------------------------
+def save_transcript(transcript_store, video_id, segments, transcript_file_path, channel_id=None, language=None):
+    """
+    Appends segments to the transcript store, then writes the per-video CSV
+    view from it (atomically). Returns the rows.
+    """
+    transcript_store.add_video(video_id, segments, channel_id=channel_id, language=language)
+    return transcript_store.export_csv(video_id, transcript_file_path)
+
+
+def read_csv_rows(transcript_file_path):
+    """
+    Reads the rows of a per-video CSV (transcripts written before the
+    transcript store existed).
+    """
+    with open(transcript_file_path, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        next(reader, None)
+        return [[video_id, float(start), float(end), text] for video_id, start, end, text in reader]
+
+
+def transcribe_segments(audio_file, language_code, settings, replica=0, checkpoint_dir=None, perf=None):
+    """
+    Runs the configured backend on one audio file (with the optional VAD
+    pre-pass and long-audio chunking, checkpointed in `checkpoint_dir`).
+    Short clips are decoded in batches with other videos' clips when
+    settings["batch_size"] > 1.
+    Model loading and decoding are timed as separate spans on `perf`.
+    Returns (segments, vad_stats).
+    """
+    perf = perf or SpanRecorder()
+    if is_batched(audio_file, settings):
+        batcher = get_clip_batcher(settings["backend"], settings["model_name"], settings["batch_size"])
+        with perf.span("model_load"):
+            batcher.backend.load()
+        with perf.span("decode", batched=True):
+            transcribe = lambda audio: batcher.transcribe(audio, language_code)
+            if settings["vad_method"]:
+                return transcribe_with_vad(transcribe, load_audio_array(audio_file), settings["vad_method"])
+            return transcribe(load_audio_array(audio_file)), None
+
+    backend = get_backend(settings["backend"], settings["model_name"], replica=replica)
+    with perf.span("model_load"):
+        backend.load()
+    with perf.span("decode"):
+        return _decode(backend, audio_file, language_code, settings, replica, checkpoint_dir)
+
+
+def _decode(backend, audio_file, language_code, settings, replica, checkpoint_dir):
+    chunk_seconds = settings["chunk_minutes"] * 60
+    vad_method = settings["vad_method"]
+
+    if chunk_seconds and settings["backend"] != "iitm" and probe_duration(audio_file) > chunk_seconds:
+        # The 16-bit PCM stays memory-mapped; each chunk worker converts only its window
+        audio = load_audio_samples(audio_file)
+        chunk_vad_stats = []
+
+        def transcribe_fn_factory(worker_index):
+            chunk_backend = get_backend(settings["backend"], settings["model_name"], replica=(replica, worker_index))
+            if not vad_method:
+                return lambda window: chunk_backend.transcribe(to_float32(window), language_code)
+
+            def transcribe_window(window):
+                segments, stats = transcribe_with_vad(
+                    lambda speech: chunk_backend.transcribe(speech, language_code), to_float32(window), vad_method
+                )
+                chunk_vad_stats.append(stats)
+                return segments
+            return transcribe_window
+
+        segments = transcribe_in_chunks(
+            audio, transcribe_fn_factory, checkpoint_dir or f"{os.path.splitext(audio_file)[0]}.chunks",
+            chunk_seconds=chunk_seconds,
+            overlap_seconds=settings["chunk_overlap_seconds"],
+            max_workers=settings["chunk_workers"],
+        )
+        vad_stats = None
+        if chunk_vad_stats:
+            vad_stats = {
+                "audio_seconds": sum(stats["audio_seconds"] for stats in chunk_vad_stats),
+                "speech_seconds": sum(stats["speech_seconds"] for stats in chunk_vad_stats),
+            }
+        return segments, vad_stats
+
+    if vad_method:
+        return transcribe_with_vad(
+            lambda speech: backend.transcribe(speech, language_code), load_audio_array(audio_file), vad_method
+        )
+    return backend.transcribe(load_audio_for_asr(audio_file), language_code), None
+
+# -----------------------------
+# 4. Channel Run
+# -----------------------------
+def run_channel(channel_input, api_key, settings=None, on_progress=None, should_stop=None):
+    """
+    Runs the whole pipeline for one channel without any UI:
+    resolve handle -> list videos -> download -> transcribe -> export.
+
+    - settings: overrides for DEFAULT_SETTINGS.
+    - on_progress(update) is called with a dict (stage, message, total, done,
+      failed, video_id) whenever something changes.
+    - should_stop() is polled between videos; returning True cancels the
+      run: no new downloads or transcriptions are started, finished
+      transcripts are still exported and JobCancelled is raised.
+
+    Every stage (API calls, yt-dlp, ffmpeg, model load, decoding, export) is
+    timed and written as JSON lines to <output_path>/perf/; the summary has
+    the per-stage table under "perf" (and metrics.prom is written there too
+    with prometheus_metrics=True).
+
+    Data API calls share one YouTubeAPI (concurrency, retries and an
+    optional api_quota_budget); "api" in the summary has the quota spent.
+
+    With detect_language=True each video's language is detected on a short
+    sample first (cached in <output_path>/language_cache.sqlite3) and the
+    video is transcribed in that language, with the model given for it in
+    language_models; low-confidence detections keep language_code.
+    "languages" in the summary counts what was routed where.
+
+    Runs in the same process (threads of one worker, or an embedding app)
+    share two schedulers (work_scheduler.py): a video that another run is
+    already downloading, or transcribing with the same backend, model,
+    language and options, is waited for instead of processed twice, and at
+    most asr_slots transcriptions run at once across all of them (0 = no
+    cap). "scheduler" in the summary has the queue and utilization.
+
+    Each video's stage, attempts, errors and timings are kept in
+    <output_path>/video_jobs.sqlite3. Videos already transcribed by an
+    earlier (possibly crashed) run are exported from the transcript store
+    (<output_path>/transcript_store/, see transcript_store.py) without any
+    work; the per-video CSVs are views written from it. With
+    retry_failed_only=True only the videos that failed last time are
+    processed.
+
+    Combined exports go to <output_path>/exports/<channel_id>/<run_id>/, so
+    neither other channels nor other runs of the same channel (e.g. two
+    Streamlit sessions) overwrite them. Returns a summary dict.
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    check_settings(settings)
+    output_path = settings["output_path"]
+    language_code = settings["language_code"]
+    os.makedirs(output_path, exist_ok=True)
+    run_start = time.perf_counter()
+    perf_dir = os.path.join(output_path, "perf")
+    perf = SpanRecorder()
+
+    state = {"stage": "resolve", "total": 0, "done": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def report(message, **changes):
+        with lock:
+            state.update(changes)
+            update = dict(state, message=f"[{get_timestamp()}] {message}")
+        if on_progress:
+            on_progress(update)
+
+    # Every Data API call of the run goes through one client, so quota is counted per run
+    api = YouTubeAPI(api_key, quota_budget=settings["api_quota_budget"], max_workers=settings["api_workers"])
+
+    # 1. Handle/URL -> channel ID
+    report(f"Resolving {channel_input}...")
+    handle_cache = get_handle_cache(os.path.join(output_path, "handle_cache.sqlite3"))
+    with perf.span("youtube_api.resolve"):
+        channel_id = resolve_channel_ids([channel_input], api, handle_cache)[channel_input]
+    if not channel_id:
+        raise ValueError(f"Could not find a channel matching {channel_input!r}.")
+    perf.set_trace_file(os.path.join(perf_dir, f"{channel_id}_{perf.run_id}.jsonl"))
+
+    # 2. Video IDs (incremental sync keeps a manifest with per-video status)
+    report(f"Listing videos of {channel_id}...", stage="list", channel_id=channel_id)
+    manifest = get_channel_manifest(os.path.join(output_path, "channel_manifest.sqlite3"))
+    with perf.span("youtube_api.list_videos") as span:
+        if settings["incremental_sync"]:
+            _, span["api_calls"] = sync_channel(api, manifest, channel_id)
+            statuses = ["new", "failed"] if settings["only_pending"] else None
+            video_ids = [video["video_id"] for video in manifest.list_videos(channel_id, statuses=statuses)]
+        else:
+            _, span["api_calls"] = sync_channel(api, manifest, channel_id, full=True)
+            video_ids = [video["video_id"] for video in manifest.list_videos(channel_id)]
+    # No more Data API calls after listing; stats() still works on a closed client
+    api.close()
+
+    def record_status(video_id, status):
+        manifest.set_status(channel_id, video_id, status)
+
+    # 3. Per-video state of this channel + configuration
+    cache = get_transcript_cache(os.path.join(output_path, "transcript_cache"), settings["cache_max_mb"])
+    # Cache counters are process-wide; the summary reports this run's share
+    cache_stats_before = cache.stats()
+    transcript_store = get_transcript_store(os.path.join(output_path, "transcript_store"))
+    options = get_decoding_options(settings)
+    video_jobs = get_video_job_store(os.path.join(output_path, "video_jobs.sqlite3"))
+    # Auto-detected runs keep their own video states: each video's language is only known once it is routed
+    run_language = f"auto:{language_code}" if settings["detect_language"] else language_code
+    run_key = make_run_key(channel_id, run_language, settings["backend"], settings["model_name"], options)
+    if settings["retry_failed_only"]:
+        video_ids = [video["video_id"] for video in video_jobs.list_videos(run_key, stages=["failed"])]
+
+    # Filters, priority and the audio budget are applied before anything is downloaded
+    known_videos = {video["video_id"]: video for video in manifest.list_videos(channel_id)}
+    finished = {video_id for video_id in video_ids if video_jobs.is_transcribed(run_key, video_id)}
+    video_ids, pending_ids, plan = plan_work(
+        [known_videos.get(video_id, {"video_id": video_id}) for video_id in video_ids],
+        settings, finished, measure_rates(video_jobs, manifest, run_key),
+    )
+    finished_ids = [video_id for video_id in video_ids if video_id in finished]
+    video_ids = finished_ids + pending_ids
+    if settings["use_process_pool"]:
+        # Longest first, so a long video starts early on its worker process instead of
+        # holding up the end of the run; unknown lengths go first (they may be long streams)
+        pending_ids = sorted(
+            pending_ids,
+            key=lambda video_id: -(known_videos.get(video_id, {}).get("duration_seconds") or float("inf")),
+        )
+    video_jobs.add_videos(run_key, video_ids)
+    report(describe_plan(plan), stage="plan")
+
+    # Language (and model) each video is transcribed with
+    default_route = {"language": language_code, "model_name": settings["model_name"]}
+    routes = {}
+    router = None
+    if settings["detect_language"]:
+        router = LanguageRouter(
+            get_language_cache(os.path.join(output_path, "language_cache.sqlite3")),
+            f"{settings['backend']}:{settings['model_name']}:{settings['detection_windows']}",
+            language_code, settings["model_name"],
+            min_confidence=settings["language_confidence"],
+            windows=settings["detection_windows"],
+            candidate_languages=settings["candidate_languages"],
+            language_models=settings["language_models"],
+        )
+
+    def route_video(video_id, audio_file):
+        if router is None:
+            return default_route
+        backend, detect_lock = get_language_detector(settings["backend"], settings["model_name"])
+        with detect_lock:
+            with perf.span("model_load"):
+                backend.load()
+            with perf.span("language_detect", video_id) as span:
+                route = router.route(video_id, audio_file, backend)
+                span.update(language=route["language"], confidence=route["confidence"], cached=route["cached"])
+        routes[video_id] = route
+        return route
+
+    def cache_key(audio_file, route):
+        return cache.key_for(audio_file, settings["backend"], route["model_name"], route["language"], options)
+
+    def transcript_path(video_id):
+        return os.path.join(output_path, f"{video_id}_transcription.csv")
+
+    def put_in_cache(audio_file, video_id, segments):
+        route = routes.get(video_id, default_route)
+        cache.put(
+            cache_key(audio_file, route), segments, video_id=video_id, backend=settings["backend"],
+            model_name=route["model_name"], language=route["language"], options=options,
+        )
+
+    def save(video_id, segments):
+        return save_transcript(
+            transcript_store, video_id, segments, transcript_path(video_id),
+            channel_id=channel_id, language=routes.get(video_id, default_route)["language"],
+        )
+
+    def stored_rows(video_id):
+        # Older transcripts only have their CSV; they are added to the store on first read
+        rows = transcript_store.rows(video_id)
+        if rows is None:
+            rows = read_csv_rows(transcript_path(video_id))
+            transcript_store.add_video(video_id, rows, channel_id=channel_id)
+        return rows
+
+    # Models whose batch scheduler this run used (routing can pick several)
+    batched_models = set()
+
+    asr_scheduler = get_asr_scheduler()
+    if settings["asr_slots"]:
+        asr_scheduler.set_max_running(settings["asr_slots"])
+
+    vad_stats = []
+    downloads = DownloadManager(
+        output_path,
+        min_kbps=settings["min_audio_kbps"],
+        fragment_downloads=settings["fragment_downloads"],
+        rate_limit_mbps=settings["rate_limit_mbps"],
+        audio_retention=settings["audio_retention"],
+        disk_quota_mb=settings["disk_quota_mb"],
+        archive_mp3=settings["archive_mp3"],
+    )
+
+    # At most transcribe_workers of this run's videos are decoded on a model of their own
+    # (not batched) at once, however many pipeline workers batching adds
+    own_model_slots = threading.BoundedSemaphore(settings["transcribe_workers"])
+
+    def stop_requested():
+        return bool(should_stop and should_stop())
+
+    def transcribe_fn(audio_file, video_id, worker):
+        if stop_requested():
+            raise JobCancelled("cancelled before transcription")
+        video_jobs.set_stage(run_key, video_id, "transcribing")
+        start = time.perf_counter()
+        route = route_video(video_id, audio_file)
+        with perf.span("cache_lookup", video_id):
+            key = cache_key(audio_file, route)
+            segments = cache.get(key)
+        if segments is not None:
+            rows = save(video_id, segments)
+            video_jobs.mark_transcribed(run_key, video_id, transcript_path(video_id), time.perf_counter() - start)
+            return rows
+        checkpoint_dir = f"{os.path.splitext(audio_file)[0]}.chunks_{key[:16]}"
+
+        batched = not settings["use_process_pool"] and is_batched(audio_file, settings)
+        if batched:
+            batched_models.add(route["model_name"])
+
+        def farm_task(slot):
+            # Handed to the worker processes right away (they pick their own model copy);
+            # this thread waits for the result, so no more files are in the pool than
+            # the pipeline has transcription workers
+            result = farm.transcribe(audio_file, video_id, route["language"], route["model_name"])
+            perf.record("transcribe", result["wall_seconds"], video_id, audio_seconds=result["audio_seconds"])
+            put_in_cache(audio_file, video_id, result["segments"])
+            return result["segments"], result["vad"]
+
+        def transcribe_task(slot):
+            # The scheduler slot picks the model replica, so tasks of different runs
+            # running at the same time never decode on the same copy
+            with perf.span("transcribe", video_id, audio_seconds=probe_duration(audio_file)):
+                segments, stats = transcribe_segments(
+                    audio_file, route["language"], dict(settings, model_name=route["model_name"]), slot,
+                    checkpoint_dir, perf,
+                )
+            put_in_cache(audio_file, video_id, segments)
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            return segments, stats
+
+        # The cache key covers audio, backend, model, language and options: a run
+        # asking for the same key attaches to the transcription in flight
+        task_info = dict(video_id=video_id, language=route["language"], model=route["model_name"], run=perf.run_id)
+        if settings["use_process_pool"]:
+            # Counts against asr_slots like any transcription; the farm's own thread
+            # count already limits this run
+            segments, stats = asr_scheduler.run(key, farm_task, **task_info)
+        elif batched:
+            # Batched clips only wait on the shared batcher: they take no slot, so as
+            # many as fit in a batch can be in flight
+            segments, stats = asr_scheduler.run(key, transcribe_task, capped=False, **task_info)
+        else:
+            with own_model_slots:
+                segments, stats = asr_scheduler.run(key, transcribe_task, **task_info)
+        if stats:
+            vad_stats.append(stats)
+        rows = save(video_id, segments)
+        video_jobs.mark_transcribed(run_key, video_id, transcript_path(video_id), time.perf_counter() - start)
+        return rows
+
+    def download_fn(video_id):
+        if stop_requested():
+            raise JobCancelled("cancelled before download")
+        # Reuse audio only if an earlier attempt recorded a finished download
+        audio_file = video_jobs.downloaded_audio(run_key, video_id)
+        video_jobs.start_attempt(run_key, video_id)
+        start = time.perf_counter()
+        if audio_file is None:
+            # Another run downloading the same video into the same directory is waited for
+            audio_file = get_download_scheduler().run(
+                (output_path, video_id), lambda slot: download_audio(video_id), video_id=video_id, run=perf.run_id
+            )
+        video_jobs.mark_downloaded(run_key, video_id, audio_file, time.perf_counter() - start)
+        return audio_file
+
+    def download_audio(video_id):
+        # Download the native stream, then decode it once to 16 kHz PCM, timed step by step
+        pcm_path = os.path.join(output_path, f"{video_id}{PCM_SUFFIX}")
+        if os.path.exists(pcm_path) and not settings["archive_mp3"]:
+            return pcm_path
+        with perf.span("download", video_id):
+            with perf.span("yt_dlp", video_id) as span:
+                native_file = downloads.download(video_id, archive_mp3=settings["archive_mp3"])
+                span["bytes"] = file_size(native_file)
+            with perf.span("ffmpeg_decode", video_id) as span:
+                audio_file = decode_to_pcm_file(native_file, pcm_path)
+                span["bytes"] = file_size(audio_file)
+                span["audio_seconds"] = pcm_duration(audio_file)
+        return audio_file
+
+    report(f"Processing {len(video_ids)} videos...", stage="transcribe", total=len(video_ids))
+    failed_videos = []
+    cancelled = False
+    export_dir = os.path.join(output_path, "exports", channel_id, perf.run_id)
+    search_index = settings["search_index"] and get_transcript_index(os.path.join(output_path, "transcript_index.sqlite3"))
+
+    # Worker processes are only started if use_process_pool is set and a file needs transcribing
+    farm = TranscriptionFarm(
+        settings["backend"],
+        workers=settings["farm_workers"],
+        threads_per_worker=settings["farm_threads"] or None,
+        vad_method=settings["vad_method"],
+    )
+
+    # 4. Each finished transcript is exported right away
+    with StreamingTranscriptExporter(export_dir, settings["export_formats"], settings["xlsx_engine"]) as exporter, farm:
+        def finish_video(video_id, rows=None, error=None):
+            if error is None:
+                with perf.span("export", video_id):
+                    exporter.add_video(video_id, rows)
+                if search_index:
+                    with perf.span("search_index", video_id):
+                        search_index.add_video(
+                            video_id, rows, channel_id=channel_id,
+                            language=routes.get(video_id, default_route)["language"],
+                        )
+                if settings["audio_retention"] != "keep":
+                    # The transcript is committed, so its audio may be compressed or deleted
+                    with perf.span("audio_retention", video_id):
+                        downloads.release(video_id)
+                record_status(video_id, "transcribed")
+                report(f"Finished {video_id}", video_id=video_id, done=state["done"] + 1)
+            else:
+                failed_videos.append(video_id)
+                record_status(video_id, "failed")
+                report(f"Error for {video_id}: {error}", video_id=video_id, failed=state["failed"] + 1)
+
+        # Finished in an earlier run: export straight from the transcript store
+        for video_id in finished_ids:
+            finish_video(video_id, stored_rows(video_id))
+
+        # Batching needs as many clips in flight as fit in one batch; the extra workers
+        # wait on the shared batcher, or for an own-model slot if a video is too long to batch
+        transcribe_workers = max(settings["transcribe_workers"], settings["batch_size"])
+        if settings["use_process_pool"]:
+            # One thread per worker process keeps every process busy
+            transcribe_workers = settings["farm_workers"]
+        events = run_pipeline(
+            pending_ids,
+            download_fn=download_fn,
+            transcribe_fn=transcribe_fn,
+            download_workers=settings["download_workers"],
+            transcribe_workers=transcribe_workers,
+            max_pending_audio=max(settings["max_pending_audio"], settings["batch_size"]),
+        )
+        for event in events:
+            if event.status == "done":
+                finish_video(event.video_id, event.result)
+            elif not stop_requested():
+                video_jobs.mark_failed(run_key, event.video_id, event.stage, event.error)
+                finish_video(event.video_id, error=event.error)
+            if stop_requested():
+                # Leaving the loop stops the pipeline's workers
+                cancelled = True
+                break
+
+    perf.record("run", time.perf_counter() - run_start)
+    if settings["prometheus_metrics"]:
+        perf.write_prometheus(os.path.join(perf_dir, "metrics.prom"))
+
+    # This run's cache hits, misses and evictions; entries and size are the cache's own
+    cache_stats = cache.stats()
+    cache_stats.update({name: cache_stats[name] - cache_stats_before[name] for name in ("hits", "misses", "evictions")})
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    cache_stats["hit_rate"] = round(cache_stats["hits"] / lookups, 3) if lookups else 0.0
+    summary = {
+        "channel_id": channel_id,
+        "run_key": run_key,
+        "videos": len(video_ids),
+        "transcribed": exporter.video_count,
+        "segments": exporter.row_count,
+        "failed_videos": failed_videos,
+        "resumed": len(finished_ids),
+        "plan": plan,
+        "stages": video_jobs.stage_counts(run_key),
+        "outputs": exporter.paths,
+        "audio_seconds": sum(stats["audio_seconds"] for stats in vad_stats),
+        "speech_seconds": sum(stats["speech_seconds"] for stats in vad_stats),
+        "api": api.stats(),
+        "downloads": downloads.stats(),
+        "scheduler": asr_scheduler.stats(),
+        "transcript_cache": cache_stats,
+        "transcript_store": transcript_store.stats(),
+        "perf": perf.summary(),
+        "perf_folded": perf.folded_stacks(),
+        "perf_trace": perf.jsonl_path,
+    }
+    if router is not None:
+        summary["languages"] = router.stats()
+        summary["routes"] = routes
+    if batched_models:
+        # Batch schedulers are shared by every run in the process, so these count since it started
+        batch_stats = [
+            get_clip_batcher(settings["backend"], model_name, settings["batch_size"]).stats()
+            for model_name in sorted(batched_models)
+        ]
+        summary["batching"] = {
+            name: sum(stats[name] for stats in batch_stats) for name in ("clips", "windows", "batches", "decode_seconds")
+        }
+        summary["batching"]["mean_batch_size"] = (
+            round(summary["batching"]["windows"] / summary["batching"]["batches"], 2)
+            if summary["batching"]["batches"] else 0.0
+        )
+    if cancelled:
+        raise JobCancelled(f"Cancelled after {exporter.video_count} of {len(video_ids)} videos.")
+    report(f"Done: {exporter.video_count} transcribed, {len(failed_videos)} failed.", stage="done")
+    return summary
+
+# -----------------------------
+# 5. Command Line
+# -----------------------------
+def add_settings_arguments(parser):
+    """
+    Adds one --option per entry of DEFAULT_SETTINGS (shared with job_queue.py).
+    """
+    parser.add_argument("--language", dest="language_code", default=DEFAULT_SETTINGS["language_code"])
+    parser.add_argument("--output-path", default=DEFAULT_SETTINGS["output_path"])
+    parser.add_argument("--backend", choices=list(BACKENDS), default=DEFAULT_SETTINGS["backend"])
+    parser.add_argument("--model", dest="model_name", default=DEFAULT_SETTINGS["model_name"])
+    parser.add_argument("--archive-mp3", action="store_true")
+    parser.add_argument("--min-audio-kbps", type=int, default=DEFAULT_SETTINGS["min_audio_kbps"],
+                        help="Pick the smallest audio-only stream with at least this bitrate")
+    parser.add_argument("--fragment-downloads", type=int, default=DEFAULT_SETTINGS["fragment_downloads"],
+                        help="Fragments fetched at once per download")
+    parser.add_argument("--rate-limit-mbps", type=float, default=DEFAULT_SETTINGS["rate_limit_mbps"],
+                        help="Total download rate across all downloads (0 = unlimited)")
+    parser.add_argument("--audio-retention", choices=AUDIO_RETENTION_MODES, default=DEFAULT_SETTINGS["audio_retention"],
+                        help="What happens to a video's audio once its transcript is committed")
+    parser.add_argument("--disk-quota-mb", type=int, default=DEFAULT_SETTINGS["disk_quota_mb"],
+                        help="Only apply --audio-retention while the audio directory is over this size (0 = always)")
+    parser.add_argument("--api-quota-budget", type=int, default=DEFAULT_SETTINGS["api_quota_budget"],
+                        help="YouTube Data API quota units a run may spend (0 = no budget)")
+    parser.add_argument("--api-workers", type=int, default=DEFAULT_SETTINGS["api_workers"],
+                        help="Data API requests in flight at once")
+    parser.add_argument("--min-duration-seconds", type=int, default=DEFAULT_SETTINGS["min_duration_seconds"])
+    parser.add_argument("--max-duration-seconds", type=int, default=DEFAULT_SETTINGS["max_duration_seconds"],
+                        help="Skip longer videos (0 = no limit)")
+    parser.add_argument("--published-after", default=None, help="Only videos published on or after YYYY-MM-DD")
+    parser.add_argument("--published-before", default=None, help="Only videos published on or before YYYY-MM-DD")
+    parser.add_argument("--exclude-shorts", action="store_true")
+    parser.add_argument("--exclude-live", action="store_true", help="Skip livestream replays")
+    parser.add_argument("--title-regex", default=None, help="Only videos whose title matches (case-insensitive)")
+    parser.add_argument("--priority", choices=PRIORITY_POLICIES, default=DEFAULT_SETTINGS["priority"])
+    parser.add_argument("--audio-hours-budget", type=float, default=DEFAULT_SETTINGS["audio_hours_budget"],
+                        help="Process at most this many hours of audio per run (0 = no budget)")
+    parser.add_argument("--detect-language", action="store_true",
+                        help="Detect each video's language on a short sample (--language is the fallback)")
+    parser.add_argument("--language-confidence", type=float, default=DEFAULT_SETTINGS["language_confidence"],
+                        help="Keep --language when the detected language is less likely than this")
+    parser.add_argument("--detection-windows", type=int, default=DEFAULT_SETTINGS["detection_windows"],
+                        help="30 s windows sampled per video for detection (1 = the start only)")
+    parser.add_argument("--candidate-language", dest="candidate_languages", action="append",
+                        help="Only route to these languages (repeatable)")
+    parser.add_argument("--language-models", type=parse_language_models, default={},
+                        help="Model per detected language, e.g. en=small.en,ta=large-v3")
+    parser.add_argument("--full-listing", dest="incremental_sync", action="store_false",
+                        help="Re-list the whole channel instead of only new uploads")
+    parser.add_argument("--only-pending", action="store_true", help="Skip videos transcribed in an earlier run")
+    parser.add_argument("--retry-failed-only", action="store_true",
+                        help="Only process the videos that failed in earlier runs of this channel")
+    parser.add_argument("--download-workers", type=int, default=DEFAULT_SETTINGS["download_workers"])
+    parser.add_argument("--transcribe-workers", type=int, default=DEFAULT_SETTINGS["transcribe_workers"])
+    parser.add_argument("--max-pending-audio", type=int, default=DEFAULT_SETTINGS["max_pending_audio"])
+    parser.add_argument("--process-pool", dest="use_process_pool", action="store_true")
+    parser.add_argument("--farm-workers", type=int, default=DEFAULT_SETTINGS["farm_workers"])
+    parser.add_argument("--farm-threads", type=int, default=DEFAULT_SETTINGS["farm_threads"])
+    parser.add_argument("--vad", dest="vad_method", choices=["energy", "silero"], default=None)
+    parser.add_argument("--chunk-minutes", type=int, default=DEFAULT_SETTINGS["chunk_minutes"])
+    parser.add_argument("--chunk-overlap-seconds", type=int, default=DEFAULT_SETTINGS["chunk_overlap_seconds"])
+    parser.add_argument("--chunk-workers", type=int, default=DEFAULT_SETTINGS["chunk_workers"])
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_SETTINGS["batch_size"],
+                        help="Decode short clips of different videos together, this many 30 s windows per batch")
+    parser.add_argument("--batch-max-seconds", type=int, default=DEFAULT_SETTINGS["batch_max_seconds"],
+                        help="Only videos up to this long are batched (default: 180)")
+    parser.add_argument("--asr-slots", type=int, default=DEFAULT_SETTINGS["asr_slots"],
+                        help="Transcriptions running at once across all runs in this process (0 = no cap)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_SETTINGS["cache_max_mb"])
+    parser.add_argument("--export-format", dest="export_formats", action="append", choices=["xlsx", "parquet"])
+    parser.add_argument("--xlsx-engine", choices=["openpyxl", "xlsxwriter"], default=DEFAULT_SETTINGS["xlsx_engine"])
+    parser.add_argument("--prometheus-metrics", action="store_true",
+                        help="Also write <output-path>/perf/metrics.prom after each run")
+    parser.add_argument("--no-search-index", dest="search_index", action="store_false",
+                        help="Do not add transcripts to <output-path>/transcript_index.sqlite3")
+
+
+def settings_from_args(args):
+    settings = {name: getattr(args, name) for name in DEFAULT_SETTINGS if hasattr(args, name)}
+    settings["export_formats"] = settings.get("export_formats") or DEFAULT_SETTINGS["export_formats"]
+    settings["candidate_languages"] = settings.get("candidate_languages") or []
+    return settings
+
+
+def check_settings(settings):
+    """
+    Raises ValueError for settings a run could not finish with, so a CLI or
+    the queue rejects them up front instead of failing mid-run.
+    """
+    if settings["chunk_minutes"] and not 0 <= settings["chunk_overlap_seconds"] < settings["chunk_minutes"] * 60:
+        raise ValueError(
+            f"Chunk overlap ({settings['chunk_overlap_seconds']} s) must be at least 0 and shorter "
+            f"than the chunk ({settings['chunk_minutes'] * 60} s)."
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe whole YouTube channels without the Streamlit UI.")
+    parser.add_argument("channels", nargs="+", help="Channel handles, URLs or IDs")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"),
+                        help="YouTube Data API key (default: $YOUTUBE_API_KEY)")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    if not args.api_key:
+        parser.error("a YouTube Data API key is required (--api-key or $YOUTUBE_API_KEY)")
+    settings = settings_from_args(args)
+    try:
+        check_settings(dict(DEFAULT_SETTINGS, **settings))
+    except ValueError as e:
+        parser.error(str(e))
+
+    for channel in args.channels:
+        summary = run_channel(channel, args.api_key, settings, on_progress=lambda update: print(update["message"]))
+        print(json.dumps(summary, ensure_ascii=False))
@@ -0,0 +1,381 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# -----------------------------
+# 1. Helpers
+# -----------------------------
+def get_uploads_playlist_id(channel_id):
+    """
+    Every channel's uploads playlist ID is its channel ID with the
+    leading 'UC' replaced by 'UU', so no API call is needed to find it.
+    """
+    if channel_id.startswith("UC"):
+        return "UU" + channel_id[2:]
+    return channel_id
+
+
+def parse_iso8601_duration(duration):
+    """
+    Converts a YouTube duration like 'PT1H2M3S' (or 'P1DT2H') to seconds.
+    """
+    match = re.fullmatch(
+        r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?", duration or ""
+    )
+    if not match:
+        return None
+    days, hours, minutes, seconds = match.groups()
+    return (
+        int(days or 0) * 86400
+        + int(hours or 0) * 3600
+        + int(minutes or 0) * 60
+        + float(seconds or 0)
+    )
+
+# -----------------------------
+# 2. Channel Manifest (SQLite)
+# -----------------------------
+class ChannelManifest:
+    """
+    Per-channel record of every known upload: video ID, publish time,
+    duration and processing status ("new", "transcribed", "failed", ...).
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS channels (
+                    channel_id TEXT PRIMARY KEY,
+                    uploads_playlist_id TEXT NOT NULL,
+                    backfill_complete INTEGER NOT NULL DEFAULT 0,
+                    last_synced REAL,
+                    resume_page_token TEXT,
+                    resume_boundary TEXT
+                )
+                """
+            )
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS videos (
+                    channel_id TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    published_at TEXT,
+                    duration_seconds REAL,
+                    title TEXT,
+                    live_status TEXT,
+                    metadata_fetched_at REAL,
+                    status TEXT NOT NULL DEFAULT 'new',
+                    updated REAL,
+                    PRIMARY KEY (channel_id, video_id)
+                )
+                """
+            )
+            # Manifests created before live_status existed get the column (filled by the next sync)
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(videos)")]
+            if "live_status" not in columns:
+                self._db.execute("ALTER TABLE videos ADD COLUMN live_status TEXT")
+            if "metadata_fetched_at" not in columns:
+                self._db.execute("ALTER TABLE videos ADD COLUMN metadata_fetched_at REAL")
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(channels)")]
+            for column in ("resume_page_token", "resume_boundary"):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE channels ADD COLUMN {column} TEXT")
+
+    def has_video(self, channel_id, video_id):
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM videos WHERE channel_id = ? AND video_id = ?", (channel_id, video_id)
+            ).fetchone() is not None
+
+    def known_published_at(self, channel_id, video_id):
+        """
+        (known, published_at) for one video; published_at may be None even
+        for a known video.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT published_at FROM videos WHERE channel_id = ? AND video_id = ?", (channel_id, video_id)
+            ).fetchone()
+        return row is not None, row[0] if row else None
+
+    def newest_published_at(self, channel_id):
+        with self._lock:
+            return self._db.execute(
+                "SELECT MAX(published_at) FROM videos WHERE channel_id = ?", (channel_id,)
+            ).fetchone()[0]
+
+    def add_videos(self, channel_id, videos):
+        """
+        Inserts new videos (dicts with video_id, published_at and optionally
+        title/duration_seconds); existing rows keep their status.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                """
+                INSERT OR IGNORE INTO videos (channel_id, video_id, published_at, title, duration_seconds, updated)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (channel_id, video["video_id"], video.get("published_at"), video.get("title"),
+                     video.get("duration_seconds"), now)
+                    for video in videos
+                ],
+            )
+
+    def set_metadata(self, channel_id, metadata, video_ids=None):
+        """
+        Stores {video_id: {"title", "published_at", "duration_seconds",
+        "live_status"}} as fetched by fetch_video_metadata; missing values
+        keep what was there.
+
+        `video_ids` are all the IDs that were looked up: those the API left
+        out (private or deleted videos) are marked as fetched as well, so
+        later syncs do not ask for them again.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                """
+                UPDATE videos SET
+                    title = COALESCE(?, title),
+                    published_at = COALESCE(?, published_at),
+                    duration_seconds = COALESCE(?, duration_seconds),
+                    live_status = COALESCE(?, live_status),
+                    metadata_fetched_at = ?
+                WHERE channel_id = ? AND video_id = ?
+                """,
+                [
+                    (video.get("title"), video.get("published_at"), video.get("duration_seconds"),
+                     video.get("live_status"), now, channel_id, video_id)
+                    for video_id, video in metadata.items()
+                ],
+            )
+            self._db.executemany(
+                "UPDATE videos SET metadata_fetched_at = ? WHERE channel_id = ? AND video_id = ?",
+                [(now, channel_id, video_id) for video_id in video_ids or [] if video_id not in metadata],
+            )
+
+    def videos_missing_metadata(self, channel_id):
+        # e.g. rows synced before titles were fetched, or a sync cut short by the quota budget;
+        # videos already looked up without a result (private or deleted) are not asked for again
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT video_id FROM videos WHERE channel_id = ? AND metadata_fetched_at IS NULL "
+                "AND (duration_seconds IS NULL OR title IS NULL OR live_status IS NULL)",
+                (channel_id,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def set_status(self, channel_id, video_id, status):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE videos SET status = ?, updated = ? WHERE channel_id = ? AND video_id = ?",
+                (status, time.time(), channel_id, video_id),
+            )
+
+    def get_channel(self, channel_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT uploads_playlist_id, backfill_complete, last_synced, resume_page_token, resume_boundary "
+                "FROM channels WHERE channel_id = ?",
+                (channel_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "uploads_playlist_id": row[0], "backfill_complete": bool(row[1]), "last_synced": row[2],
+            "resume_page_token": row[3], "resume_boundary": row[4],
+        }
+
+    def set_resume(self, channel_id, page_token, boundary):
+        """
+        Records where an interrupted warm sync stopped: the playlist page to
+        continue from, and the publish time of the newest video known before
+        it started (the gap ends there). page_token=None clears it.
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE channels SET resume_page_token = ?, resume_boundary = ? WHERE channel_id = ?",
+                (page_token, boundary if page_token else None, channel_id),
+            )
+
+    def update_channel(self, channel_id, uploads_playlist_id, backfill_complete):
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO channels (channel_id, uploads_playlist_id, backfill_complete, last_synced)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(channel_id) DO UPDATE SET
+                    uploads_playlist_id = excluded.uploads_playlist_id,
+                    backfill_complete = MAX(backfill_complete, excluded.backfill_complete),
+                    last_synced = excluded.last_synced
+                """,
+                (channel_id, uploads_playlist_id, int(backfill_complete), time.time()),
+            )
+
+    def list_videos(self, channel_id, statuses=None):
+        """
+        Returns the channel's videos, newest first, as dicts.
+        """
+        query = (
+            "SELECT video_id, published_at, duration_seconds, title, live_status, status FROM videos "
+            "WHERE channel_id = ?"
+        )
+        params = [channel_id]
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        query += " ORDER BY published_at DESC"
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [
+            {"video_id": r[0], "published_at": r[1], "duration_seconds": r[2], "title": r[3],
+             "live_status": r[4], "status": r[5]}
+            for r in rows
+        ]
+
+    def get_durations(self, video_ids):
+        """
+        {video_id: duration_seconds} for the given videos, whichever channel
+        they belong to (videos without a known duration are left out).
+        """
+        video_ids = list(video_ids)
+        durations = {}
+        with self._lock:
+            for start in range(0, len(video_ids), 500):
+                batch = video_ids[start:start + 500]
+                durations.update(self._db.execute(
+                    f"SELECT video_id, duration_seconds FROM videos "
+                    f"WHERE duration_seconds IS NOT NULL AND video_id IN ({', '.join('?' for _ in batch)})",
+                    batch,
+                ).fetchall())
+        return durations
+
+# -----------------------------
+# 3. Incremental Sync
+# -----------------------------
+def fetch_video_metadata(api, video_ids):
+    """
+    Looks up title, publish time, duration and live status of many videos,
+    50 IDs per videos().list call (1 quota unit each), with the calls run
+    concurrently by the YouTubeAPI. Private or deleted videos are left out.
+
+    live_status is "none", "live" or "upcoming" (not downloadable yet), or
+    "replay" for a finished livestream.
+    """
+    def fetch_batch(batch):
+        return api.call("videos.list", lambda youtube: youtube.videos().list(
+            part="snippet,contentDetails,liveStreamingDetails",
+            id=",".join(batch),
+            maxResults=50,
+            fields="items(id,snippet(title,publishedAt,liveBroadcastContent),"
+                   "contentDetails(duration),liveStreamingDetails(actualStartTime))",
+        ))
+
+    batches = [video_ids[start:start + 50] for start in range(0, len(video_ids), 50)]
+    metadata = {}
+    for response in api.map(fetch_batch, batches):
+        for item in response.get("items", []):
+            snippet = item.get("snippet", {})
+            live_status = snippet.get("liveBroadcastContent") or "none"
+            if live_status == "none" and "liveStreamingDetails" in item:
+                live_status = "replay"
+            metadata[item["id"]] = {
+                "title": snippet.get("title"),
+                "published_at": snippet.get("publishedAt"),
+                "duration_seconds": parse_iso8601_duration(item.get("contentDetails", {}).get("duration")),
+                "live_status": live_status,
+            }
+    return metadata
+
+
+def sync_channel(api, manifest, channel_id, full=False):
+    """
+    Brings the manifest up to date with the channel's uploads playlist.
+
+    Pages through playlistItems (1 quota unit per page instead of 100 for
+    search) newest-first and stops at the first video the manifest already
+    has, so a warm sync of an unchanged channel is a single API call. The
+    first sync (or an interrupted first sync, or full=True) pages through
+    everything.
+
+    A warm sync that is interrupted (e.g. by the quota budget) after saving
+    some new videos would stop at those next time and never reach the older
+    ones behind them, so after every page it records the next page token and
+    where the gap ends. The next sync finishes that gap first.
+
+    Title, publish time and duration of the new videos (and of any older
+    rows still missing them) are then fetched in bulk, so runs can filter
+    and schedule videos before downloading anything.
+
+    Returns (new_video_ids, api_calls).
+    """
+    channel = manifest.get_channel(channel_id)
+    uploads_playlist_id = channel["uploads_playlist_id"] if channel else get_uploads_playlist_id(channel_id)
+    stop_at_known = bool(channel and channel["backfill_complete"]) and not full
+
+    new_video_ids = []
+    api_calls = 0
+
+    def page_through(page_token, boundary):
+        # Saves unknown videos page by page from page_token. A warm sync stops at the first
+        # known video published at or before `boundary` (any known video if it is None);
+        # newer known ones were saved by the interrupted sync or pushed down a page by new
+        # uploads. Otherwise it reads to the end of the playlist.
+        nonlocal api_calls
+        while True:
+            response = api.call("playlistItems.list", lambda youtube: youtube.playlistItems().list(
+                part="contentDetails",
+                playlistId=uploads_playlist_id,
+                maxResults=50,
+                pageToken=page_token,
+            ))
+            api_calls += 1
+
+            page = []
+            reached_known = False
+            for item in response.get("items", []):
+                details = item["contentDetails"]
+                video_id = details["videoId"]
+                known, published_at = manifest.known_published_at(channel_id, video_id)
+                if known:
+                    if stop_at_known and (
+                        boundary is None or (published_at is not None and published_at <= boundary)
+                    ):
+                        reached_known = True
+                        break
+                    continue
+                page.append({"video_id": video_id, "published_at": details.get("videoPublishedAt")})
+
+            # Save each page as we go so an interrupted sync keeps its progress
+            manifest.add_videos(channel_id, page)
+            new_video_ids.extend(video["video_id"] for video in page)
+
+            page_token = response.get("nextPageToken")
+            if reached_known or not page_token:
+                break
+            if stop_at_known:
+                manifest.set_resume(channel_id, page_token, boundary)
+        manifest.set_resume(channel_id, None, None)
+
+    if stop_at_known and channel["resume_page_token"]:
+        # Finish the gap an interrupted warm sync left behind first
+        page_through(channel["resume_page_token"], channel["resume_boundary"])
+    # Everything newer than the newest known video is new
+    page_through(None, manifest.newest_published_at(channel_id))
+
+    missing = manifest.videos_missing_metadata(channel_id)
+    if missing:
+        manifest.set_metadata(channel_id, fetch_video_metadata(api, missing), video_ids=missing)
+        api_calls += (len(missing) + 49) // 50
+
+    # The whole playlist has been seen once, so later syncs may stop early
+    manifest.update_channel(channel_id, uploads_playlist_id, backfill_complete=True)
+    return new_video_ids, api_calls
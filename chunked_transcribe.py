@@ -0,0 +1,144 @@
+import json
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+SAMPLE_RATE = 16000
+
+# -----------------------------
+# 1. Window Planning and Merging
+# -----------------------------
+def plan_chunks(duration, chunk_seconds, overlap_seconds):
+    """
+    Splits [0, duration) into windows of chunk_seconds that overlap by
+    overlap_seconds. Returns a list of (start, length).
+
+    Raises ValueError unless 0 <= overlap_seconds < chunk_seconds (otherwise
+    the windows would never advance).
+    """
+    if not 0 <= overlap_seconds < chunk_seconds:
+        raise ValueError(
+            f"Chunk overlap ({overlap_seconds} s) must be at least 0 and shorter than the chunk ({chunk_seconds} s)."
+        )
+    if duration <= chunk_seconds:
+        return [(0.0, duration)]
+    step = chunk_seconds - overlap_seconds
+    chunks = []
+    start = 0.0
+    while start < duration:
+        chunks.append((start, min(chunk_seconds, duration - start)))
+        if start + chunk_seconds >= duration:
+            break
+        start += step
+    return chunks
+
+
+def stitch_chunk_cues(chunk_cues, chunks, overlap_seconds, tolerance=0.5):
+    """
+    Shifts each chunk's cues onto the original timeline and resolves the
+    overlaps: a chunk keeps the cues that start before the middle of its
+    trailing overlap, and drops leading cues that start before the previous
+    chunk's last kept cue ended, so nothing is duplicated.
+    """
+    stitched = []
+    last_end = float("-inf")
+    for index, ((chunk_start, chunk_length), cues) in enumerate(zip(chunks, chunk_cues)):
+        own_to = (
+            chunks[index + 1][0] + overlap_seconds / 2 if index + 1 < len(chunks) else float("inf")
+        )
+        for start, end, text in cues:
+            start, end = start + chunk_start, end + chunk_start
+            if start >= own_to or start < last_end - tolerance:
+                continue
+            stitched.append((start, end, text))
+            last_end = max(last_end, end)
+    return stitched
+
+# -----------------------------
+# 2. Chunked Transcription with Checkpoints
+# -----------------------------
+def transcribe_in_chunks(
+    audio,
+    transcribe_fn_factory,
+    checkpoint_dir,
+    chunk_seconds=600,
+    overlap_seconds=10,
+    max_workers=2,
+    on_chunk_done=None,
+):
+    """
+    Transcribes long audio as overlapping windows decoded in parallel.
+
+    - audio: 16 kHz mono array (a memmap is fine; windows are slices, passed
+      to the transcribe function as they are, so it converts them if needed).
+    - transcribe_fn_factory(worker_index) returns a function that takes a
+      window's audio and returns segment dicts. One is made per worker so
+      each can hold its own model replica (Whisper models are not safe to
+      share between concurrent decodes).
+    - Every finished window is saved to `checkpoint_dir`, so after a crash or
+      restart only the windows that were not finished are decoded again.
+    - on_chunk_done(done, total) is called after each window.
+
+    Returns the merged segments on the original timeline.
+    """
+    duration = len(audio) / SAMPLE_RATE
+    chunks = plan_chunks(duration, chunk_seconds, overlap_seconds)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    def checkpoint_path(index):
+        return os.path.join(checkpoint_dir, f"chunk_{index:04d}.json")
+
+    chunk_segments = [None] * len(chunks)
+    pending = []
+    for index in range(len(chunks)):
+        if os.path.exists(checkpoint_path(index)):
+            with open(checkpoint_path(index), encoding="utf-8") as file:
+                chunk_segments[index] = json.load(file)
+        else:
+            pending.append(index)
+
+    done = len(chunks) - len(pending)
+    if on_chunk_done and done:
+        on_chunk_done(done, len(chunks))
+
+    # One transcribe function (model replica) per worker, checked out per window
+    max_workers = max(1, min(max_workers, len(pending) or 1))
+    idle_fns = queue.Queue()
+    for worker_index in range(max_workers):
+        idle_fns.put(transcribe_fn_factory(worker_index))
+
+    def decode(index):
+        start, length = chunks[index]
+        window = audio[int(start * SAMPLE_RATE):int((start + length) * SAMPLE_RATE)]
+        transcribe_fn = idle_fns.get()
+        try:
+            segments = [
+                {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+                for segment in transcribe_fn(window)
+            ]
+        finally:
+            idle_fns.put(transcribe_fn)
+
+        tmp_path = checkpoint_path(index) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(segments, file, ensure_ascii=False)
+        os.replace(tmp_path, checkpoint_path(index))
+        return index, segments
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(decode, index) for index in pending]
+        for future in as_completed(futures):
+            index, segments = future.result()
+            chunk_segments[index] = segments
+            done += 1
+            if on_chunk_done:
+                on_chunk_done(done, len(chunks))
+
+    cues = [
+        [(segment["start"], segment["end"], segment["text"]) for segment in segments]
+        for segments in chunk_segments
+    ]
+    return [
+        {"start": start, "end": end, "text": text}
+        for start, end, text in stitch_chunk_cues(cues, chunks, overlap_seconds)
+    ]
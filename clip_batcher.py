@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from chunked_transcribe import SAMPLE_RATE, plan_chunks, stitch_chunk_cues
+
+# Whisper's encoder always sees 30 s of audio, so that is the natural window
+WINDOW_SECONDS = 30.0
+
+# -----------------------------
+# 1. One Clip's Windows
+# -----------------------------
+class _Clip:
+    def __init__(self, audio, window_seconds, overlap_seconds):
+        self.audio = audio
+        self.overlap_seconds = overlap_seconds
+        self.chunks = plan_chunks(len(audio) / SAMPLE_RATE, window_seconds, overlap_seconds)
+        self.cues = [None] * len(self.chunks)
+        self.remaining = len(self.chunks)
+        self.error = None
+        self.arrived_at = time.monotonic()
+        self.done = threading.Event()
+
+    def window(self, index):
+        start, length = self.chunks[index]
+        return self.audio[int(start * SAMPLE_RATE):int((start + length) * SAMPLE_RATE)]
+
+    def set_window(self, index, segments):
+        self.cues[index] = [(segment["start"], segment["end"], segment["text"]) for segment in segments]
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.done.set()
+
+    def fail(self, error):
+        self.error = error
+        self.done.set()
+
+    def segments(self):
+        return [
+            {"start": start, "end": end, "text": text}
+            for start, end, text in stitch_chunk_cues(self.cues, self.chunks, self.overlap_seconds)
+        ]
+
+# -----------------------------
+# 2. Cross-Video Batch Scheduler
+# -----------------------------
+class ClipBatcher:
+    """
+    Packs short clips from different videos into shared decoding batches.
+
+    Pipeline workers call transcribe() concurrently, one clip each. Every
+    clip is cut into 30 s windows (overlapping by `overlap_seconds`) that
+    wait in a per-language queue; a single dispatcher thread sends up to
+    `batch_size` windows of one language to backend.transcribe_batch() as
+    soon as that many are waiting, or after `max_wait_seconds`, and hands
+    each clip its stitched segments once all its windows are back.
+
+    With the Whisper backend a batch is one encoder/decoder pass over a
+    stacked mel tensor, so per-clip overhead (model warm-up, kernel launch,
+    Python dispatch) is paid once per batch instead of once per clip.
+    """
+
+    def __init__(self, backend, batch_size=8, max_wait_seconds=0.5, window_seconds=WINDOW_SECONDS, overlap_seconds=2.0):
+        if not 0 <= overlap_seconds < window_seconds:
+            raise ValueError(
+                f"Window overlap ({overlap_seconds} s) must be at least 0 and shorter than the window ({window_seconds} s)."
+            )
+        self.backend = backend
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self._pending = {}  # language -> deque of (clip, window index)
+        self._oldest = {}   # language -> when the clip at the head of its queue arrived
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stats = {"clips": 0, "windows": 0, "batches": 0, "decode_seconds": 0.0}
+
+    def transcribe(self, audio, language):
+        """
+        Blocks until the clip has gone through one or more shared batches and
+        returns its segments, on the clip's own timeline.
+        """
+        clip = _Clip(np.asarray(audio, dtype=np.float32), self.window_seconds, self.overlap_seconds)
+        if not clip.chunks or clip.chunks[0][1] <= 0:
+            return []
+        with self._cond:
+            queue = self._pending.setdefault(language, deque())
+            if not queue:
+                self._oldest[language] = clip.arrived_at
+            queue.extend((clip, index) for index in range(len(clip.chunks)))
+            self._stats["clips"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="clip-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        clip.done.wait()
+        if clip.error is not None:
+            raise clip.error
+        return clip.segments()
+
+    def _next_batch(self):
+        # Waits until some language has a full batch or has waited long enough
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                waiting = [language for language, queue in self._pending.items() if queue]
+                ready = [
+                    language for language in waiting
+                    if len(self._pending[language]) >= self.batch_size
+                    or now - self._oldest[language] >= self.max_wait_seconds
+                ]
+                if ready:
+                    language = min(ready, key=self._oldest.get)
+                    break
+                timeout = min((self._oldest[language] + self.max_wait_seconds - now for language in waiting), default=None)
+                self._cond.wait(timeout=timeout)
+            queue = self._pending[language]
+            items = []
+            while queue and len(items) < self.batch_size:
+                clip, index = queue.popleft()
+                if clip.error is None:  # skip the rest of a clip that already failed
+                    items.append((clip, index))
+            # What is left waits from its own clip's arrival, not from the batch just taken
+            if queue:
+                self._oldest[language] = queue[0][0].arrived_at
+            else:
+                del self._oldest[language]
+            return language, items
+
+    def _dispatch(self):
+        while True:
+            language, items = self._next_batch()
+            if not items:
+                continue
+            start = time.perf_counter()
+            try:
+                results = self.backend.transcribe_batch([clip.window(index) for clip, index in items], language)
+            except Exception as e:
+                for clip, _ in items:
+                    clip.fail(e)
+                continue
+            with self._cond:
+                self._stats["windows"] += len(items)
+                self._stats["batches"] += 1
+                self._stats["decode_seconds"] += time.perf_counter() - start
+            for (clip, index), segments in zip(items, results):
+                clip.set_window(index, segments)
+
+    def stats(self):
+        """
+        Clips, windows and batches so far, with the mean batch size.
+        """
+        with self._cond:
+            stats = dict(self._stats)
+        stats["mean_batch_size"] = round(stats["windows"] / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["decode_seconds"] = round(stats["decode_seconds"], 2)
+        return stats
@@ -0,0 +1,256 @@
+import os
+import subprocess
+import threading
+import time
+
+from audio_io import (
+    MIN_AUDIO_KBPS,
+    NATIVE_AUDIO_EXTENSIONS,
+    PCM_SUFFIX,
+    SAMPLE_RATE,
+    download_native_audio,
+    probe_duration,
+)
+from perf_trace import file_size
+
+# What a video's audio is compressed to once its transcript is committed
+ARCHIVE_SUFFIX = ".archive.opus"
+ARCHIVE_KBPS = 24
+
+AUDIO_RETENTION_MODES = ("keep", "compress", "delete")
+
+# -----------------------------
+# 1. Global Rate Limit
+# -----------------------------
+class RateLimiter:
+    """
+    Token bucket shared by every download (and every fragment thread of a
+    download). Callers report the bytes they just received and sleep off
+    whatever they took beyond the rate, so the total across all concurrent
+    downloads stays at `bytes_per_second`.
+    """
+
+    def __init__(self, bytes_per_second, burst_seconds=1.0):
+        self.bytes_per_second = bytes_per_second
+        self._capacity = bytes_per_second * burst_seconds
+        self._tokens = self._capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last) * self.bytes_per_second)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.bytes_per_second if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+# -----------------------------
+# 2. Audio Files on Disk
+# -----------------------------
+def audio_files_by_video(output_path):
+    """
+    Maps video ID -> [(path, bytes, mtime)] for every downloaded, decoded
+    or archived audio file in `output_path` (unfinished .part files are
+    left out).
+    """
+    suffixes = tuple(f".{ext}" for ext in NATIVE_AUDIO_EXTENSIONS) + (PCM_SUFFIX, ARCHIVE_SUFFIX)
+    files = {}
+    try:
+        entries = list(os.scandir(output_path))
+    except FileNotFoundError:
+        return files
+    for entry in entries:
+        if entry.is_file() and entry.name.endswith(suffixes):
+            stat = entry.stat()
+            # YouTube video IDs never contain a dot
+            files.setdefault(entry.name.split(".", 1)[0], []).append((entry.path, stat.st_size, stat.st_mtime))
+    return files
+
+
+def compress_audio(source_path, archive_path, kbps=ARCHIVE_KBPS):
+    """
+    Re-encodes a video's audio to low-bitrate mono Opus (plenty to listen
+    back to a transcript, or to transcribe it again). Raw PCM sources are
+    read as 16 kHz 16-bit. Returns the archive path.
+    """
+    input_args = ["-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", "1"] if source_path.endswith(PCM_SUFFIX) else []
+    tmp_path = archive_path + ".part"
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            *input_args, "-i", source_path,
+            "-ac", "1", "-c:a", "libopus", "-b:a", f"{kbps}k",
+            "-f", "opus", tmp_path,
+        ],
+        check=True,
+    )
+    os.replace(tmp_path, archive_path)
+    return archive_path
+
+# -----------------------------
+# 3. Download Manager
+# -----------------------------
+class DownloadManager:
+    """
+    Downloads audio for one run and keeps the audio directory in bounds.
+
+    - Picks the smallest audio-only stream of at least `min_kbps` (see
+      audio_io.audio_format_selector) instead of the best stream.
+    - Each download fetches `fragment_downloads` DASH fragments at once,
+      and all downloads together stay under `rate_limit_mbps` (0 = no limit).
+    - release(video_id) is called once a video's transcript is committed.
+      With audio_retention="compress" its audio is replaced by a small Opus
+      archive, with "delete" it is removed ("keep" leaves it alone). With a
+      `disk_quota_mb` this only happens once the directory is over the
+      quota, oldest released videos first; without one it happens right away.
+      With archive_mp3=True the opt-in <video_id>.mp3 archive copy is never
+      compressed or deleted (and does not count towards the quota).
+    - stats() reports bytes downloaded per minute of audio, per format.
+    """
+
+    def __init__(self, output_path, min_kbps=MIN_AUDIO_KBPS, fragment_downloads=4, rate_limit_mbps=0,
+                 audio_retention="keep", disk_quota_mb=0, archive_mp3=False):
+        if audio_retention not in AUDIO_RETENTION_MODES:
+            raise ValueError(f"audio_retention must be one of {AUDIO_RETENTION_MODES}, not {audio_retention!r}")
+        self.output_path = output_path
+        self.min_kbps = min_kbps
+        self.fragment_downloads = max(1, fragment_downloads)
+        self.rate_limiter = RateLimiter(rate_limit_mbps * 125_000) if rate_limit_mbps else None
+        self.audio_retention = audio_retention
+        self.quota_bytes = int(disk_quota_mb * 1024 * 1024)
+        self.archive_mp3 = archive_mp3
+        self._released = {}  # video ID -> when its transcript was committed (until it is shrunk)
+        self._lock = threading.Lock()
+        self._stats = {"downloads": 0, "bytes": 0, "audio_seconds": 0.0, "formats": {},
+                       "compressed": 0, "deleted": 0, "freed_bytes": 0}
+
+    def download(self, video_id, archive_mp3=False):
+        """
+        Downloads a video's native audio (see audio_io.download_native_audio)
+        and returns its path. Files already on disk are returned as they are
+        and not counted in stats().
+        """
+        progress = {"seen": 0, "info": None}
+
+        def on_progress(update):
+            if update.get("status") == "finished":
+                progress["info"] = update.get("info_dict") or {}
+                return
+            downloaded = update.get("downloaded_bytes") or 0
+            # Fragment threads report the running total of the whole file
+            new_bytes = downloaded - progress["seen"]
+            if new_bytes > 0:
+                progress["seen"] = downloaded
+                if self.rate_limiter:
+                    self.rate_limiter.consume(new_bytes)
+
+        ydl_options = {
+            "concurrent_fragment_downloads": self.fragment_downloads,
+            "progress_hooks": [on_progress],
+        }
+        native_file = download_native_audio(
+            video_id, self.output_path, archive_mp3=archive_mp3, min_kbps=self.min_kbps, ydl_options=ydl_options
+        )
+        info = progress["info"]
+        if info is not None:
+            audio_seconds = info.get("duration") or probe_duration(native_file)
+            with self._lock:
+                self._stats["downloads"] += 1
+                self._stats["bytes"] += file_size(native_file)
+                self._stats["audio_seconds"] += audio_seconds
+                format_id = info.get("format_id") or "unknown"
+                self._stats["formats"][format_id] = self._stats["formats"].get(format_id, 0) + 1
+        return native_file
+
+    def release(self, video_id):
+        """
+        Marks a video's transcript as committed and applies the retention
+        policy (right away, or oldest first while over the disk quota).
+
+        Which videos to shrink is decided under the lock; the ffmpeg
+        re-encodes and deletions run after it is released, so downloads
+        updating stats() never wait for them.
+        """
+        if self.audio_retention == "keep":
+            return
+        with self._lock:
+            self._released.setdefault(video_id, time.time())
+            files = {
+                released_id: self._retained_files(released_id, video_files)
+                for released_id, video_files in audio_files_by_video(self.output_path).items()
+            }
+            if not self.quota_bytes:
+                victims = [video_id]
+            else:
+                # The archives new compressions write are small enough to leave out of the estimate
+                usage = sum(size for video_files in files.values() for _, size, _ in video_files)
+                victims = []
+                for released_id in sorted(self._released, key=self._released.get):
+                    if usage <= self.quota_bytes:
+                        break
+                    victims.append(released_id)
+                    usage -= sum(
+                        size for path, size, _ in files.get(released_id, [])
+                        if self.audio_retention == "delete" or not path.endswith(ARCHIVE_SUFFIX)
+                    )
+            # Taken off the list so a concurrent release() does not shrink them too
+            for victim in victims:
+                self._released.pop(victim, None)
+
+        for index, victim in enumerate(victims):
+            try:
+                self._shrink(victim, files.get(victim, []))
+            except BaseException:
+                with self._lock:
+                    for unfinished in victims[index:]:
+                        self._released.setdefault(unfinished, time.time())
+                raise
+
+    def _retained_files(self, video_id, video_files):
+        # The files retention may compress or delete: everything but the opt-in MP3 archive copy
+        if not self.archive_mp3:
+            return video_files
+        return [entry for entry in video_files if entry[0] != os.path.join(self.output_path, f"{video_id}.mp3")]
+
+    def _shrink(self, video_id, video_files):
+        # Runs without the lock; only the stats update takes it
+        before = sum(size for _, size, _ in video_files)
+        archive_path = os.path.join(self.output_path, f"{video_id}{ARCHIVE_SUFFIX}")
+        if self.audio_retention == "compress":
+            sources = [path for path, _, _ in video_files if path != archive_path]
+            if not sources:
+                return
+            if not os.path.exists(archive_path):
+                # Prefer the native stream over PCM: smaller to read, same content
+                sources.sort(key=lambda path: path.endswith(PCM_SUFFIX))
+                compress_audio(sources[0], archive_path)
+            for path in sources:
+                os.remove(path)
+            stat = "compressed"
+        else:
+            if not video_files:
+                return
+            for path, _, _ in video_files:
+                os.remove(path)
+            stat = "deleted"
+        with self._lock:
+            self._stats[stat] += 1
+            self._stats["freed_bytes"] += before - file_size(archive_path)
+
+    def stats(self):
+        """
+        Downloads so far with bytes per audio-minute, formats picked and what
+        the retention policy freed.
+        """
+        with self._lock:
+            stats = dict(self._stats, formats=dict(self._stats["formats"]))
+        audio_minutes = stats["audio_seconds"] / 60
+        stats["audio_seconds"] = round(stats["audio_seconds"], 1)
+        stats["bytes_per_audio_minute"] = round(stats["bytes"] / audio_minutes) if audio_minutes else 0
+        stats["disk_bytes"] = sum(
+            size for video_files in audio_files_by_video(self.output_path).values() for _, size, _ in video_files
+        )
+        return stats
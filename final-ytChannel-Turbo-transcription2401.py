@@ -1,13 +1,24 @@
 import streamlit as st
 import os
-import yt_dlp
-import whisper
+import re
+import time
 import pandas as pd
-import csv
-from googleapiclient.discovery import build
+from youtube_client import YouTubeAPI
+from handle_resolver import parse_channel_input, resolve_channel_ids
 from datetime import datetime
-from urllib.parse import urlparse
-import openpyxl  # Ensure you have openpyxl installed: pip install openpyxl
+from asr_backends import BACKENDS, get_model_stats
+from audio_io import MIN_AUDIO_KBPS
+from download_manager import AUDIO_RETENTION_MODES
+from channel_pipeline import (
+    get_asr_scheduler,
+    get_download_scheduler,
+    get_handle_cache,
+    get_video_job_store,
+    run_channel,
+)
+from job_queue import DEFAULT_QUEUE_PATH, JobQueue
+from language_detection import parse_language_models
+from work_planner import PRIORITY_POLICIES
 
 # -----------------------------
 # 1. Timestamp Helper
@@ -31,246 +42,519 @@ def get_language_code(selected_language):
     return language_map.get(selected_language, None)
 
 # -----------------------------
-# 3. Convert Handle/URL -> Channel ID
+# 3. Run Report
 # -----------------------------
-def get_channel_id_from_handle(youtube_url_or_handle, api_key):
+def show_report(summary, output_path):
     """
-    Extracts the handle from a URL like 'https://www.youtube.com/@SangamTalks'
-    or simply uses the input if it's just '@SangamTalks'.
-    Then performs a search via the YouTube Data API to return the channel's ID.
+    Shows what a channel run did, from the summary returned by
+    channel_pipeline.run_channel (the same summary a background job stores).
     """
-    if youtube_url_or_handle.startswith("http") or youtube_url_or_handle.startswith("www"):
-        parsed_url = urlparse(youtube_url_or_handle)
-        path = parsed_url.path  # e.g. "/@SangamTalks"
-        handle = path.lstrip("/")  # -> "@SangamTalks"
-    else:
-        handle = youtube_url_or_handle
-
-    if not handle.startswith("@"):  # Ensure it starts with '@'
-        st.error("Invalid handle. It should start with '@' (e.g. '@SangamTalks').")
-        return None
-
-    search_query = handle[1:]  # Remove '@' for the query
-
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    response = youtube.search().list(
-        q=search_query,
-        type="channel",
-        part="id",
-        maxResults=1
-    ).execute()
-
-    items = response.get("items", [])
-    if not items:
-        st.error("Could not find a channel matching that handle.")
-        return None
-
-    # Extract the channel ID
-    return items[0]["id"]["channelId"]
-
-# -----------------------------
-# 4. Get *All* Video IDs
-# -----------------------------
-def get_all_video_ids(channel_id, api_key):
-    youtube = build('youtube', 'v3', developerKey=api_key)
-    video_ids = []
-    next_page_token = None
-
-    while True:
-        request = youtube.search().list(
-            part="id",
-            channelId=channel_id,
-            maxResults=50,  # Max allowed by the API per call
-            pageToken=next_page_token
+    api_stats = summary["api"]
+    st.caption(
+        f"YouTube Data API: {api_stats['quota_used']} quota units spent in {api_stats['calls']} calls "
+        f"({api_stats['retries']} retried)."
+    )
+
+    if summary["failed_videos"]:
+        st.warning(
+            f"[{get_timestamp()}] {len(summary['failed_videos'])} videos failed: {', '.join(summary['failed_videos'])}"
         )
-        response = request.execute()
-
-        for item in response.get('items', []):
-            if item['id']['kind'] == 'youtube#video':
-                video_ids.append(item['id']['videoId'])
-
-        next_page_token = response.get('nextPageToken')
-        if not next_page_token:
-            break
 
-    return video_ids
-
-# -----------------------------
-# 5. Download Audio
-# -----------------------------
-def download_youtube_audio(video_id, output_path='.'):
-    """
-    Downloads the audio of a given YouTube video if it doesn't already exist.
-    """
-    try:
-        os.makedirs(output_path, exist_ok=True)
-        audio_file_path = os.path.join(output_path, f"{video_id}.mp3")
-
-        # Check if the file already exists
-        if os.path.exists(audio_file_path):
-            st.info(f"[{get_timestamp()}] Skipping download for video ID {video_id}. File already exists.")
-            return audio_file_path  # Return the existing file path
+    if summary["transcribed"]:
+        st.success(
+            f"[{get_timestamp()}] {summary['transcribed']} transcripts ({summary['segments']} segments) "
+            f"saved to {', '.join(summary['outputs'].values()) or 'per-video CSVs only'}."
+        )
 
-        # File doesn't exist, proceed to download
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': os.path.join(output_path, f'{video_id}.%(ext)s'),
+        # Provide a download button for the single Excel file (streamed from disk,
+        # not read into an extra in-memory copy first)
+        if "xlsx" in summary["outputs"]:
+            with open(summary["outputs"]["xlsx"], "rb") as f:
+                st.download_button(
+                    label="📅 Download Multi-Sheet Excel",
+                    data=f,
+                    file_name="all_transcripts_multisheet.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+    else:
+        st.info("No transcripts to save. Possibly no segments found.")
+
+    # 3a. VAD report (how much audio never reached the model)
+    if summary["audio_seconds"]:
+        total_audio = summary["audio_seconds"]
+        total_speech = summary["speech_seconds"]
+        st.subheader("Voice Activity Detection")
+        st.table(pd.DataFrame([{
+            "Audio (min)": round(total_audio / 60, 1),
+            "Speech (min)": round(total_speech / 60, 1),
+            "Skipped": f"{1 - total_speech / total_audio:.0%}",
+            "Estimated Speedup": f"{total_audio / total_speech:.2f}x" if total_speech else "-",
+        }]))
+
+    # 3b. Model cache report (load time and resident size per model)
+    model_stats = get_model_stats()
+    if model_stats:
+        st.subheader("Model Cache")
+        st.table(pd.DataFrame([
+            {
+                "Backend": info["backend"],
+                "Model": info["model"],
+                "Device": info["device"],
+                "Dtype": info["dtype"],
+                "Load Time (s)": info["load_seconds"],
+                "Resident Size (MB)": round(info["resident_bytes"] / (1024 * 1024), 1),
+                "Cache Hits": info["hits"],
+            }
+            for info in model_stats
+        ]))
+
+    # 3c. Transcript cache report (hits/misses for this run)
+    cache_stats = summary["transcript_cache"]
+    st.subheader("Transcript Cache")
+    st.table(pd.DataFrame([{
+        "Hits": cache_stats["hits"],
+        "Misses": cache_stats["misses"],
+        "Hit Rate": f"{cache_stats['hit_rate']:.0%}" if cache_stats["hits"] + cache_stats["misses"] else "-",
+        "Evictions": cache_stats["evictions"],
+        "Entries": cache_stats["entries"],
+        "Size (MB)": round(cache_stats["size_bytes"] / (1024 * 1024), 1),
+    }]))
+
+    # 3d. Download report (how much was fetched per minute of audio)
+    download_stats = summary["downloads"]
+    st.subheader("Downloads")
+    st.table(pd.DataFrame([{
+        "Downloads": download_stats["downloads"],
+        "Downloaded (MB)": round(download_stats["bytes"] / (1024 * 1024), 1),
+        "Audio (min)": round(download_stats["audio_seconds"] / 60, 1),
+        "KB per Audio Minute": round(download_stats["bytes_per_audio_minute"] / 1024, 1),
+        "Formats": ", ".join(f"{fmt} x{count}" for fmt, count in download_stats["formats"].items()) or "-",
+        "Compressed": download_stats["compressed"],
+        "Deleted": download_stats["deleted"],
+        "Freed (MB)": round(download_stats["freed_bytes"] / (1024 * 1024), 1),
+        "Audio on Disk (MB)": round(download_stats["disk_bytes"] / (1024 * 1024), 1),
+    }]))
+
+    # 3e. Language report (where auto-detection routed each video)
+    if "languages" in summary:
+        language_stats = summary["languages"]
+        st.subheader("Language Detection")
+        st.table(pd.DataFrame([{
+            "Detected": language_stats["detected"],
+            "From Cache": language_stats["cached"],
+            "Fallback": language_stats["fallback"],
+            "Languages": ", ".join(
+                f"{language} x{count}" for language, count in language_stats["languages"].items()
+            ) or "-",
+        }]))
+        st.dataframe(pd.DataFrame([
+            {
+                "Video ID": video_id,
+                "Detected": route["detected"] or "-",
+                "Confidence": route["confidence"],
+                "Language": route["language"],
+                "Model": route["model_name"],
+            }
+            for video_id, route in summary["routes"].items()
+        ]), hide_index=True)
+
+    # 3f. Per-video job state (kept across runs; failed videos can be retried alone)
+    st.subheader("Video Job State")
+    st.table(pd.DataFrame([summary["stages"]]))
+    video_jobs = get_video_job_store(os.path.join(output_path, "video_jobs.sqlite3"))
+    failed_records = video_jobs.list_videos(summary["run_key"], stages=["failed"])
+    if failed_records:
+        st.dataframe(pd.DataFrame([
+            {
+                "Video ID": record["video_id"],
+                "Failed In": record["failed_stage"],
+                "Attempts": record["attempts"],
+                "Error": record["error"],
+            }
+            for record in failed_records
+        ]), hide_index=True)
+
+    # 3g. Performance report: where the run's time went
+    st.subheader("Performance")
+    st.caption(
+        "Stages overlap (downloads run while other videos are transcribed), so stage totals "
+        f"can add up to more than the run's wall time. Spans: {summary['perf_trace']}"
+    )
+    st.table(pd.DataFrame([
+        {
+            "Stage": row["stage"],
+            "Count": row["count"],
+            "Errors": row["errors"],
+            "Total (s)": row["wall_seconds"],
+            "Mean (s)": row["mean_seconds"],
+            "p95 (s)": row["p95_seconds"],
+            "CPU (s)": row["cpu_seconds"],
+            "MB": round(row["bytes"] / (1024 * 1024), 1),
+            "Audio (min)": round(row["audio_seconds"] / 60, 1),
+            "RTF": row["rtf"] if row["rtf"] is not None else "-",
         }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-
-        return audio_file_path  # Return the path of the downloaded file
-
-    except Exception as e:
-        st.error(f"[{get_timestamp()}] Error while downloading audio for video ID {video_id}: {e}")
-        return None
-
-# -----------------------------
-# 6. Transcribe Audio
-# -----------------------------
-def transcribe_audio_if_not_done(audio_file, video_id, language_code, output_path):
-    """
-    Checks if transcription for this audio file already exists.
-    If it does, skips transcription. Otherwise, transcribes and saves the result.
-    """
-    try:
-        # Define a path for the transcript file
-        transcript_file_path = os.path.join(output_path, f"{video_id}_transcription.csv")
-
-        # Check if transcription already exists
-        if os.path.exists(transcript_file_path):
-            st.info(f"[{get_timestamp()}] Skipping transcription for video ID {video_id}. Transcript already exists.")
-            return pd.read_csv(transcript_file_path)
-
-        # Perform transcription as it doesn't exist
-        model = whisper.load_model("turbo")
-        result = model.transcribe(audio_file, language=language_code)
-
-        # Save transcription to a CSV file
-        with open(transcript_file_path, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.writer(file)
-            writer.writerow(["Video ID", "Start Time (s)", "End Time (s)", "Transcript"])
-            for segment in result["segments"]:
-                writer.writerow([
-                    video_id,
-                    round(segment["start"], 2),
-                    round(segment["end"], 2),
-                    segment["text"]
-                ])
-
-        # Load the saved transcript into a DataFrame
-        return pd.DataFrame(
-            [
-                [video_id, round(segment["start"], 2), round(segment["end"], 2), segment["text"]]
-                for segment in result["segments"]
-            ],
-            columns=["Video ID", "Start Time (s)", "End Time (s)", "Transcript"],
+        for row in summary["perf"]
+    ]))
+    if "batching" in summary:
+        batching = summary["batching"]
+        st.caption(
+            f"Batched decoding since the app started: {batching['clips']} clips in {batching['batches']} batches "
+            f"(mean {batching['mean_batch_size']} windows per batch, {batching['decode_seconds']} s decoding)."
         )
 
-    except Exception as e:
-        st.error(f"[{get_timestamp()}] Error while transcribing audio for video ID {video_id}: {e}")
-        return None
+    # Flame-style breakdown: self time of each nested stage (e.g. download;yt_dlp)
+    folded = dict(summary["perf_folded"])
+    folded.pop("run", None)
+    if folded:
+        st.bar_chart(
+            pd.DataFrame(
+                {"Stage": list(folded), "Self Time (s)": [ms / 1000 for ms in folded.values()]}
+            ).sort_values("Self Time (s)", ascending=False),
+            x="Stage", y="Self Time (s)", horizontal=True,
+        )
+        st.download_button(
+            label="Download folded stacks (flamegraph.pl / speedscope)",
+            data="\n".join(f"{path} {ms}" for path, ms in folded.items()),
+            file_name=f"{os.path.splitext(os.path.basename(summary['perf_trace']))[0]}.folded",
+            mime="text/plain",
+        )
 
 # -----------------------------
-# 7. Streamlit App
+# 4. Streamlit App
 # -----------------------------
 st.title("YouTube Channel Audio Downloader and Multi-Language Transcriber")
 
-# 7a. Input: YouTube handle/URL and API Key
+# 4a. Output directory (audio, transcripts and every store the pipeline keeps)
+output_path = "audio_files"
+
+# 4a-1. Input: YouTube handle/URL and API Key
 youtube_input = st.text_input(
     "Enter YouTube channel handle or URL (e.g. '@SangamTalks' or 'https://www.youtube.com/@SangamTalks')",
     value=""
 )
 api_key = st.text_input("Enter YouTube Data API Key", type="password")
 
-# 7b. Language selection
+# 4a-2. Batch resolution of many handles (uses the same persistent cache)
+with st.expander("Resolve a list of channels"):
+    handle_list = st.text_area("One handle or channel URL per line")
+    if st.button("Resolve Channels"):
+        if handle_list.strip() and api_key:
+            inputs = [line.strip() for line in handle_list.splitlines() if line.strip()]
+            try:
+                with st.spinner(f"[{get_timestamp()}] Resolving {len(inputs)} channels..."), YouTubeAPI(api_key) as api:
+                    resolved = resolve_channel_ids(
+                        inputs, api, get_handle_cache(os.path.join(output_path, "handle_cache.sqlite3"))
+                    )
+            except Exception as e:
+                # e.g. exhausted quota, an invalid key or no network
+                st.error(f"[{get_timestamp()}] {e}")
+            else:
+                st.table(pd.DataFrame(
+                    [{"Input": value, "Channel ID": channel_id or "not found"} for value, channel_id in resolved.items()]
+                ))
+        else:
+            st.error(f"[{get_timestamp()}] Please enter at least one handle and an API Key.")
+
+# 4b. Language selection
 selected_language = st.selectbox(
     "Select transcription language",
     ["Kannada", "Hindi", "Tamil", "Marathi", "Gujarati", "Punjabi", "Bengali"]
 )
 language_code = get_language_code(selected_language)
+with st.expander("Language auto-detection"):
+    detect_language = st.checkbox(
+        "Detect each video's language on a short sample (the language above is the fallback)", value=False
+    )
+    language_confidence = st.slider("Minimum detection confidence", min_value=0.0, max_value=1.0, value=0.6, step=0.05)
+    detection_windows = st.number_input("30 s windows sampled per video (1 = the start only)", min_value=1, max_value=10, value=1)
+    candidate_languages = [
+        get_language_code(name) for name in st.multiselect(
+            "Only route to these languages (empty = any language the model knows)",
+            ["Kannada", "Hindi", "Tamil", "Marathi", "Gujarati", "Punjabi", "Bengali"],
+        )
+    ]
+    language_models_text = st.text_input("Model per language (e.g. `en=small.en, ta=large-v3`)", value="")
+    try:
+        language_models = parse_language_models(language_models_text)
+    except ValueError as e:
+        st.error(f"[{get_timestamp()}] Invalid model list ({e}); every language uses the model below.")
+        language_models = {}
+
+# 4c. ASR engine
+asr_backend = st.selectbox(
+    "ASR backend",
+    list(BACKENDS),
+    format_func=lambda name: {
+        "whisper": "OpenAI Whisper (PyTorch)",
+        "faster-whisper": "faster-whisper (CTranslate2, int8 on CPU)",
+        "iitm": "IITM ASR (remote)",
+    }[name],
+)
+if asr_backend == "iitm":
+    model_name = "iitm-asr"  # the remote service picks its own model
+else:
+    model_name = st.text_input("Model", value="turbo")
+
+# 4c-1. Audio ingestion: native audio decoded once to 16 kHz PCM; MP3 only as an archive copy
+archive_mp3 = st.checkbox("Also keep an MP3 archive copy", value=False)
+with st.expander("Download settings"):
+    min_audio_kbps = st.number_input(
+        "Smallest audio-only stream with at least this bitrate (kbps)", min_value=16, max_value=256, value=MIN_AUDIO_KBPS
+    )
+    fragment_downloads = st.number_input("Fragments fetched at once per download", min_value=1, max_value=16, value=4)
+    rate_limit_mbps = st.number_input(
+        "Total download rate limit across all downloads (Mbit/s, 0 = unlimited)", min_value=0.0, value=0.0
+    )
+    audio_retention = st.selectbox(
+        "Once a transcript is saved, its audio is",
+        AUDIO_RETENTION_MODES,
+        format_func=lambda mode: {
+            "keep": "Kept",
+            "compress": "Compressed to a 24 kbps Opus archive",
+            "delete": "Deleted",
+        }[mode],
+    )
+    disk_quota_mb = st.number_input(
+        "Only compress/delete while the audio folder is over (MB, 0 = always)", min_value=0, value=0
+    )
+
+# 4c-2. Pipeline concurrency (downloads overlap with transcription)
+with st.expander("Pipeline settings"):
+    download_workers = st.number_input("Parallel downloads", min_value=1, max_value=16, value=2)
+    transcribe_workers = st.number_input(
+        "Parallel transcriptions (each loads its own model copy)", min_value=1, max_value=8, value=1
+    )
+    max_pending_audio = st.number_input(
+        "Max downloaded files waiting for transcription", min_value=1, max_value=64, value=4
+    )
+    use_process_pool = st.checkbox(
+        "Transcribe on a process pool (uses every CPU core)", value=False
+    )
+    farm_workers = st.number_input("Transcription processes", min_value=1, max_value=os.cpu_count() or 1, value=1)
+    farm_threads = st.number_input("Threads per process (0 = CPU cores / processes)", min_value=0, value=0)
+    cache_max_mb = st.number_input("Transcript cache size limit (MB)", min_value=10, value=2048)
+    api_quota_budget = st.number_input(
+        "YouTube Data API quota budget per run (units, 0 = no budget; the default daily quota is 10,000)",
+        min_value=0, value=0,
+    )
+    api_workers = st.number_input("YouTube Data API requests in flight at once", min_value=1, max_value=32, value=8)
+    prometheus_metrics = st.checkbox(
+        "Write Prometheus metrics after each run (audio_files/perf/metrics.prom)", value=False
+    )
+    vad_method = st.selectbox(
+        "Skip silence/music before transcription (VAD)",
+        [None, "energy", "silero"],
+        format_func=lambda method: {
+            None: "Off",
+            "energy": "Energy-based (silence only)",
+            "silero": "Silero VAD model (silence and music; pip install silero-vad)",
+        }[method],
+    )
+    chunk_minutes = st.number_input(
+        "Split videos longer than this into chunks (minutes, 0 = never)", min_value=0, value=0
+    )
+    # The overlap has to be shorter than a chunk, or the chunks would never advance
+    chunk_overlap_seconds = st.number_input(
+        "Chunk overlap (seconds)", min_value=0, max_value=min(60, chunk_minutes * 60 - 1) if chunk_minutes else 60,
+        value=10,
+    )
+    chunk_workers = st.number_input(
+        "Chunks transcribed in parallel per video (each loads its own model copy)", min_value=1, max_value=8, value=2
+    )
+    batch_size = st.number_input(
+        "Batch short clips across videos (30 s windows per forward pass, 0 = off)", min_value=0, max_value=64, value=0
+    )
+    batch_max_seconds = st.number_input(
+        "Only batch videos up to this long (seconds)", min_value=30, max_value=1800, value=180
+    )
+
+# 4c-3. Channel listing
+incremental_sync = st.checkbox(
+    "Incremental sync (only fetch new uploads; keeps a local manifest of the channel)", value=True
+)
+only_pending = incremental_sync and st.checkbox("Skip videos already transcribed in an earlier run", value=False)
+retry_failed_only = st.checkbox("Retry failed videos only (from earlier runs with the same settings)", value=False)
+
+# 4c-3a. Which videos, in which order (decided before anything is downloaded)
+with st.expander("Video selection and priority"):
+    col_min, col_max = st.columns(2)
+    min_duration_minutes = col_min.number_input("Min length (minutes)", min_value=0.0, value=0.0)
+    max_duration_minutes = col_max.number_input("Max length (minutes, 0 = no limit)", min_value=0.0, value=0.0)
+    col_after, col_before = st.columns(2)
+    published_after = col_after.date_input("Published on or after", value=None)
+    published_before = col_before.date_input("Published on or before", value=None)
+    exclude_shorts = st.checkbox("Skip Shorts (up to 1 minute, or #shorts in the title)", value=False)
+    exclude_live = st.checkbox("Skip livestream replays", value=False)
+    title_regex = st.text_input("Only titles matching (regular expression, case-insensitive)", value="") or None
+    if title_regex:
+        try:
+            re.compile(title_regex)
+        except re.error as e:
+            st.error(f"[{get_timestamp()}] Invalid title pattern ({e}); the title filter is off.")
+            title_regex = None
+    priority = st.selectbox(
+        "Process first",
+        PRIORITY_POLICIES,
+        format_func=lambda policy: {
+            "newest": "Newest uploads",
+            "shortest": "Shortest videos (fast partial results)",
+            "listed": "In listing order",
+        }[policy],
+    )
+    audio_hours_budget = st.number_input("Audio hours per run (0 = no budget)", min_value=0.0, value=0.0)
+
+# 4c-4. Export formats (each transcript is appended as soon as it finishes)
+with st.expander("Export settings"):
+    export_formats = st.multiselect(
+        "Combined outputs", ["xlsx", "parquet"], default=["xlsx"],
+        format_func=lambda fmt: {"xlsx": "Multi-sheet Excel", "parquet": "Parquet dataset"}[fmt],
+    )
+    xlsx_engine = st.selectbox(
+        "Excel writer", ["openpyxl", "xlsxwriter"],
+        format_func=lambda engine: {
+            "openpyxl": "openpyxl (write-only mode)",
+            "xlsxwriter": "xlsxwriter (constant_memory mode)",
+        }[engine],
+    )
+
+# 4d. Shared work queue: every session of this Streamlit server transcribes through
+#     one scheduler, so the same video is never worked on twice at once
+with st.expander("Shared work queue (all sessions)"):
+    asr_scheduler = get_asr_scheduler()
+    col_slots, col_apply, col_refresh = st.columns(3)
+    asr_slots = col_slots.number_input(
+        "Transcriptions at once", min_value=1, max_value=16, value=asr_scheduler.max_running or 2
+    )
+    if col_apply.button("Apply to all sessions"):
+        asr_scheduler.set_max_running(int(asr_slots))
+    col_refresh.button("Refresh queue")
+    for label, scheduler in [("Transcription", asr_scheduler), ("Download", get_download_scheduler())]:
+        scheduler_stats = scheduler.stats()
+        st.caption(
+            f"{label}: {scheduler_stats['running']} running, {scheduler_stats['queued']} queued, "
+            f"{scheduler_stats['waiting_callers']} sessions waiting on another session's task; "
+            f"{scheduler_stats['completed']} done, {scheduler_stats['failed']} failed, "
+            f"{scheduler_stats['attached']} duplicate requests served."
+            + (f" Slots busy now: {scheduler_stats['utilization']:.0%}, on average {scheduler_stats['mean_busy']:.0%}."
+               if scheduler_stats["utilization"] is not None else "")
+        )
+    queued_tasks = asr_scheduler.tasks() + get_download_scheduler().tasks()
+    if queued_tasks:
+        st.dataframe(pd.DataFrame([
+            {
+                "Video ID": task["video_id"],
+                "Language": task.get("language", "-"),
+                "Model": task.get("model", "download"),
+                "State": task["state"],
+                "Slot": task["slot"] if task["slot"] is not None else "-",
+                "Waiting Sessions": task["attached"],
+                "Run": task["run"],
+                "Queued (s)": round((task["started_at"] or time.time()) - task["submitted_at"], 1),
+            }
+            for task in queued_tasks
+        ]), hide_index=True)
+
+# 4e. Everything a run is configured with: the same settings run here or in a background worker
+settings = {
+    "language_code": language_code,
+    "output_path": output_path,
+    "backend": asr_backend,
+    "model_name": model_name,
+    "archive_mp3": archive_mp3,
+    "min_audio_kbps": int(min_audio_kbps),
+    "fragment_downloads": int(fragment_downloads),
+    "rate_limit_mbps": float(rate_limit_mbps),
+    "audio_retention": audio_retention,
+    "disk_quota_mb": int(disk_quota_mb),
+    "incremental_sync": incremental_sync,
+    "only_pending": only_pending,
+    "retry_failed_only": retry_failed_only,
+    "download_workers": int(download_workers),
+    "transcribe_workers": int(transcribe_workers),
+    "max_pending_audio": int(max_pending_audio),
+    "use_process_pool": use_process_pool,
+    "farm_workers": int(farm_workers),
+    "farm_threads": int(farm_threads),
+    "vad_method": vad_method,
+    "chunk_minutes": int(chunk_minutes),
+    "chunk_overlap_seconds": int(chunk_overlap_seconds),
+    "chunk_workers": int(chunk_workers),
+    "batch_size": int(batch_size),
+    "batch_max_seconds": int(batch_max_seconds),
+    "cache_max_mb": int(cache_max_mb),
+    "api_quota_budget": int(api_quota_budget),
+    "api_workers": int(api_workers),
+    "export_formats": export_formats,
+    "xlsx_engine": xlsx_engine,
+    "prometheus_metrics": prometheus_metrics,
+    "detect_language": detect_language,
+    "language_confidence": float(language_confidence),
+    "detection_windows": int(detection_windows),
+    "candidate_languages": candidate_languages,
+    "language_models": language_models,
+    "min_duration_seconds": int(min_duration_minutes * 60),
+    "max_duration_seconds": int(max_duration_minutes * 60),
+    "published_after": published_after.isoformat() if published_after else None,
+    "published_before": published_before.isoformat() if published_before else None,
+    "exclude_shorts": exclude_shorts,
+    "exclude_live": exclude_live,
+    "title_regex": title_regex,
+    "priority": priority,
+    "audio_hours_budget": float(audio_hours_budget),
+}
+channel_ok = bool(youtube_input and api_key and parse_channel_input(youtube_input) is not None)
+
+# 4e-1. Background mode: hand the channel to a job_queue.py worker instead of
+#       running it in this browser session (progress is shown in app.py)
+if st.button("Queue Channel for Background Worker"):
+    if channel_ok:
+        job_queue = JobQueue(DEFAULT_QUEUE_PATH)
+        active_job_id = job_queue.find_active(youtube_input, settings)
+        if active_job_id is not None:
+            # Someone already queued this channel with the same settings; follow that job instead
+            st.info(f"[{get_timestamp()}] This channel is already queued or running as job {active_job_id}.")
+        else:
+            job_id = job_queue.submit(youtube_input, api_key, settings)
+            st.success(
+                f"[{get_timestamp()}] Queued job {job_id}. Run `python job_queue.py worker` to process it; "
+                "progress is shown in app.py."
+            )
+    else:
+        st.error(f"[{get_timestamp()}] Please enter a valid channel handle/URL and API Key.")
 
-# 7c. Output directory
-output_path = "audio_files"
-
-# 7d. Dictionary to store each video's transcripts as a separate DataFrame
-all_video_dfs = {}
-
-# 7e. Process Channel
+# 4f. Process Channel in this browser session: the same run a background worker does,
+#     with its progress shown here
 if st.button("Process Channel"):
-    if youtube_input and api_key:
-        # Initialize failed_videos list
-        failed_videos = []
-
-        # 1. Convert handle/URL -> channel_id
-        with st.spinner(f"[{get_timestamp()}] Resolving channel handle/URL..."):
-            channel_id = get_channel_id_from_handle(youtube_input, api_key)
-
-        if channel_id:
-            st.success(f"[{get_timestamp()}] Resolved Channel ID: {channel_id}")
-
-            # 2. Fetch video IDs
-            with st.spinner(f"[{get_timestamp()}] Fetching all video IDs for channel..."):
-                video_ids = get_all_video_ids(channel_id, api_key)
-
-            if video_ids:
-                st.success(f"[{get_timestamp()}] Found {len(video_ids)} videos. Processing all of them...")
-
-                # 3. Loop through each video
-                for idx, video_id in enumerate(video_ids, start=1):
-                    with st.spinner(f"[{get_timestamp()}] [{idx}/{len(video_ids)}] Processing video ID: {video_id}"):
-                        try:
-                            # Step 1: Check and download audio
-                            audio_file = download_youtube_audio(video_id, output_path)
-                            if not audio_file:
-                                raise Exception(f"Audio download failed for video ID: {video_id}")
-
-                            # Step 2: Check and transcribe audio
-                            df_video = transcribe_audio_if_not_done(audio_file, video_id, language_code, output_path)
-                            if df_video is None:
-                                raise Exception(f"Transcription failed or was skipped for video ID: {video_id}")
-
-                            # Step 3: Store transcript DataFrame in dictionary
-                            all_video_dfs[video_id] = df_video
-
-                        except Exception as e:
-                            # Log the error and add the video ID to the failed list
-                            st.error(f"[{get_timestamp()}] Error for video ID {video_id}: {e}")
-                            failed_videos.append(video_id)
-
-                # 4. After looping through all videos, create single Excel with multiple sheets
-                if all_video_dfs:
-                    # Ensure the output folder exists
-                    os.makedirs(output_path, exist_ok=True)
-
-                    excel_filename = os.path.join(output_path, "all_transcripts_multisheet.xlsx")
-
-                    # Write each video's DataFrame to its own sheet
-                    with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-                        for vid_id, df_vid in all_video_dfs.items():
-                            sheet_name = vid_id[:31]  # Truncate sheet name if necessary
-                            df_vid.to_excel(writer, sheet_name=sheet_name, index=False)
-
-                    st.success(f"[{get_timestamp()}] All transcripts saved to {excel_filename} (multi-sheet).")
-
-                    # Provide a download button for this single Excel file
-                    with open(excel_filename, "rb") as f:
-                        st.download_button(
-                            label="📅 Download Multi-Sheet Excel",
-                            data=f.read(),
-                            file_name="all_transcripts_multisheet.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        )
-                else:
-                    st.info("No transcripts to save. Possibly no segments found.")
+    if channel_ok:
+        progress = st.progress(0.0)
+        status = st.empty()
+        failed_so_far = [0]
+
+        def show_progress(update):
+            if update["failed"] > failed_so_far[0]:
+                failed_so_far[0] = update["failed"]
+                st.error(update["message"])
+            else:
+                status.info(update["message"])
+            if update["total"]:
+                finished = update["done"] + update["failed"]
+                progress.progress(
+                    min(1.0, finished / update["total"]),
+                    text=f"[{finished}/{update['total']}] {update.get('video_id') or ''}",
+                )
+
+        try:
+            # This session's runs share the transcription slots set above with every other session
+            summary = run_channel(
+                youtube_input, api_key, dict(settings, asr_slots=int(asr_slots)), on_progress=show_progress
+            )
+        except Exception as e:
+            # e.g. unknown channel or exhausted quota; videos finished so far are kept for the next run
+            st.error(f"[{get_timestamp()}] {e}")
+        else:
+            if summary["videos"]:
+                show_report(summary, output_path)
             else:
                 st.error(f"[{get_timestamp()}] No videos found in the channel.")
     else:
         st.error(f"[{get_timestamp()}] Please enter a valid channel handle/URL and API Key.")
-
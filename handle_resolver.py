@@ -0,0 +1,161 @@
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+from googleapiclient.errors import HttpError
+
+from youtube_client import YouTubeAPI
+
+# Handles rarely move to another channel; re-check them once a week
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+# -----------------------------
+# 1. Parse Handle / URL
+# -----------------------------
+def parse_channel_input(youtube_url_or_handle):
+    """
+    Turns user input into ("handle", "@name") or ("channel_id", "UC...").
+
+    Accepts '@SangamTalks', 'https://www.youtube.com/@SangamTalks',
+    'www.youtube.com/@SangamTalks' and 'https://www.youtube.com/channel/UC...'.
+    Returns None if the input is neither.
+    """
+    value = youtube_url_or_handle.strip()
+    if value.startswith("http") or value.startswith("www") or value.startswith("youtube.com"):
+        if not value.startswith("http"):
+            value = "https://" + value
+        path = urlparse(value).path  # e.g. "/@SangamTalks" or "/channel/UC..."
+        parts = [part for part in path.split("/") if part]
+        if len(parts) >= 2 and parts[0] == "channel":
+            return ("channel_id", parts[1])
+        value = parts[0] if parts else ""
+
+    if value.startswith("UC") and len(value) == 24:
+        return ("channel_id", value)
+    if value.startswith("@") and len(value) > 1:
+        return ("handle", value)
+    return None
+
+# -----------------------------
+# 2. Persistent Handle -> Channel ID Cache
+# -----------------------------
+class HandleCache:
+    """
+    SQLite-backed cache of handle -> channel ID with a time-to-live.
+    Handles are case-insensitive on YouTube, so keys are lower-cased.
+    """
+
+    def __init__(self, db_path, ttl_seconds=DEFAULT_TTL_SECONDS):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS handles (
+                    handle TEXT PRIMARY KEY,
+                    channel_id TEXT NOT NULL,
+                    resolved_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, handle):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT channel_id, resolved_at FROM handles WHERE handle = ?", (handle.lower(),)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return row[0]
+
+    def put(self, handle, channel_id):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO handles (handle, channel_id, resolved_at) VALUES (?, ?, ?)",
+                (handle.lower(), channel_id, time.time()),
+            )
+
+# -----------------------------
+# 3. Resolve Handles (Batch, Concurrent)
+# -----------------------------
+def lookup_channel_id(handle, api):
+    """
+    Resolves one handle with channels().list(forHandle=...), which is an exact
+    match costing 1 quota unit (search().list is fuzzy and costs 100).
+    """
+    response = api.call("channels.list", lambda youtube: youtube.channels().list(
+        part="id",
+        forHandle=handle,
+        maxResults=1,
+    ))
+    items = response.get("items", [])
+    return items[0]["id"] if items else None
+
+
+def resolve_channel_ids(inputs, api, cache=None):
+    """
+    Resolves a list of handles/URLs to channel IDs through a YouTubeAPI.
+
+    Cached handles and inputs that already contain a channel ID are answered
+    without any API call; the rest are looked up concurrently (up to the
+    API's max_workers) and cached. Returns {input: channel_id or None}:
+    None for invalid inputs and handles no channel has. Any other API error
+    (QuotaExceeded, an invalid key, network failures) is raised.
+    """
+    results = dict.fromkeys(inputs)
+    to_lookup = {}
+    for value in inputs:
+        parsed = parse_channel_input(value)
+        if parsed is None:
+            continue
+        if parsed[0] == "channel_id":
+            results[value] = parsed[1]
+        else:
+            cached = cache.get(parsed[1]) if cache else None
+            if cached:
+                results[value] = cached
+            else:
+                to_lookup.setdefault(parsed[1].lower(), []).append(value)
+
+    def resolve(handle):
+        try:
+            return handle, lookup_channel_id(handle, api)
+        except HttpError as e:
+            # Only an unknown handle means "no channel"; quota, auth and network errors reach the caller
+            if e.resp.status == 404:
+                return handle, None
+            raise
+
+    for handle, channel_id in api.map(resolve, to_lookup):
+        if channel_id and cache:
+            cache.put(handle, channel_id)
+        for value in to_lookup[handle]:
+            results[value] = channel_id
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve YouTube handles/URLs to channel IDs.")
+    parser.add_argument("file", help="Text file with one handle or channel URL per line ('-' for stdin)")
+    parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"), help="YouTube Data API key")
+    parser.add_argument("--cache", default="audio_files/handle_cache.sqlite3", help="Handle cache database")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--quota-budget", type=int, default=0, help="Stop after this many quota units (0 = no budget)")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    inputs = [line.strip() for line in source if line.strip()]
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["Input", "Channel ID"])
+    with YouTubeAPI(args.api_key, quota_budget=args.quota_budget, max_workers=args.workers) as api:
+        for value, channel_id in resolve_channel_ids(inputs, api, HandleCache(args.cache)).items():
+            writer.writerow([value, channel_id or ""])
+    print(f"Quota used: {api.stats()['quota_used']} units", file=sys.stderr)
@@ -0,0 +1,373 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from channel_pipeline import (
+    DEFAULT_SETTINGS,
+    JobCancelled,
+    add_settings_arguments,
+    check_settings,
+    get_asr_scheduler,
+    get_timestamp,
+    run_channel,
+    settings_from_args,
+)
+
+DEFAULT_QUEUE_PATH = os.path.join("audio_files", "jobs.sqlite3")
+
+# A worker that has not reported for this long is left off the status page
+WORKER_STALE_SECONDS = 120
+
+# -----------------------------
+# 1. Job Queue (SQLite)
+# -----------------------------
+class JobQueue:
+    """
+    Local queue of channel jobs shared by the Streamlit apps (which submit
+    and poll) and any number of worker processes (which run them).
+
+    Job status: "queued" -> "running" -> "done" / "failed" / "cancelled".
+    The API key is kept only while a job is waiting or running.
+
+    Workers report their job slots, running jobs and ASR scheduler state
+    with heartbeat(), so the apps can show queue depth and utilization.
+    """
+
+    def __init__(self, db_path=DEFAULT_QUEUE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        # Several processes use the same file: wait for locks instead of failing
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel_input TEXT NOT NULL,
+                    api_key TEXT,
+                    settings TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    stage TEXT,
+                    total INTEGER NOT NULL DEFAULT 0,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    worker_pid INTEGER,
+                    submitted_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_at REAL
+                )
+                """
+            )
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workers (
+                    pid INTEGER PRIMARY KEY,
+                    job_slots INTEGER NOT NULL,
+                    running_jobs TEXT NOT NULL,
+                    scheduler TEXT,
+                    started_at REAL NOT NULL,
+                    heartbeat_at REAL NOT NULL
+                )
+                """
+            )
+
+    def submit(self, channel_input, api_key, settings=None):
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (channel_input, api_key, settings, submitted_at) VALUES (?, ?, ?, ?)",
+                (channel_input, api_key, json.dumps(settings or {}), time.time()),
+            )
+            return cursor.lastrowid
+
+    def find_active(self, channel_input, settings=None):
+        """
+        ID of a queued or running job for the same channel with the same
+        settings, or None. A second request for it can wait on that job
+        instead of doing all the work again.
+        """
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT job_id FROM jobs
+                WHERE channel_input = ? AND settings = ? AND status IN ('queued', 'running')
+                ORDER BY job_id LIMIT 1
+                """,
+                (channel_input, json.dumps(settings or {})),
+            ).fetchone()
+        return row[0] if row else None
+
+    def claim_next(self, worker_pid=None):
+        """
+        Atomically moves the oldest queued job to "running" and returns it,
+        or returns None when the queue is empty.
+        """
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so two workers never claim the same job
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY job_id LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    self._db.execute(
+                        """
+                        UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ?, updated_at = ?
+                        WHERE job_id = ?
+                        """,
+                        (worker_pid or os.getpid(), now, now, row["job_id"]),
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return self._to_job(row) if row is not None else None
+
+    def update_progress(self, job_id, stage, total, done, failed, message):
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE jobs SET stage = ?, total = ?, done = ?, failed = ?, message = ?, updated_at = ?
+                WHERE job_id = ?
+                """,
+                (stage, total, done, failed, message, time.time(), job_id),
+            )
+
+    def finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            self._db.execute(
+                """
+                UPDATE jobs SET status = ?, result = ?, error = ?, api_key = NULL, finished_at = ?, updated_at = ?
+                WHERE job_id = ?
+                """,
+                (status, json.dumps(result) if result is not None else None, error, time.time(), time.time(), job_id),
+            )
+
+    def cancel(self, job_id):
+        """
+        Cancels a queued job right away; a running job is asked to stop and
+        its worker finishes it as "cancelled" after the videos in flight.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', api_key = NULL, finished_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'", (job_id,))
+
+    def is_cancel_requested(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def requeue_orphans(self):
+        """
+        Puts "running" jobs whose worker process no longer exists back in the
+        queue (e.g. after a crash or reboot). Returns how many were requeued.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT job_id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+            orphans = [row["job_id"] for row in rows if not is_process_alive(row["worker_pid"])]
+            self._db.executemany(
+                "UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE job_id = ? AND status = 'running'",
+                [(job_id,) for job_id in orphans],
+            )
+        return len(orphans)
+
+    def heartbeat(self, job_slots, running_jobs, scheduler_stats=None, started_at=None, worker_pid=None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO workers (pid, job_slots, running_jobs, scheduler, started_at, heartbeat_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (pid) DO UPDATE SET
+                    job_slots = excluded.job_slots, running_jobs = excluded.running_jobs,
+                    scheduler = excluded.scheduler, heartbeat_at = excluded.heartbeat_at
+                """,
+                (worker_pid or os.getpid(), job_slots, json.dumps(running_jobs),
+                 json.dumps(scheduler_stats) if scheduler_stats is not None else None, started_at or now, now),
+            )
+
+    def list_workers(self):
+        """
+        Workers that reported recently and are still alive, with their
+        utilization (running jobs / job slots) and ASR scheduler stats.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM workers WHERE heartbeat_at >= ? ORDER BY pid",
+                (time.time() - WORKER_STALE_SECONDS,),
+            ).fetchall()
+        workers = []
+        for row in rows:
+            if not is_process_alive(row["pid"]):
+                continue
+            worker = dict(row)
+            worker["running_jobs"] = json.loads(worker["running_jobs"])
+            worker["scheduler"] = json.loads(worker["scheduler"]) if worker["scheduler"] else None
+            worker["utilization"] = len(worker["running_jobs"]) / worker["job_slots"]
+            workers.append(worker)
+        return workers
+
+    def queue_depth(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row is not None else None
+
+    def list_jobs(self, limit=100):
+        with self._lock:
+            rows = self._db.execute("SELECT * FROM jobs ORDER BY job_id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    @staticmethod
+    def _to_job(row):
+        job = dict(row)
+        job["settings"] = json.loads(job["settings"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+
+def is_process_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, but belongs to another user
+    return True
+
+# -----------------------------
+# 2. Worker
+# -----------------------------
+def run_job(job_queue, job, on_finished=None):
+    """
+    Runs one claimed job to completion and records the outcome, then calls
+    on_finished() if given.
+    """
+    job_id = job["job_id"]
+
+    def on_progress(update):
+        job_queue.update_progress(
+            job_id, update["stage"], update["total"], update["done"], update["failed"], update["message"]
+        )
+        print(f"[job {job_id}] {update['message']}", flush=True)
+
+    try:
+        result = run_channel(
+            job["channel_input"], job["api_key"], job["settings"],
+            on_progress=on_progress,
+            should_stop=lambda: job_queue.is_cancel_requested(job_id),
+        )
+        job_queue.finish(job_id, "done", result=result)
+    except JobCancelled as e:
+        job_queue.finish(job_id, "cancelled", error=str(e))
+    except Exception as e:
+        job_queue.finish(job_id, "failed", error=str(e))
+        print(f"[{get_timestamp()}] [job {job_id}] failed: {e}", flush=True)
+    finally:
+        if on_finished:
+            on_finished()
+
+
+def run_worker(job_queue, poll_seconds=5.0, once=False, jobs=1, asr_slots=0):
+    """
+    Long-running loop: claims queued jobs and runs up to `jobs` of them at
+    once on threads. Jobs of one worker share its ASR scheduler, so the same
+    video is transcribed once even if two jobs ask for it, and at most
+    `asr_slots` transcriptions run at once (0 = no cap).
+    With once=True it returns as soon as the queue is empty (for cron).
+    """
+    job_queue.requeue_orphans()
+    scheduler = get_asr_scheduler()
+    if asr_slots:
+        scheduler.set_max_running(asr_slots)
+    started_at = time.time()
+    running = {}  # job ID -> thread
+    job_finished = threading.Event()
+    print(f"[{get_timestamp()}] Worker {os.getpid()} waiting for jobs ({jobs} at once)...", flush=True)
+    while True:
+        running = {job_id: thread for job_id, thread in running.items() if thread.is_alive()}
+        job_queue.heartbeat(jobs, list(running), scheduler.stats(), started_at)
+        job = job_queue.claim_next() if len(running) < jobs else None
+        if job is None:
+            if once and not running:
+                return
+            # Wake up early when a job finishes and frees a slot
+            job_finished.wait(poll_seconds)
+            job_finished.clear()
+            continue
+        print(f"[{get_timestamp()}] Starting job {job['job_id']}: {job['channel_input']}", flush=True)
+        thread = threading.Thread(target=run_job, args=(job_queue, job, job_finished.set), daemon=True)
+        thread.start()
+        running[job["job_id"]] = thread
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queue channel transcription jobs and run them in the background.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help=f"Queue database (default: {DEFAULT_QUEUE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = commands.add_parser("submit", help="Add channels to the queue")
+    submit_parser.add_argument("channels", nargs="+", help="Channel handles, URLs or IDs")
+    submit_parser.add_argument("--api-key", default=os.environ.get("YOUTUBE_API_KEY"),
+                               help="YouTube Data API key (default: $YOUTUBE_API_KEY)")
+    add_settings_arguments(submit_parser)
+
+    worker_parser = commands.add_parser("worker", help="Run queued jobs until stopped")
+    worker_parser.add_argument("--poll-seconds", type=float, default=5.0)
+    worker_parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    worker_parser.add_argument("--jobs", type=int, default=1, help="Jobs run at once by this worker")
+    worker_parser.add_argument("--asr-slots", type=int, default=0,
+                               help="Transcriptions at once across this worker's jobs (0 = no cap)")
+
+    commands.add_parser("list", help="Show recent jobs")
+    cancel_parser = commands.add_parser("cancel", help="Cancel a job")
+    cancel_parser.add_argument("job_id", type=int)
+
+    args = parser.parse_args()
+    job_queue = JobQueue(args.queue)
+
+    if args.command == "submit":
+        if not args.api_key:
+            submit_parser.error("a YouTube Data API key is required (--api-key or $YOUTUBE_API_KEY)")
+        settings = settings_from_args(args)
+        try:
+            check_settings(dict(DEFAULT_SETTINGS, **settings))
+        except ValueError as e:
+            submit_parser.error(str(e))
+        for channel in args.channels:
+            print(f"Queued job {job_queue.submit(channel, args.api_key, settings)}: {channel}")
+    elif args.command == "worker":
+        run_worker(job_queue, args.poll_seconds, args.once, max(1, args.jobs), args.asr_slots)
+    elif args.command == "list":
+        for job in job_queue.list_jobs():
+            print(
+                f"{job['job_id']:>5}  {job['status']:<9}  {job['done']}/{job['total']} done, "
+                f"{job['failed']} failed  {job['channel_input']}  {job['message'] or ''}"
+            )
+        print(f"{job_queue.queue_depth()} queued")
+        for worker in job_queue.list_workers():
+            scheduler = worker["scheduler"] or {}
+            print(
+                f"worker {worker['pid']}: {len(worker['running_jobs'])}/{worker['job_slots']} jobs, "
+                f"{scheduler.get('running', 0)} transcribing, {scheduler.get('queued', 0)} waiting for an ASR slot"
+            )
+    elif args.command == "cancel":
+        job_queue.cancel(args.job_id)
@@ -0,0 +1,206 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Stages a video moves through; "failed" keeps the stage it failed in
+STAGES = ("queued", "downloading", "downloaded", "transcribing", "transcribed", "failed")
+
+# -----------------------------
+# 1. Atomic File Writes
+# -----------------------------
+@contextlib.contextmanager
+def atomic_write(path, mode="w", **open_kwargs):
+    """
+    Opens a temp file next to `path` for writing and renames it over `path`
+    only once the block finishes without an error, so readers (and resumed
+    runs) never see a half-written file. The temp name is unique per thread,
+    so two sessions writing the same file never share one.
+    """
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode, **open_kwargs) as file:
+            yield file
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def is_complete_file(path):
+    """
+    True for a non-empty file that is not a leftover temp/partial download.
+    """
+    return bool(path) and not path.endswith((".tmp", ".part")) and os.path.isfile(path) and os.path.getsize(path) > 0
+
+
+def make_run_key(channel_id, language, backend, model_name, options=None):
+    # One set of video states per channel and transcription configuration
+    return "|".join([channel_id, language, backend, model_name, json.dumps(options or {}, sort_keys=True)])
+
+# -----------------------------
+# 2. Per-Video Job Store (SQLite, WAL)
+# -----------------------------
+class VideoJobStore:
+    """
+    Durable record of every video's progress within a run: current stage,
+    number of attempts, last error (and the stage it happened in), output
+    paths and per-stage timings.
+
+    Every update is its own transaction, and the database runs in WAL mode so
+    the Streamlit app, CLI and workers can read it while a run is writing.
+    A video only counts as done when its stage says so *and* its output file
+    is complete; files alone are never trusted.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS video_jobs (
+                    run_key TEXT NOT NULL,
+                    video_id TEXT NOT NULL,
+                    stage TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    failed_stage TEXT,
+                    audio_file TEXT,
+                    transcript_file TEXT,
+                    download_seconds REAL,
+                    transcribe_seconds REAL,
+                    started_at REAL,
+                    updated_at REAL,
+                    finished_at REAL,
+                    PRIMARY KEY (run_key, video_id)
+                )
+                """
+            )
+
+    def add_videos(self, run_key, video_ids):
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO video_jobs (run_key, video_id, updated_at) VALUES (?, ?, ?)",
+                [(run_key, video_id, time.time()) for video_id in video_ids],
+            )
+
+    def start_attempt(self, run_key, video_id):
+        """
+        Marks the video as downloading and counts a new attempt.
+        """
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO video_jobs (run_key, video_id, stage, attempts, started_at, updated_at)
+                VALUES (?, ?, 'downloading', 1, ?, ?)
+                ON CONFLICT(run_key, video_id) DO UPDATE SET
+                    stage = 'downloading', attempts = attempts + 1, error = NULL, failed_stage = NULL,
+                    started_at = excluded.started_at, updated_at = excluded.updated_at
+                """,
+                (run_key, video_id, now, now),
+            )
+
+    def set_stage(self, run_key, video_id, stage):
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE video_jobs SET stage = ?, updated_at = ? WHERE run_key = ? AND video_id = ?",
+                (stage, time.time(), run_key, video_id),
+            )
+
+    def mark_downloaded(self, run_key, video_id, audio_file, seconds):
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                UPDATE video_jobs SET stage = 'downloaded', audio_file = ?, download_seconds = ?, updated_at = ?
+                WHERE run_key = ? AND video_id = ?
+                """,
+                (audio_file, seconds, time.time(), run_key, video_id),
+            )
+
+    def mark_transcribed(self, run_key, video_id, transcript_file, seconds):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                UPDATE video_jobs SET stage = 'transcribed', transcript_file = ?, transcribe_seconds = ?,
+                    error = NULL, failed_stage = NULL, updated_at = ?, finished_at = ?
+                WHERE run_key = ? AND video_id = ?
+                """,
+                (transcript_file, seconds, now, now, run_key, video_id),
+            )
+
+    def mark_failed(self, run_key, video_id, stage, error):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                UPDATE video_jobs SET stage = 'failed', failed_stage = ?, error = ?, updated_at = ?, finished_at = ?
+                WHERE run_key = ? AND video_id = ?
+                """,
+                (stage, str(error), now, now, run_key, video_id),
+            )
+
+    def get(self, run_key, video_id):
+        with self._lock:
+            cursor = self._db.execute(
+                "SELECT * FROM video_jobs WHERE run_key = ? AND video_id = ?", (run_key, video_id)
+            )
+            row = cursor.fetchone()
+            columns = [column[0] for column in cursor.description]
+        return dict(zip(columns, row)) if row else None
+
+    def list_videos(self, run_key, stages=None):
+        query = "SELECT * FROM video_jobs WHERE run_key = ?"
+        params = [run_key]
+        if stages:
+            query += f" AND stage IN ({','.join('?' * len(stages))})"
+            params.extend(stages)
+        with self._lock:
+            cursor = self._db.execute(query + " ORDER BY video_id", params)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def downloaded_audio(self, run_key, video_id):
+        """
+        The audio file of an earlier attempt, if that download finished and
+        the file is still intact; otherwise None.
+        """
+        record = self.get(run_key, video_id)
+        if record and record["stage"] in ("downloaded", "transcribing", "transcribed") \
+                and is_complete_file(record["audio_file"]):
+            return record["audio_file"]
+        return None
+
+    def is_transcribed(self, run_key, video_id):
+        record = self.get(run_key, video_id)
+        return bool(record and record["stage"] == "transcribed" and is_complete_file(record["transcript_file"]))
+
+    def transcribed_timings(self, run_key):
+        """
+        (video_id, download_seconds, transcribe_seconds) of every video
+        transcribed with the same configuration as `run_key`, in any channel
+        (the channel does not change how fast audio is processed).
+        """
+        config = run_key[run_key.index("|"):]
+        with self._lock:
+            return self._db.execute(
+                """
+                SELECT video_id, download_seconds, transcribe_seconds FROM video_jobs
+                WHERE stage = 'transcribed' AND transcribe_seconds IS NOT NULL
+                    AND substr(run_key, instr(run_key, '|')) = ?
+                """,
+                (config,),
+            ).fetchall()
+
+    def stage_counts(self, run_key):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT stage, COUNT(*) FROM video_jobs WHERE run_key = ? GROUP BY stage", (run_key,)
+            ).fetchall()
+        return dict(rows)
@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from audio_io import load_audio_window, probe_duration
+
+# Whisper decides the language from one 30 s mel window
+DETECTION_WINDOW_SECONDS = 30
+
+# Only the most likely languages are worth keeping per video
+CACHED_LANGUAGES = 10
+
+# -----------------------------
+# 1. Sampled Detection
+# -----------------------------
+def sample_windows(audio_file, windows=1, seconds=DETECTION_WINDOW_SECONDS):
+    """
+    Loads `windows` evenly spaced stretches of `seconds` each (one window is
+    the start of the file). Only those stretches are decoded, never the
+    whole video.
+    """
+    if windows <= 1:
+        return [load_audio_window(audio_file, 0, seconds)]
+    # A short video gets as many windows as fit in it
+    duration = probe_duration(audio_file)
+    windows = min(windows, int(duration // seconds))
+    if windows <= 1:
+        return [load_audio_window(audio_file, 0, seconds)]
+    # Evenly spaced, away from the very start and end where intros and outros are often music
+    step = (duration - seconds) / (windows + 1)
+    return [load_audio_window(audio_file, step * (index + 1), seconds) for index in range(windows)]
+
+
+def detect_language(backend, audio_file, windows=1):
+    """
+    Averages the backend's language probabilities over the sampled windows.
+    Returns {language code: probability}, or None when the backend cannot
+    detect languages.
+    """
+    samples = [sample for sample in sample_windows(audio_file, windows) if len(sample)]
+    totals = {}
+    for sample in samples:
+        probabilities = backend.detect_language(sample)
+        if probabilities is None:
+            return None
+        for language, probability in probabilities.items():
+            totals[language] = totals.get(language, 0.0) + probability
+    if not samples:
+        return None
+    return {language: total / len(samples) for language, total in totals.items()}
+
+# -----------------------------
+# 2. Per-Video Cache (SQLite, WAL)
+# -----------------------------
+class LanguageCache:
+    """
+    Detected language probabilities per video and detector (backend, model
+    and number of windows), so resumed and repeated runs never detect the
+    same video twice.
+    """
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS detected_languages (
+                    video_id TEXT NOT NULL,
+                    detector TEXT NOT NULL,
+                    probabilities TEXT NOT NULL,
+                    detected_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, detector)
+                )
+                """
+            )
+
+    def get(self, video_id, detector):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT probabilities FROM detected_languages WHERE video_id = ? AND detector = ?",
+                (video_id, detector),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, video_id, detector, probabilities):
+        top = dict(sorted(probabilities.items(), key=lambda item: item[1], reverse=True)[:CACHED_LANGUAGES])
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO detected_languages (video_id, detector, probabilities, detected_at) "
+                "VALUES (?, ?, ?, ?)",
+                (video_id, detector, json.dumps(top), time.time()),
+            )
+
+# -----------------------------
+# 3. Per-Video Routing
+# -----------------------------
+def parse_language_models(text):
+    """
+    "en=small.en, ta=large-v3" -> {"en": "small.en", "ta": "large-v3"}
+    """
+    models = {}
+    for item in (text or "").split(","):
+        if item.strip():
+            language, _, model_name = item.partition("=")
+            if not model_name.strip():
+                raise ValueError(f"expected language=model, got {item.strip()!r}")
+            models[language.strip()] = model_name.strip()
+    return models
+
+
+class LanguageRouter:
+    """
+    Decides the language (and model) each video is transcribed with.
+
+    The language is detected on a short sample (see detect_language) and
+    cached per video. It is only trusted when its probability reaches
+    `min_confidence`; otherwise, or when the backend cannot detect
+    languages, the video keeps `default_language`. With
+    `candidate_languages` the pick is limited to those languages (their
+    probability is not renormalised, so an unlisted language that dominates
+    still means low confidence). `language_models` maps a language to the
+    model that transcribes it; other languages use `default_model`.
+
+    stats() counts detections, cache hits, fallbacks and routed languages.
+    """
+
+    def __init__(self, cache, detector, default_language, default_model, min_confidence=0.6, windows=1,
+                 candidate_languages=(), language_models=None):
+        self.cache = cache
+        self.detector = detector
+        self.default_language = default_language
+        self.default_model = default_model
+        self.min_confidence = min_confidence
+        self.windows = max(1, windows)
+        self.candidate_languages = tuple(candidate_languages or ())
+        self.language_models = dict(language_models or {})
+        self._lock = threading.Lock()
+        self._stats = {"detected": 0, "cached": 0, "fallback": 0, "languages": {}}
+
+    def route(self, video_id, audio_file, backend):
+        """
+        Returns {language, model_name, detected, confidence, cached} for one
+        video; `backend` (already loaded, and not decoding anything else at
+        the same time) does the detection.
+        """
+        probabilities = self.cache.get(video_id, self.detector)
+        cached = probabilities is not None
+        if not cached:
+            probabilities = detect_language(backend, audio_file, self.windows)
+            if probabilities is not None:
+                self.cache.put(video_id, self.detector, probabilities)
+        candidates = {
+            language: probability for language, probability in (probabilities or {}).items()
+            if not self.candidate_languages or language in self.candidate_languages
+        }
+        detected, confidence = max(candidates.items(), key=lambda item: item[1]) if candidates else (None, 0.0)
+        trusted = detected is not None and confidence >= self.min_confidence
+        language = detected if trusted else self.default_language
+        with self._lock:
+            if probabilities is not None:
+                self._stats["cached" if cached else "detected"] += 1
+            if not trusted:
+                self._stats["fallback"] += 1
+            self._stats["languages"][language] = self._stats["languages"].get(language, 0) + 1
+        return {
+            "language": language,
+            "model_name": self.language_models.get(language, self.default_model),
+            "detected": detected,
+            "confidence": round(confidence, 3),
+            "cached": cached,
+        }
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, languages=dict(self._stats["languages"]))
@@ -0,0 +1,202 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# -----------------------------
+# 1. Device / dtype Helpers
+# -----------------------------
+def get_default_device():
+    """
+    Returns "cuda" when a GPU is visible to torch, otherwise "cpu".
+    """
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except ImportError:
+        return "cpu"
+
+
+def get_default_dtype(device):
+    # Whisper only runs fp16 on GPU; on CPU it falls back to fp32 anyway.
+    return "float16" if device == "cuda" else "float32"
+
+
+def get_model_size_bytes(model):
+    """
+    Sums the parameter and buffer storage of a torch module.
+    Returns 0 for objects that are not torch modules (see ModelRegistry.sizer).
+    """
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if tensors is None:
+            continue
+        for tensor in tensors():
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def load_whisper_model(name, device, dtype):
+    import whisper
+
+    model = whisper.load_model(name, device=device)
+    if dtype == "float16" and device != "cpu":
+        model = model.half()
+    return model
+
+# -----------------------------
+# 2. Model Registry
+# -----------------------------
+class ModelRegistry:
+    """
+    Process-wide cache of loaded ASR models keyed by (model name, device, dtype).
+
+    Each model is loaded lazily the first time it is requested and reused after
+    that. Callers that decode concurrently can ask for separate `replica`
+    copies, since a Whisper model must not run two decodes at once.
+
+    When `memory_budget_bytes` is set, the least recently used models are
+    evicted until the resident total fits the budget again (the model that was
+    just requested is never evicted).
+    """
+
+    def __init__(self, memory_budget_bytes=None, loader=load_whisper_model, sizer=None):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+        # sizer(model, name, dtype) -> resident bytes, for models that are not torch modules
+        self.sizer = sizer
+        self._models = OrderedDict()  # key -> model, in LRU order
+        self._info = {}               # key -> load stats
+        self._lock = threading.RLock()
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, name, device=None, dtype=None, replica=0):
+        """
+        Returns the cached model for (name, device, dtype), loading it on first use.
+        """
+        device = device or get_default_device()
+        dtype = dtype or get_default_dtype(device)
+        key = (name, device, dtype, replica)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._info[key]["hits"] += 1
+                return self._models[key]
+
+        # Only one thread loads a given model; others wait for it.
+        with self._key_lock(key):
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    self._info[key]["hits"] += 1
+                    return self._models[key]
+
+            start = time.perf_counter()
+            model = self.loader(name, device, dtype)
+            load_seconds = time.perf_counter() - start
+
+            with self._lock:
+                self._models[key] = model
+                self._info[key] = {
+                    "model": name,
+                    "device": device,
+                    "dtype": dtype,
+                    "replica": replica,
+                    "load_seconds": round(load_seconds, 2),
+                    "resident_bytes": (
+                        self.sizer(model, name, dtype) if self.sizer else get_model_size_bytes(model)
+                    ),
+                    "hits": 0,
+                }
+                self._evict_over_budget(keep=key)
+            return model
+
+    def _evict_over_budget(self, keep):
+        if not self.memory_budget_bytes:
+            return
+        evicted = False
+        for key in list(self._models):
+            if self.resident_bytes() <= self.memory_budget_bytes:
+                break
+            if key == keep:
+                continue
+            del self._models[key]
+            del self._info[key]
+            evicted = True
+        if evicted:
+            self._release_memory()
+
+    def _release_memory(self):
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def evict(self, name, device=None, dtype=None, replica=0):
+        device = device or get_default_device()
+        dtype = dtype or get_default_dtype(device)
+        key = (name, device, dtype, replica)
+        with self._lock:
+            if key in self._models:
+                del self._models[key]
+                del self._info[key]
+                self._release_memory()
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._info.clear()
+            self._release_memory()
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(info["resident_bytes"] for info in self._info.values())
+
+    def get_info(self, name, device=None, dtype=None, replica=0):
+        device = device or get_default_device()
+        dtype = dtype or get_default_dtype(device)
+        with self._lock:
+            info = self._info.get((name, device, dtype, replica))
+            return dict(info) if info else None
+
+    def stats(self):
+        """
+        Returns one dict per loaded model: name, device, dtype, load time,
+        resident size in bytes and number of cache hits.
+        """
+        with self._lock:
+            return [dict(info) for info in self._info.values()]
+
+# -----------------------------
+# 3. Default (Process-Wide) Registry
+# -----------------------------
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    """
+    Returns the registry shared by everything in this process.
+    The memory budget can be set with MODEL_CACHE_BUDGET_MB.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            budget_mb = os.environ.get("MODEL_CACHE_BUDGET_MB")
+            budget = int(budget_mb) * 1024 * 1024 if budget_mb else None
+            _default_registry = ModelRegistry(memory_budget_bytes=budget)
+        return _default_registry
+
+
+def get_model(name, device=None, dtype=None, replica=0):
+    return get_default_registry().get(name, device=device, dtype=dtype, replica=replica)
@@ -0,0 +1,212 @@
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+
+# -----------------------------
+# 1. Span Recorder
+# -----------------------------
+class SpanRecorder:
+    """
+    Collects timing spans for one run.
+
+    Each span records wall time, CPU time of the calling thread (child
+    processes such as ffmpeg are not included), and optionally bytes and
+    audio duration, from which the real-time factor (wall seconds per audio
+    second; lower is faster) is derived. Spans opened inside another span on
+    the same thread are nested under it, e.g. "download;yt_dlp".
+
+    With `jsonl_path` every finished span is appended to that file as one
+    JSON line, so a crashed run still leaves its measurements behind.
+    """
+
+    def __init__(self, jsonl_path=None, run_id=None):
+        # Start time for reading, plus a random suffix: two runs started in the same second
+        # (e.g. two sessions on one channel) must not share trace files or export folders
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.jsonl_path = jsonl_path
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if jsonl_path:
+            os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+
+    def set_trace_file(self, jsonl_path):
+        """
+        Starts writing spans to `jsonl_path`, including those recorded so far.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(jsonl_path)), exist_ok=True)
+        with self._lock:
+            self.jsonl_path = jsonl_path
+            with open(jsonl_path, "a", encoding="utf-8") as file:
+                for span in self.spans:
+                    file.write(json.dumps(span, ensure_ascii=False) + "\n")
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def span(self, name, video_id=None, **attrs):
+        """
+        Times the block. Yields a dict the block can fill in with "bytes",
+        "audio_seconds" or any other attribute known only at the end.
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span_id = next(self._ids)
+        stack.append((span_id, name))
+        start_time = time.time()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        status = "ok"
+        try:
+            yield attrs
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            stack.pop()
+            self._add({
+                "span_id": span_id,
+                "parent_id": parent[0] if parent else None,
+                "name": name,
+                "path": ";".join([entry[1] for entry in stack] + [name]),
+                "video_id": video_id,
+                "start": start_time,
+                "wall_seconds": time.perf_counter() - wall_start,
+                "cpu_seconds": time.thread_time() - cpu_start,
+                "status": status,
+                **attrs,
+            })
+
+    def record(self, name, wall_seconds, video_id=None, cpu_seconds=None, **attrs):
+        """
+        Adds a span measured elsewhere (e.g. inside a worker process).
+        """
+        stack = self._stack()
+        self._add({
+            "span_id": next(self._ids),
+            "parent_id": stack[-1][0] if stack else None,
+            "name": name,
+            "path": ";".join([entry[1] for entry in stack] + [name]),
+            "video_id": video_id,
+            "start": time.time() - wall_seconds,
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": cpu_seconds,
+            "status": "ok",
+            **attrs,
+        })
+
+    def _add(self, span):
+        span["run_id"] = self.run_id
+        if span.get("audio_seconds"):
+            span["rtf"] = span["wall_seconds"] / span["audio_seconds"]
+        with self._lock:
+            self.spans.append(span)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(span, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        """
+        One row per span name: count, errors, total/mean/p50/p95 wall time,
+        CPU time, bytes, audio seconds and the overall real-time factor.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        rows = []
+        for name in dict.fromkeys(span["name"] for span in spans):
+            group = [span for span in spans if span["name"] == name]
+            walls = sorted(span["wall_seconds"] for span in group)
+            wall_total = sum(walls)
+            audio_total = sum(span.get("audio_seconds") or 0 for span in group)
+            rows.append({
+                "stage": name,
+                "count": len(group),
+                "errors": sum(1 for span in group if span["status"] == "error"),
+                "wall_seconds": round(wall_total, 3),
+                "mean_seconds": round(wall_total / len(group), 3),
+                "p50_seconds": round(percentile(walls, 50), 3),
+                "p95_seconds": round(percentile(walls, 95), 3),
+                "cpu_seconds": round(sum(span.get("cpu_seconds") or 0 for span in group), 3),
+                "bytes": sum(span.get("bytes") or 0 for span in group),
+                "audio_seconds": round(audio_total, 2),
+                "rtf": round(wall_total / audio_total, 4) if audio_total else None,
+            })
+        return rows
+
+    def folded_stacks(self):
+        """
+        Self time per stack path in milliseconds, in the "folded" format read
+        by flamegraph.pl and speedscope ("download;yt_dlp 1234").
+        Stages run concurrently, so the total can exceed the run's wall time.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        child_time = {}
+        for span in spans:
+            if span["parent_id"] is not None:
+                child_time[span["parent_id"]] = child_time.get(span["parent_id"], 0.0) + span["wall_seconds"]
+        folded = {}
+        for span in spans:
+            self_seconds = max(0.0, span["wall_seconds"] - child_time.get(span["span_id"], 0.0))
+            folded[span["path"]] = folded.get(span["path"], 0.0) + self_seconds
+        return {path: int(round(seconds * 1000)) for path, seconds in folded.items()}
+
+    def prometheus_text(self, prefix="yt_transcriber"):
+        """
+        The summary in Prometheus text exposition format (e.g. for the
+        node_exporter textfile collector).
+        """
+        lines = []
+        metrics = [
+            ("stage_seconds", "summary", "Wall time spent per pipeline stage", "wall_seconds"),
+            ("stage_cpu_seconds_total", "counter", "CPU time spent per pipeline stage", "cpu_seconds"),
+            ("stage_bytes_total", "counter", "Bytes handled per pipeline stage", "bytes"),
+            ("stage_audio_seconds_total", "counter", "Audio seconds handled per pipeline stage", "audio_seconds"),
+            ("stage_errors_total", "counter", "Failed spans per pipeline stage", "errors"),
+        ]
+        rows = self.summary()
+        for metric, metric_type, help_text, field in metrics:
+            name = f"{prefix}_{metric}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for row in rows:
+                labels = f'stage="{row["stage"]}"'
+                if metric_type == "summary":
+                    lines.append(f'{name}{{{labels},quantile="0.5"}} {row["p50_seconds"]}')
+                    lines.append(f'{name}{{{labels},quantile="0.95"}} {row["p95_seconds"]}')
+                    lines.append(f"{name}_sum{{{labels}}} {row['wall_seconds']}")
+                    lines.append(f"{name}_count{{{labels}}} {row['count']}")
+                else:
+                    lines.append(f"{name}{{{labels}}} {row[field]}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = (len(sorted_values) - 1) * q / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+
+# Sentinel telling a worker that no more items will arrive on its queue
+_DONE = object()
+
+# -----------------------------
+# 1. Pipeline Events
+# -----------------------------
+class PipelineEvent:
+    """
+    One finished video coming out of the pipeline.
+
+    status is "done" or "failed". `result` holds whatever the transcribe
+    function returned; `error` holds the message when the video failed.
+    """
+
+    def __init__(self, video_id, status, result=None, error=None, stage=None, seconds=0.0):
+        self.video_id = video_id
+        self.status = status
+        self.result = result
+        self.error = error
+        self.stage = stage
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"PipelineEvent({self.video_id!r}, {self.status!r}, stage={self.stage!r})"
+
+# -----------------------------
+# 2. Staged Download -> Transcribe Pipeline
+# -----------------------------
+def run_pipeline(
+    video_ids,
+    download_fn,
+    transcribe_fn,
+    download_workers=2,
+    transcribe_workers=1,
+    max_pending_audio=4,
+    thread_hook=None,
+):
+    """
+    Runs downloads and transcriptions concurrently and yields a PipelineEvent
+    for every video as soon as it finishes (or fails).
+
+    - download_fn(video_id) returns the audio path, or None on failure.
+    - transcribe_fn(audio_file, video_id, worker_index) returns the transcript,
+      or None on failure. `worker_index` lets each transcription worker use its
+      own model replica.
+
+    Downloaded audio waits in a queue holding at most `max_pending_audio`
+    files; downloaders block when it is full, so no more than
+    max_pending_audio + download_workers files are ever waiting for ASR.
+
+    `thread_hook(thread)` is called on each worker thread before it starts
+    (e.g. streamlit's add_script_run_ctx so workers can write to the page).
+    """
+    video_ids = list(video_ids)
+    download_workers = max(1, download_workers)
+    transcribe_workers = max(1, transcribe_workers)
+
+    video_queue = queue.Queue()
+    audio_queue = queue.Queue(maxsize=max(1, max_pending_audio))
+    events = queue.Queue()
+    stop = threading.Event()
+
+    for video_id in video_ids:
+        video_queue.put(video_id)
+    for _ in range(download_workers):
+        video_queue.put(_DONE)
+
+    def put_audio(item):
+        # Retry with a timeout so a stopped pipeline never leaves a worker blocked
+        while not stop.is_set():
+            try:
+                audio_queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def download_worker():
+        while not stop.is_set():
+            video_id = video_queue.get()
+            if video_id is _DONE:
+                break
+            start = time.perf_counter()
+            try:
+                audio_file = download_fn(video_id)
+                if not audio_file:
+                    raise Exception(f"Audio download failed for video ID: {video_id}")
+            except Exception as e:
+                events.put(PipelineEvent(video_id, "failed", error=str(e), stage="download",
+                                         seconds=time.perf_counter() - start))
+                continue
+            if not put_audio((video_id, audio_file)):
+                break
+
+    def transcribe_worker(worker_index):
+        while True:
+            try:
+                item = audio_queue.get(timeout=0.5)
+            except queue.Empty:
+                if stop.is_set():
+                    break
+                continue
+            if item is _DONE:
+                break
+            video_id, audio_file = item
+            start = time.perf_counter()
+            try:
+                result = transcribe_fn(audio_file, video_id, worker_index)
+                if result is None:
+                    raise Exception(f"Transcription failed or was skipped for video ID: {video_id}")
+                events.put(PipelineEvent(video_id, "done", result=result, stage="transcribe",
+                                         seconds=time.perf_counter() - start))
+            except Exception as e:
+                events.put(PipelineEvent(video_id, "failed", error=str(e), stage="transcribe",
+                                         seconds=time.perf_counter() - start))
+
+    def start_thread(target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        if thread_hook:
+            thread_hook(thread)
+        thread.start()
+        return thread
+
+    downloaders = [start_thread(download_worker, f"download-{i}") for i in range(download_workers)]
+    transcribers = [start_thread(transcribe_worker, f"transcribe-{i}", i) for i in range(transcribe_workers)]
+
+    def close_audio_queue():
+        # Once every downloader is done, tell each transcriber to finish up
+        for thread in downloaders:
+            thread.join()
+        for _ in transcribers:
+            put_audio(_DONE)
+
+    start_thread(close_audio_queue, "download-closer")
+
+    remaining = len(video_ids)
+    try:
+        while remaining:
+            event = events.get()
+            remaining -= 1
+            yield event
+    finally:
+        # The consumer stopped early (or we are done): release all workers
+        stop.set()
@@ -0,0 +1,469 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from contextlib import ExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import numpy as np
+
+from asr_backends import BACKENDS, ASRBackend, IITMBackend
+from asr_benchmark import get_peak_rss_mb
+
+BENCHMARK_HANDLE = "@PipelineBenchmark"
+BENCHMARK_CHANNEL_ID = "UC" + "PipelineBenchmark".ljust(22, "0")
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+
+# -----------------------------
+# 1. Fixture Audio
+# -----------------------------
+def make_fixture_wav(path, seconds, sample_rate=16000, seed=0):
+    """
+    Writes a deterministic speech-like clip: one-second bursts of shaped
+    noise separated by half-second pauses, so VAD has something to find.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = ((t % 1.5) < 1.0).astype(np.float32)
+    audio = 0.3 * envelope * np.sin(2 * np.pi * 220 * t) + 0.05 * envelope * rng.standard_normal(len(t))
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return path
+
+
+def wav_duration(path):
+    with wave.open(path, "rb") as wav_file:
+        return wav_file.getnframes() / wav_file.getframerate()
+
+
+def decode_wav_to_pcm_file(audio_file, pcm_path):
+    """
+    Stand-in for audio_io.decode_to_pcm_file on machines without ffmpeg:
+    reads a 16 kHz mono 16-bit WAV fixture and writes the same raw 16-bit
+    file the real decoder produces.
+    """
+    if os.path.exists(pcm_path):
+        return pcm_path
+    with wave.open(audio_file, "rb") as wav_file:
+        if wav_file.getframerate() != 16000 or wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+            raise ValueError(f"{audio_file}: the ffmpeg-free decoder only reads 16 kHz mono 16-bit WAV")
+        frames = wav_file.readframes(wav_file.getnframes())
+    tmp_path = pcm_path + ".part"
+    with open(tmp_path, "wb") as file:
+        file.write(frames)
+    os.replace(tmp_path, pcm_path)
+    return pcm_path
+
+# -----------------------------
+# 2. Stubbed YouTube Data API
+# -----------------------------
+class _Request:
+    def __init__(self, client, response):
+        self.client = client
+        self.response = response
+
+    def execute(self):
+        with self.client.lock:
+            self.client.calls += 1
+        if self.client.latency_seconds:
+            time.sleep(self.client.latency_seconds)
+        return self.response
+
+
+class FakeYouTube:
+    """
+    Answers the three Data API calls the pipeline makes (channels().list
+    by handle, paginated playlistItems().list and videos().list) for one
+    synthetic channel, counting calls so quota use can be compared too.
+    """
+
+    def __init__(self, video_count, duration_seconds, latency_seconds=0.0):
+        self.video_ids = [f"bench{index:06d}" for index in range(video_count)]
+        self.duration_seconds = int(round(duration_seconds))
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def channels(self):
+        return self
+
+    def playlistItems(self):
+        return _PlaylistItems(self)
+
+    def videos(self):
+        return _Videos(self)
+
+    def list(self, part=None, forHandle=None, maxResults=None, **kwargs):
+        items = [{"id": BENCHMARK_CHANNEL_ID}] if forHandle and forHandle.lower() == BENCHMARK_HANDLE.lower() else []
+        return _Request(self, {"items": items})
+
+
+class _PlaylistItems:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, part=None, playlistId=None, maxResults=50, pageToken=None):
+        start = int(pageToken or 0)
+        page = self.client.video_ids[start:start + maxResults]
+        response = {
+            "items": [
+                {"contentDetails": {"videoId": video_id, "videoPublishedAt": f"2024-01-01T00:00:{index % 60:02d}Z"}}
+                for index, video_id in enumerate(page, start=start)
+            ]
+        }
+        if start + maxResults < len(self.client.video_ids):
+            response["nextPageToken"] = str(start + maxResults)
+        return _Request(self.client, response)
+
+
+class _Videos:
+    def __init__(self, client):
+        self.client = client
+
+    def list(self, part=None, id="", maxResults=50, fields=None):
+        items = [
+            {
+                "id": video_id,
+                "snippet": {"title": f"Benchmark video {video_id}", "publishedAt": "2024-01-01T00:00:00Z"},
+                "contentDetails": {"duration": f"PT{self.client.duration_seconds}S"},
+            }
+            for video_id in id.split(",") if video_id
+        ]
+        return _Request(self.client, {"items": items})
+
+# -----------------------------
+# 3. Local yt-dlp Stand-In
+# -----------------------------
+def make_fixture_downloader(fixture_path, bytes_per_second=None):
+    """
+    Returns a drop-in for audio_io.download_native_audio that "downloads"
+    the fixture clip by copying it, optionally throttled to a bandwidth.
+
+    The video ID is written over the clip's last samples so every video
+    decodes to different audio and the transcript cache cannot answer
+    all but the first one.
+    """
+    fixture_size = os.path.getsize(fixture_path)
+
+    def download_native_audio(video_id, output_path, archive_mp3=False, min_kbps=None, ydl_options=None):
+        hooks = (ydl_options or {}).get("progress_hooks", [])
+        os.makedirs(output_path, exist_ok=True)
+        target = os.path.join(output_path, f"{video_id}.wav")
+        if bytes_per_second:
+            time.sleep(fixture_size / bytes_per_second)
+        tmp_path = target + ".part"
+        shutil.copyfile(fixture_path, tmp_path)
+        with open(tmp_path, "r+b") as file:
+            file.seek(-len(video_id.encode()), os.SEEK_END)
+            file.write(video_id.encode())
+        os.replace(tmp_path, target)
+        # Report progress the way yt-dlp does (feeds the rate limit and download stats)
+        info = {"format_id": "fixture", "duration": wav_duration(target)}
+        for hook in hooks:
+            hook({"status": "downloading", "downloaded_bytes": fixture_size})
+            hook({"status": "finished", "downloaded_bytes": fixture_size, "info_dict": info})
+        return target
+
+    return download_native_audio
+
+# -----------------------------
+# 4. ASR Stand-Ins (fake backend, mock IITM server)
+# -----------------------------
+class FakeBackend(ASRBackend):
+    """
+    Returns one 5-second segment per 5 seconds of audio after sleeping for
+    `call_seconds + audio_seconds * rtf`, so the pipeline around the model
+    can be measured on its own (all zero) or with a realistic decode cost.
+    A batch pays `call_seconds` once, like a real batched forward pass.
+    """
+
+    name = "fake"
+    rtf = 0.0
+    call_seconds = 0.0
+    load_seconds = 0.0
+    _loaded = set()
+    _loaded_lock = threading.Lock()
+
+    def __init__(self, model_name="fake", device=None, replica=0):
+        super().__init__(model_name, device or "cpu", replica)
+
+    def load(self):
+        with self._loaded_lock:
+            if self.replica in self._loaded:
+                return None
+            self._loaded.add(self.replica)
+        time.sleep(self.load_seconds)
+        return None
+
+    def transcribe(self, audio, language):
+        self.load()
+        time.sleep(self.call_seconds + len(audio) / 16000 * self.rtf)
+        return self._segments(audio)
+
+    def transcribe_batch(self, clips, language):
+        self.load()
+        time.sleep(self.call_seconds + sum(len(clip) for clip in clips) / 16000 * self.rtf)
+        return [self._segments(clip) for clip in clips]
+
+    def detect_language(self, audio):
+        # One encoder pass over the window and a single decoder step
+        self.load()
+        time.sleep(self.call_seconds + len(audio) / 16000 * self.rtf / 10)
+        return {"hi": 0.9, "en": 0.06, "ur": 0.04}
+
+    @staticmethod
+    def _segments(audio):
+        audio_seconds = len(audio) / 16000
+        return [
+            {"start": float(start), "end": float(min(start + 5.0, audio_seconds)), "text": f"segment {index}"}
+            for index, start in enumerate(np.arange(0.0, audio_seconds, 5.0))
+        ]
+
+
+class MockIITMHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency_seconds)
+        vtt = "WEBVTT\n\n00:00:00.000 --> 00:00:05.000\nmock segment\n"
+        payload = json.dumps({"vtt": vtt, "transcript": "mock segment", "bytes": len(body)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_iitm_server(latency_seconds=0.0):
+    """
+    Serves the IITM endpoint's response shape on localhost in a daemon
+    thread. Returns (server, url).
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockIITMHandler)
+    server.latency_seconds = latency_seconds
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/asr"
+
+
+class MockIITMBackend(IITMBackend):
+    name = "mock-iitm"
+    url = None
+
+    def __init__(self, model_name=None, device=None, replica=0):
+        from remote_asr import RemoteASRClient
+
+        super().__init__(model_name, device, replica, client=RemoteASRClient(url=self.url, max_retries=0))
+
+# -----------------------------
+# 5. One Channel Size (own process)
+# -----------------------------
+def _run_size(video_count, options, results):
+    import channel_pipeline
+    import download_manager
+    import youtube_client
+
+    work_dir = tempfile.mkdtemp(prefix=f"pipeline_benchmark_{video_count}_")
+    try:
+        fixture = options["fixture"] or make_fixture_wav(
+            os.path.join(work_dir, "fixture.wav"), options["clip_seconds"]
+        )
+        youtube = FakeYouTube(video_count, wav_duration(fixture), options["api_latency_ms"] / 1000)
+
+        FakeBackend.rtf = options["fake_rtf"]
+        FakeBackend.call_seconds = options["fake_call_ms"] / 1000
+        FakeBackend.load_seconds = options["fake_load_seconds"]
+        BACKENDS[FakeBackend.name] = FakeBackend
+        if options["backend"] == MockIITMBackend.name:
+            server, MockIITMBackend.url = start_mock_iitm_server(options["iitm_latency_ms"] / 1000)
+            BACKENDS[MockIITMBackend.name] = MockIITMBackend
+
+        settings = {
+            "output_path": os.path.join(work_dir, "audio_files"),
+            "backend": options["backend"],
+            "model_name": options["model"],
+            "download_workers": options["download_workers"],
+            "transcribe_workers": options["transcribe_workers"],
+            "vad_method": options["vad"],
+            "batch_size": options["batch_size"],
+            "batch_max_seconds": options["batch_max_seconds"],
+            "export_formats": options["export_formats"],
+            "detect_language": options["detect_language"],
+            "prometheus_metrics": False,
+        }
+        with ExitStack() as patches:
+            patches.enter_context(mock.patch.object(youtube_client, "get_youtube_client", lambda api_key: youtube))
+            patches.enter_context(mock.patch.object(
+                download_manager, "download_native_audio",
+                make_fixture_downloader(fixture, options["bandwidth_mbps"] * 125000 if options["bandwidth_mbps"] else None),
+            ))
+            if not shutil.which("ffmpeg"):
+                patches.enter_context(mock.patch.object(channel_pipeline, "decode_to_pcm_file", decode_wav_to_pcm_file))
+
+            start = time.perf_counter()
+            summary = channel_pipeline.run_channel(BENCHMARK_HANDLE, "offline-benchmark", settings)
+            wall_seconds = time.perf_counter() - start
+
+        audio_seconds = video_count * wav_duration(fixture)
+        results.put({
+            "videos": video_count,
+            "batching": summary.get("batching"),
+            "languages": summary.get("languages"),
+            "bytes_per_audio_minute": summary["downloads"]["bytes_per_audio_minute"],
+            "transcribed": summary["transcribed"],
+            "failed": len(summary["failed_videos"]),
+            "wall_seconds": round(wall_seconds, 3),
+            "videos_per_hour": round(summary["transcribed"] / wall_seconds * 3600, 1),
+            "audio_seconds": round(audio_seconds, 1),
+            "audio_seconds_per_second": round(audio_seconds / wall_seconds, 2),
+            "api_calls": youtube.calls,
+            "quota_used": summary["api"]["quota_used"],
+            "peak_rss_mb": round(get_peak_rss_mb(), 1),
+            "stages": {
+                row["stage"]: {
+                    key: row[key] for key in ("count", "errors", "mean_seconds", "p50_seconds", "p95_seconds", "rtf")
+                }
+                for row in summary["perf"]
+            },
+        })
+    except Exception as e:
+        results.put({"videos": video_count, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_pipeline(sizes, options):
+    """
+    Runs the whole channel pipeline (resolve, list, download, decode,
+    transcribe, export) offline once per channel size, each in a fresh
+    process so caches start cold and peak RSS is measured per size.
+    """
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for video_count in sizes:
+        results = context.Queue()
+        process = context.Process(target=_run_size, args=(video_count, options, results))
+        process.start()
+        report.append(results.get())
+        process.join()
+    return report
+
+# -----------------------------
+# 6. Report and Comparison
+# -----------------------------
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_reports(baseline, current):
+    """
+    Lines describing how throughput and peak memory moved per channel size
+    (positive throughput change = faster).
+    """
+    baseline_rows = {row["videos"]: row for row in baseline["results"] if "error" not in row}
+    lines = []
+    for row in current["results"]:
+        old = baseline_rows.get(row["videos"])
+        if "error" in row or old is None:
+            continue
+        throughput = (row["audio_seconds_per_second"] / old["audio_seconds_per_second"] - 1) * 100
+        memory = row["peak_rss_mb"] - old["peak_rss_mb"]
+        lines.append(
+            f"{row['videos']:>6} videos: {old['audio_seconds_per_second']} -> {row['audio_seconds_per_second']} "
+            f"audio s/s ({throughput:+.1f}%), peak RSS {memory:+.1f} MB"
+        )
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the full channel pipeline offline (stubbed YouTube API, local fixture audio)."
+    )
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated channel sizes in videos (default: 10,100,1000,5000)")
+    parser.add_argument("--fixture", default=None,
+                        help="16 kHz mono WAV served as every video's audio (default: a synthetic clip)")
+    parser.add_argument("--clip-seconds", type=float, default=3.0, help="Length of the synthetic clip")
+    parser.add_argument("--backend", default="fake", choices=["fake", "mock-iitm"] + sorted(BACKENDS),
+                        help="fake (no model), mock-iitm (local HTTP server) or a real engine, e.g. whisper")
+    parser.add_argument("--model", default=None, help="Model for a real engine (e.g. tiny)")
+    parser.add_argument("--fake-rtf", type=float, default=0.0, help="Simulated decode time per audio second")
+    parser.add_argument("--fake-call-ms", type=float, default=0.0,
+                        help="Simulated fixed cost per decode call (paid once per batch)")
+    parser.add_argument("--fake-load-seconds", type=float, default=0.0, help="Simulated model load time")
+    parser.add_argument("--iitm-latency-ms", type=float, default=0.0, help="Mock IITM server delay per request")
+    parser.add_argument("--api-latency-ms", type=float, default=0.0, help="Stubbed Data API delay per call")
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0, help="Simulated download speed (0 = unlimited)")
+    parser.add_argument("--download-workers", type=int, default=4)
+    parser.add_argument("--transcribe-workers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=0, help="Cross-video batch size (0 = off)")
+    parser.add_argument("--batch-max-seconds", type=int, default=180)
+    parser.add_argument("--detect-language", action="store_true", help="Route each video by detected language")
+    parser.add_argument("--vad", default=None, help="VAD method passed to the pipeline (default: off)")
+    parser.add_argument("--export-format", action="append", default=None,
+                        help="Export formats to write, repeatable (default: none)")
+    parser.add_argument("--output", default="pipeline_benchmark.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", default=None, help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    options = {
+        "fixture": args.fixture,
+        "clip_seconds": args.clip_seconds,
+        "backend": args.backend,
+        "model": args.model or {"fake": "fake", "mock-iitm": "iitm-asr"}.get(args.backend, "tiny"),
+        "fake_rtf": args.fake_rtf,
+        "fake_call_ms": args.fake_call_ms,
+        "fake_load_seconds": args.fake_load_seconds,
+        "iitm_latency_ms": args.iitm_latency_ms,
+        "api_latency_ms": args.api_latency_ms,
+        "bandwidth_mbps": args.bandwidth_mbps,
+        "download_workers": args.download_workers,
+        "transcribe_workers": args.transcribe_workers,
+        "vad": args.vad,
+        "detect_language": args.detect_language,
+        "batch_size": args.batch_size,
+        "batch_max_seconds": args.batch_max_seconds,
+        "export_formats": args.export_format or [],
+    }
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = {
+        "commit": get_git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": bool(shutil.which("ffmpeg")),
+        "options": options,
+        "results": [],
+    }
+    for row in benchmark_pipeline(sizes, options):
+        print(json.dumps(row, ensure_ascii=False), flush=True)
+        report["results"].append(row)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            for line in compare_reports(json.load(file), report):
+                print(line)
@@ -0,0 +1,147 @@
+import os
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from audio_io import probe_duration
+from chunked_transcribe import plan_chunks, stitch_chunk_cues
+from subtitles import cues_to_vtt, parse_vtt_cues
+
+IITM_ASR_URL = "https://asr.iitm.ac.in/internal/asr/decode"
+
+# Status codes worth retrying: rate limiting and server-side failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# -----------------------------
+# 1. Audio Chunking
+# -----------------------------
+def extract_chunk(audio_file, start, length, chunk_path):
+    """
+    Cuts one window out of the audio as a small mono MP3 for upload.
+    """
+    if os.path.exists(chunk_path):
+        return chunk_path
+    tmp_path = chunk_path + ".part.mp3"
+    subprocess.run(
+        [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+            "-ss", f"{start:.3f}", "-t", f"{length:.3f}",
+            "-i", audio_file,
+            "-ac", "1", "-ar", "16000", "-b:a", "64k",
+            tmp_path,
+        ],
+        check=True,
+    )
+    os.replace(tmp_path, chunk_path)
+    return chunk_path
+
+# -----------------------------
+# 2. Remote ASR Client
+# -----------------------------
+class RemoteASRClient:
+    """
+    Client for the IITM ASR decode endpoint.
+
+    Keeps one pooled requests.Session, splits long audio into overlapping
+    chunks, uploads up to `max_concurrency` chunks at a time with retries and
+    exponential backoff, and stitches the returned VTT back into one timeline.
+
+    Finished chunks are checkpointed next to the audio, so an interrupted
+    transcription only re-uploads the chunks that had not come back yet.
+    Point `url` at a local mock server for testing.
+    """
+
+    def __init__(
+        self,
+        url=IITM_ASR_URL,
+        chunk_seconds=300,
+        overlap_seconds=5,
+        max_concurrency=4,
+        max_retries=4,
+        backoff_seconds=1.0,
+        timeout=(10, 600),
+        session=None,
+    ):
+        self.url = url
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def decode_file(self, file_path, language):
+        """
+        Uploads one audio file and returns the endpoint's JSON response,
+        retrying connection errors, timeouts and retryable status codes.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                with open(file_path, 'rb') as audio_file:
+                    files = {
+                        'file': audio_file,
+                        'language': (None, language),
+                        'vtt': (None, 'true'),
+                    }
+                    response = self.session.post(self.url, files=files, timeout=self.timeout)
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    raise Exception(f"ASR request failed with status {response.status_code}: {response.text}")
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            # Exponential backoff with jitter so concurrent chunks don't retry in lockstep
+            time.sleep(self.backoff_seconds * (2 ** attempt) * (0.5 + random.random()))
+
+    def _decode_chunk(self, audio_file, chunk, index, language, checkpoint_dir):
+        vtt_path = os.path.join(checkpoint_dir, f"chunk_{index:04d}.vtt")
+        if os.path.exists(vtt_path):
+            with open(vtt_path, encoding="utf-8") as file:
+                return file.read()
+
+        chunk_path = extract_chunk(audio_file, chunk[0], chunk[1], os.path.join(checkpoint_dir, f"chunk_{index:04d}.mp3"))
+        vtt_text = self.decode_file(chunk_path, language).get("vtt", "")
+
+        tmp_path = vtt_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(vtt_text)
+        os.replace(tmp_path, vtt_path)
+        os.remove(chunk_path)
+        return vtt_text
+
+    def transcribe(self, audio_file, language):
+        """
+        Transcribes a whole file and returns {"vtt": ..., "transcript": ...}
+        in the same shape as a single decode response.
+        """
+        duration = probe_duration(audio_file)
+        if not duration or duration <= self.chunk_seconds:
+            return self.decode_file(audio_file, language)
+
+        chunks = plan_chunks(duration, self.chunk_seconds, self.overlap_seconds)
+        checkpoint_dir = f"{os.path.splitext(audio_file)[0]}.asr_chunks_{language}_{self.chunk_seconds}_{self.overlap_seconds}"
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            vtt_texts = list(executor.map(
+                lambda item: self._decode_chunk(audio_file, item[1], item[0], language, checkpoint_dir),
+                enumerate(chunks),
+            ))
+
+        cues = stitch_chunk_cues([parse_vtt_cues(vtt) for vtt in vtt_texts], chunks, self.overlap_seconds)
+        return {
+            "vtt": cues_to_vtt(cues),
+            "transcript": " ".join(text for _, _, text in cues),
+        }
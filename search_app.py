@@ -0,0 +1,75 @@
+import streamlit as st
+import os
+import time
+import pandas as pd
+from datetime import datetime
+from transcript_search import TranscriptIndex, index_csv_directory
+
+# -----------------------------
+# 1. Timestamp Helper
+# -----------------------------
+def get_timestamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+# -----------------------------
+# 2. Transcript Index
+# -----------------------------
+@st.cache_resource
+def get_transcript_index(db_path):
+    return TranscriptIndex(db_path)
+
+# -----------------------------
+# 3. Streamlit App
+# -----------------------------
+st.title("Search Transcripts")
+
+output_path = "audio_files"
+transcript_index = get_transcript_index(os.path.join(output_path, "transcript_index.sqlite3"))
+
+# 3a. Index status (new transcripts are added by the channel runs themselves)
+stats = transcript_index.stats()
+st.caption(f"{stats['videos']} videos, {stats['segments']} segments indexed.")
+with st.expander("Index existing transcripts"):
+    st.write(
+        f"Adds every `*_transcription.csv` in `{output_path}/` that is not indexed yet "
+        "(e.g. transcripts made before the index existed)."
+    )
+    if st.button("Index CSV files"):
+        with st.spinner(f"[{get_timestamp()}] Indexing..."):
+            count = index_csv_directory(transcript_index, output_path)
+            transcript_index.optimize()
+        st.success(f"[{get_timestamp()}] Indexed {count} videos.")
+
+# 3b. Query and filters
+query = st.text_input("Search for words or phrases (all words must match; end a word with * for prefix search)")
+col_channel, col_language, col_limit = st.columns(3)
+channel_id = col_channel.selectbox("Channel", [None] + transcript_index.channels(),
+                                   format_func=lambda value: value or "All channels")
+language = col_language.selectbox("Language", [None, "kn", "hi", "ta", "mr", "gu", "pa", "bn"],
+                                  format_func=lambda value: value or "All languages")
+limit = col_limit.number_input("Max results", min_value=10, max_value=500, value=50)
+
+# 3c. Results, each linking to the moment in the video
+if query:
+    start = time.perf_counter()
+    hits = transcript_index.search(query, limit=int(limit), channel_id=channel_id, language=language)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    st.caption(f"{len(hits)} results in {elapsed_ms:.1f} ms")
+    if hits:
+        for hit in hits:
+            st.markdown(
+                f"[{hit['video_id']} @ {format_seconds(hit['start'])}]({hit['link']}) — {hit['snippet']}"
+            )
+        st.download_button(
+            label="📥 Download results as CSV",
+            data=pd.DataFrame(hits)[["video_id", "start", "end", "text", "link"]].to_csv(index=False),
+            file_name="search_results.csv",
+            mime="text/csv",
+        )
+    else:
+        st.info("No matching segments.")
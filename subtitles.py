@@ -0,0 +1,215 @@
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+# Blocks that carry no cues and are skipped up to the next blank line
+_NON_CUE_BLOCKS = ("WEBVTT", "NOTE", "STYLE", "REGION")
+
+# -----------------------------
+# 1. Timestamps
+# -----------------------------
+def parse_vtt_timestamp(value):
+    """
+    Converts 'HH:MM:SS.mmm', 'MM:SS.mmm' or SRT's 'HH:MM:SS,mmm' to seconds.
+    Raises ValueError for anything else.
+    """
+    clock, _, fraction = value.strip().replace(",", ".").partition(".")
+    parts = clock.split(":")
+    if len(parts) == 3:
+        seconds = int(parts[0]) * 3600 + int(parts[1]) * 60 + int(parts[2])
+    elif len(parts) == 2:
+        seconds = int(parts[0]) * 60 + int(parts[1])
+    else:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    return seconds + int(fraction) / 10 ** len(fraction) if fraction else float(seconds)
+
+
+def format_vtt_timestamp(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600 * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60 * 1000)
+    secs, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{milliseconds:03d}"
+
+
+def parse_timing_line(line):
+    """
+    Splits '00:01.000 --> 00:04.000 align:start position:10%' into
+    (start, end); cue settings after the end time are ignored.
+    """
+    start, _, rest = line.partition("-->")
+    end = rest.split(None, 1)
+    if not end:
+        raise ValueError(f"Invalid cue timing: {line!r}")
+    return parse_vtt_timestamp(start), parse_vtt_timestamp(end[0])
+
+# -----------------------------
+# 2. Streaming Cue Parser (WebVTT and SRT)
+# -----------------------------
+def iter_vtt_cues(lines):
+    """
+    Yields (start, end, text) cues from any iterable of lines: an open
+    file, an HTTP response's lines or an io.StringIO. Only the current cue
+    is held in memory, so multi-hour transcripts stream through in
+    constant space.
+
+    Handles the WEBVTT header, NOTE/STYLE/REGION blocks, cue identifiers
+    (including SRT's numbers), cue settings and multi-line cues, whose
+    lines are joined with a space.
+    """
+    skipping = False
+    timing = None
+    text_lines = []
+    for line_number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        stripped = line.strip()
+
+        if not stripped:
+            if timing is not None:
+                yield timing[0], timing[1], " ".join(text_lines)
+                timing, text_lines = None, []
+            skipping = False
+            continue
+        if skipping:
+            continue
+
+        if "-->" in line:
+            # A timing line without a blank line before it still starts a new cue
+            if timing is not None:
+                yield timing[0], timing[1], " ".join(text_lines)
+                text_lines = []
+            try:
+                timing = parse_timing_line(line)
+            except ValueError as e:
+                raise ValueError(f"Line {line_number}: {e}") from None
+        elif timing is not None:
+            text_lines.append(stripped)
+        elif stripped.split(None, 1)[0] in _NON_CUE_BLOCKS:
+            skipping = True
+        # anything else outside a cue is a cue identifier
+
+    if timing is not None:
+        yield timing[0], timing[1], " ".join(text_lines)
+
+
+def parse_vtt_cues(vtt_text):
+    """
+    Returns a list of (start, end, text) cues from a VTT (or SRT) document.
+    """
+    return list(iter_vtt_cues(io.StringIO(vtt_text)))
+
+
+def iter_vtt_file(path):
+    """
+    Streams cues from a .vtt or .srt file without reading it all first.
+    """
+    with open(path, encoding="utf-8-sig") as file:
+        yield from iter_vtt_cues(file)
+
+
+def iter_vtt_response(response):
+    """
+    Streams cues from a `requests` response opened with stream=True, as the
+    body arrives.
+    """
+    response.encoding = response.encoding or "utf-8"
+    return iter_vtt_cues(response.iter_lines(decode_unicode=True))
+
+
+def cues_to_vtt(cues):
+    blocks = ["WEBVTT", ""]
+    for start, end, text in cues:
+        blocks.append(f"{format_vtt_timestamp(start)} --> {format_vtt_timestamp(end)}")
+        blocks.append(text)
+        blocks.append("")
+    return "\n".join(blocks)
+
+
+def cues_to_segments(cues):
+    # The segment dicts every ASR backend returns
+    return [{"start": start, "end": end, "text": text} for start, end, text in cues]
+
+# -----------------------------
+# 3. Benchmark
+# -----------------------------
+def write_synthetic_vtt(path, hours, cue_seconds=4.0, lines_per_cue=2):
+    """
+    Writes a long VTT file with identifiers, cue settings and multi-line
+    cues, roughly the shape of a multi-hour ASR transcript.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("WEBVTT\n\nNOTE synthetic benchmark transcript\n\n")
+        start = 0.0
+        index = 0
+        while start < hours * 3600:
+            end = start + cue_seconds
+            file.write(f"{index + 1}\n{format_vtt_timestamp(start)} --> {format_vtt_timestamp(end)} align:start\n")
+            for line in range(lines_per_cue):
+                file.write(f"यह वाक्य संख्या {index} की पंक्ति {line} है\n")
+            file.write("\n")
+            start = end
+            index += 1
+    return index
+
+
+def parse_file_as_string(path):
+    with open(path, encoding="utf-8") as file:
+        return len(parse_vtt_cues(file.read()))
+
+
+def parse_file_streaming(path):
+    return sum(1 for _ in iter_vtt_file(path))
+
+
+def benchmark_parser(hours=10.0):
+    """
+    Parses a synthetic transcript of `hours` from a string and streamed
+    from disk, reporting cues per second and peak Python memory of each.
+    """
+    handle, path = tempfile.mkstemp(suffix=".vtt")
+    os.close(handle)
+    try:
+        cue_count = write_synthetic_vtt(path, hours)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        report = []
+        for mode in ("string", "stream"):
+            parse = parse_file_as_string if mode == "string" else parse_file_streaming
+            start = time.perf_counter()
+            parsed = parse(path)
+            seconds = time.perf_counter() - start
+            # Second pass for memory: tracemalloc slows parsing down several times
+            tracemalloc.start()
+            parse(path)
+            peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+            report.append({
+                "mode": mode,
+                "hours": hours,
+                "cues": parsed,
+                "file_mb": round(size_mb, 1),
+                "seconds": round(seconds, 3),
+                "cues_per_second": round(parsed / seconds),
+                "peak_python_mb": round(peak_mb, 1),
+            })
+        assert all(row["cues"] == cue_count for row in report)
+        return report
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parse VTT/SRT files, or benchmark the parser.")
+    parser.add_argument("files", nargs="*", help="VTT/SRT files to print as tab-separated cues")
+    parser.add_argument("--benchmark-hours", type=float, default=None,
+                        help="Benchmark on a synthetic transcript of this many hours")
+    args = parser.parse_args()
+
+    if args.benchmark_hours:
+        for row in benchmark_parser(args.benchmark_hours):
+            print(row)
+    for path in args.files:
+        for start, end, text in iter_vtt_file(path):
+            print(f"{start:.3f}\t{end:.3f}\t{text}")
@@ -0,0 +1,41 @@
+import pytest
+
+from asr_backends import tokens_to_segments
+
+WORDS = {1: "ek", 2: "do", 3: "teen", 4: " "}
+
+
+class FakeTokenizer:
+    # Whisper's layout: text tokens below timestamp_begin, one timestamp token per 0.02 s above it
+    timestamp_begin = 1000
+
+    def decode(self, tokens):
+        return " ".join(WORDS[token] for token in tokens)
+
+
+def ts(seconds):
+    return FakeTokenizer.timestamp_begin + round(seconds / 0.02)
+
+
+@pytest.mark.parametrize("tokens, expected", [
+    # <|0.00|> ek do <|2.40|><|2.40|> teen <|5.00|>
+    (
+        [ts(0), 1, 2, ts(2.4), ts(2.4), 3, ts(5.0)],
+        [(0.0, 2.4, "ek do"), (2.4, 5.0, "teen")],
+    ),
+    # No timestamps at all: one segment over the whole clip
+    ([1, 2, 3], [(0.0, 30.0, "ek do teen")]),
+    # Cut off before the closing timestamp: the segment runs to the end of the clip
+    (
+        [ts(0), 1, ts(1.0), ts(1.0), 2],
+        [(0.0, 1.0, "ek"), (1.0, 30.0, "do")],
+    ),
+    # Timestamp pairs without text and whitespace-only text are dropped
+    ([ts(0), ts(2.0), ts(2.0), 4, ts(3.0)], []),
+    ([], []),
+])
+def test_tokens_to_segments(tokens, expected):
+    segments = tokens_to_segments(tokens, FakeTokenizer(), clip_seconds=30.0)
+    assert [(segment["start"], segment["end"], segment["text"]) for segment in segments] == [
+        (pytest.approx(start), pytest.approx(end), text) for start, end, text in expected
+    ]
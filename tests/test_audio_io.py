@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from audio_io import PCM_SUFFIX, SAMPLE_RATE, load_audio_window, load_pcm, pcm_duration
+
+
+@pytest.fixture
+def pcm_file(tmp_path):
+    samples = np.array([0, 16384, -16384, 32767, -32768] * SAMPLE_RATE, dtype="<i2")
+    path = tmp_path / f"video{PCM_SUFFIX}"
+    samples.tofile(path)
+    return str(path)
+
+
+def test_pcm_is_stored_as_16_bit(pcm_file):
+    assert pcm_duration(pcm_file) == 5.0
+
+
+@pytest.mark.parametrize("start, stop, expected", [
+    (0, 5, [0.0, 0.5, -0.5, 32767 / 32768, -1.0]),
+    (1, 3, [0.5, -0.5]),
+    (5 * SAMPLE_RATE - 2, None, [32767 / 32768, -1.0]),
+])
+def test_load_pcm_converts_the_requested_range_to_float32(pcm_file, start, stop, expected):
+    audio = load_pcm(pcm_file, start, stop)
+    assert audio.dtype == np.float32
+    assert audio.tolist() == pytest.approx(expected)
+
+
+def test_load_audio_window(pcm_file):
+    audio = load_audio_window(pcm_file, 1.0, 2.0)
+    assert audio.dtype == np.float32
+    assert len(audio) == 2 * SAMPLE_RATE
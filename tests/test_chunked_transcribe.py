@@ -0,0 +1,67 @@
+import pytest
+
+from chunked_transcribe import plan_chunks, stitch_chunk_cues
+
+
+@pytest.mark.parametrize("duration, chunk_seconds, overlap_seconds, expected", [
+    (30, 60, 10, [(0.0, 30)]),
+    (60, 60, 10, [(0.0, 60)]),
+    (110, 60, 10, [(0.0, 60), (50.0, 60)]),
+    (130, 60, 10, [(0.0, 60), (50.0, 60), (100.0, 30.0)]),
+    (100, 60, 0, [(0.0, 60), (60.0, 40.0)]),
+    # Largest valid overlap: one-second steps
+    (121, 60, 59, [(float(start), 60) for start in range(62)]),
+])
+def test_plan_chunks(duration, chunk_seconds, overlap_seconds, expected):
+    assert plan_chunks(duration, chunk_seconds, overlap_seconds) == expected
+
+
+@pytest.mark.parametrize("duration, chunk_seconds, overlap_seconds", [
+    (130, 60, 60),
+    (130, 60, 90),
+    (130, 60, -1),
+    (30, 60, 60),
+])
+def test_plan_chunks_rejects_overlap_not_shorter_than_chunk(duration, chunk_seconds, overlap_seconds):
+    with pytest.raises(ValueError):
+        plan_chunks(duration, chunk_seconds, overlap_seconds)
+
+
+@pytest.mark.parametrize("chunks, chunk_cues, expected", [
+    # One chunk: cues only move onto the original timeline
+    (
+        [(0.0, 40)],
+        [[(0, 5, "a"), (5, 9, "b")]],
+        [(0, 5, "a"), (5, 9, "b")],
+    ),
+    # Chunks at 0 and 50 s with 10 s overlap: chunk 0 owns cues starting before 55 s
+    (
+        [(0.0, 60), (50.0, 60)],
+        [
+            [(0, 5, "a"), (48, 53, "b"), (53, 57, "c"), (56, 59, "d")],
+            [(0, 3, "b"), (6, 8, "c"), (7, 10, "e"), (20, 25, "f")],
+        ],
+        # "c" crosses the boundary and is kept once; "d" is left to chunk 1, which heard it as "e"
+        [(0, 5, "a"), (48, 53, "b"), (53, 57, "c"), (57, 60, "e"), (70, 75, "f")],
+    ),
+    # A leading cue within the tolerance of the previous chunk's last end is kept
+    (
+        [(0.0, 60), (50.0, 60)],
+        [[(50, 54.8, "a")], [(4.5, 8, "b")]],
+        [(50, 54.8, "a"), (54.5, 58, "b")],
+    ),
+    # A cue spanning the whole overlap is kept from the chunk it starts in
+    (
+        [(0.0, 60), (50.0, 60), (100.0, 30)],
+        [[(45, 60, "a")], [(0, 10, "a"), (12, 20, "b")], [(0, 5, "c")]],
+        [(45, 60, "a"), (62, 70, "b"), (100, 105, "c")],
+    ),
+    # Empty chunks are fine
+    (
+        [(0.0, 60), (50.0, 60)],
+        [[], [(5, 8, "a")]],
+        [(55, 58, "a")],
+    ),
+])
+def test_stitch_chunk_cues(chunks, chunk_cues, expected):
+    assert stitch_chunk_cues(chunk_cues, chunks, overlap_seconds=10) == expected
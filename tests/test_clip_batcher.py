@@ -0,0 +1,33 @@
+import threading
+import time
+
+import numpy as np
+
+from chunked_transcribe import SAMPLE_RATE
+from clip_batcher import ClipBatcher
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.batches = []
+
+    def transcribe_batch(self, windows, language):
+        self.batches.append((time.monotonic(), len(windows)))
+        return [[{"start": 0.0, "end": len(window) / SAMPLE_RATE, "text": "x"}] for window in windows]
+
+
+def test_partial_pop_restarts_the_wait_from_the_oldest_remaining_clip():
+    backend = RecordingBackend()
+    batcher = ClipBatcher(backend, batch_size=2, max_wait_seconds=0.5, window_seconds=1.0, overlap_seconds=0.0)
+    first = threading.Thread(target=batcher.transcribe, args=(np.zeros(SAMPLE_RATE), "hi"))
+    first.start()
+    time.sleep(0.3)
+    # Fills the batch with the first clip's window; one of its own windows is left over
+    second_arrived = time.monotonic()
+    batcher.transcribe(np.zeros(2 * SAMPLE_RATE), "hi")
+    first.join()
+
+    assert [size for _, size in backend.batches] == [2, 1]
+    # The leftover window waits max_wait_seconds from its own clip's arrival,
+    # not from the first clip's
+    assert backend.batches[1][0] - second_arrived >= 0.45
@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from remote_asr import RemoteASRClient
+
+OK_RESPONSE = {"vtt": "WEBVTT\n\n00:00:00.000 --> 00:00:01.000\nnamaskara\n", "transcript": "namaskara"}
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a pooled session can reuse its connection
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        with server.lock:
+            server.client_ports.append(self.client_address[1])
+            status, delay = server.script.pop(0) if server.script else (200, 0)
+        time.sleep(delay)
+        body = json.dumps(OK_RESPONSE if status == 200 else {"error": status}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def asr_server():
+    """
+    Mock decode endpoint answering with the (status, delay) pairs in
+    server.script, then 200.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.script = []
+    server.client_ports = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/decode"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "clip.mp3"
+    path.write_bytes(b"\0" * 1024)
+    return str(path)
+
+
+@pytest.mark.parametrize("failures", [
+    [500],
+    [503, 502, 429],
+])
+def test_retries_server_errors_until_success(asr_server, audio_file, failures):
+    asr_server.script = [(status, 0) for status in failures]
+    client = RemoteASRClient(url=asr_server.url, max_retries=3, backoff_seconds=0)
+
+    assert client.decode_file(audio_file, "kannada") == OK_RESPONSE
+    assert len(asr_server.client_ports) == len(failures) + 1
+
+
+def test_gives_up_after_max_retries(asr_server, audio_file):
+    asr_server.script = [(503, 0)] * 5
+    client = RemoteASRClient(url=asr_server.url, max_retries=2, backoff_seconds=0)
+
+    with pytest.raises(Exception, match="status 503"):
+        client.decode_file(audio_file, "kannada")
+    assert len(asr_server.client_ports) == 3
+
+
+def test_does_not_retry_client_errors(asr_server, audio_file):
+    asr_server.script = [(400, 0)]
+    client = RemoteASRClient(url=asr_server.url, max_retries=3, backoff_seconds=0)
+
+    with pytest.raises(Exception, match="status 400"):
+        client.decode_file(audio_file, "kannada")
+    assert len(asr_server.client_ports) == 1
+
+
+def test_retries_read_timeouts(asr_server, audio_file):
+    asr_server.script = [(200, 1.0)]
+    client = RemoteASRClient(url=asr_server.url, max_retries=1, backoff_seconds=0, timeout=(5, 0.2))
+
+    assert client.decode_file(audio_file, "kannada") == OK_RESPONSE
+    assert len(asr_server.client_ports) == 2
+
+
+def test_raises_timeout_when_every_attempt_times_out(asr_server, audio_file):
+    asr_server.script = [(200, 1.0)] * 2
+    client = RemoteASRClient(url=asr_server.url, max_retries=1, backoff_seconds=0, timeout=(5, 0.2))
+
+    with pytest.raises(requests.Timeout):
+        client.decode_file(audio_file, "kannada")
+
+
+def test_reuses_pooled_connection(asr_server, audio_file):
+    asr_server.script = [(503, 0)]
+    client = RemoteASRClient(url=asr_server.url, max_retries=1, backoff_seconds=0)
+
+    for _ in range(3):
+        assert client.decode_file(audio_file, "kannada") == OK_RESPONSE
+    # One retried request and two more uploads, all over the same keep-alive connection
+    assert len(asr_server.client_ports) == 4
+    assert len(set(asr_server.client_ports)) == 1
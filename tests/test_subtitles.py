@@ -0,0 +1,71 @@
+import io
+
+import pytest
+
+from subtitles import cues_to_vtt, iter_vtt_cues, parse_vtt_cues, parse_vtt_timestamp
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("00:00:01.500", 1.5),
+    ("01:02:03.004", 3723.004),
+    ("02:03.5", 123.5),
+    ("10:00", 600.0),
+    ("00:00:01,250", 1.25),
+    (" 00:00:02.000 ", 2.0),
+    ("100:00:00.000", 360000.0),
+])
+def test_parse_vtt_timestamp(value, expected):
+    assert parse_vtt_timestamp(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", ["1.5", "1:2:3:4", "aa:bb.000", ""])
+def test_parse_vtt_timestamp_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_vtt_timestamp(value)
+
+
+@pytest.mark.parametrize("document, expected", [
+    # Header, NOTE/STYLE blocks and cue identifiers carry no cues
+    (
+        "WEBVTT\n\nNOTE a comment\nthat spans lines\n\nSTYLE\n::cue { color: red }\n\n"
+        "intro\n00:00.000 --> 00:01.000\nnamaskara\n",
+        [(0.0, 1.0, "namaskara")],
+    ),
+    # Cue settings after the end time are ignored; multi-line cues are joined
+    (
+        "WEBVTT\n\n00:00:01.000 --> 00:00:04.000 align:start position:10%\nfirst line\nsecond line\n\n"
+        "00:00:04.000 --> 00:00:06.500\nthird\n",
+        [(1.0, 4.0, "first line second line"), (4.0, 6.5, "third")],
+    ),
+    # SRT: numbered cues and comma decimals
+    (
+        "1\n00:00:00,000 --> 00:00:02,000\nek\n\n2\n00:00:02,000 --> 00:00:03,500\ndo\n",
+        [(0.0, 2.0, "ek"), (2.0, 3.5, "do")],
+    ),
+    # A timing line right after a cue's text starts a new cue
+    (
+        "WEBVTT\n\n00:01.000 --> 00:02.000\none\n00:02.000 --> 00:03.000\ntwo\n",
+        [(1.0, 2.0, "one"), (2.0, 3.0, "two")],
+    ),
+    # CRLF line endings, a byte order mark and no trailing newline
+    (
+        "\ufeffWEBVTT\r\n\r\n00:00.000 --> 00:00.800\r\nhello",
+        [(0.0, 0.8, "hello")],
+    ),
+    # A cue without text, and no cues at all
+    ("WEBVTT\n\n00:00.000 --> 00:01.000\n\n", [(0.0, 1.0, "")]),
+    ("WEBVTT\n", []),
+])
+def test_iter_vtt_cues(document, expected):
+    assert list(iter_vtt_cues(io.StringIO(document))) == expected
+    assert parse_vtt_cues(document) == expected
+
+
+def test_iter_vtt_cues_reports_the_bad_line():
+    with pytest.raises(ValueError, match="Line 3"):
+        list(iter_vtt_cues(["WEBVTT", "", "00:00.000 --> soon", "text"]))
+
+
+def test_cues_round_trip_through_vtt():
+    cues = [(0.0, 1.25, "ek"), (3599.5, 3725.004, "do teen")]
+    assert parse_vtt_cues(cues_to_vtt(cues)) == cues
@@ -0,0 +1,21 @@
+from unittest import mock
+
+import youtube_client
+from youtube_client import YouTubeAPI
+
+
+class EmptyRequest:
+    def execute(self):
+        return {}
+
+
+def test_map_reuses_the_clients_of_its_threads():
+    built = []
+    with mock.patch.object(youtube_client, "build", lambda *args, **kwargs: built.append(1) or object()):
+        with YouTubeAPI("key", max_workers=3) as api:
+            for _ in range(5):
+                api.map(lambda item: api.call("videos.list", lambda youtube: EmptyRequest()), range(10))
+
+    # At most one client per pool thread, however many map() calls ran
+    assert 1 <= len(built) <= 3
+    assert api.stats()["calls"] == 50
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# -----------------------------
+# 1. Audio Content Hash
+# -----------------------------
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(audio_hash, backend, model_name, language, options=None):
+    """
+    Builds the cache key for one transcript. Any change to the audio, the ASR
+    backend, the model, the language or the decoding options gives a new key.
+    """
+    payload = json.dumps(
+        [audio_hash, backend, model_name, language, options or {}],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+# -----------------------------
+# 2. Transcript Cache
+# -----------------------------
+class TranscriptCache:
+    """
+    Content-addressed transcript cache.
+
+    Segments are stored as JSON files under `cache_dir`, one per key, and an
+    SQLite index maps each key to its file, size and last access time. Lookups
+    are a primary-key read. When the cache grows past `max_bytes`, the least
+    recently used entries are evicted.
+
+    Audio hashes are remembered per (path, size, mtime) so unchanged files are
+    not re-hashed on every run.
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite3"), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    key TEXT PRIMARY KEY,
+                    video_id TEXT,
+                    backend TEXT,
+                    model TEXT,
+                    language TEXT,
+                    options TEXT,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS transcripts_lru ON transcripts (last_access)")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS audio_hashes (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    sha256 TEXT NOT NULL
+                )
+                """
+            )
+
+    def audio_hash(self, audio_file):
+        stat = os.stat(audio_file)
+        path = os.path.abspath(audio_file)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime, sha256 FROM audio_hashes WHERE path = ?", (path,)
+            ).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return row[2]
+
+        digest = hash_file(audio_file)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO audio_hashes (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime, digest),
+            )
+        return digest
+
+    def key_for(self, audio_file, backend, model_name, language, options=None):
+        return make_cache_key(self.audio_hash(audio_file), backend, model_name, language, options)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """
+        Returns the cached segments for `key`, or None on a miss.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT path FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None or not os.path.exists(row[0]):
+                self.misses += 1
+                return None
+            with self._db:
+                self._db.execute("UPDATE transcripts SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        with open(row[0], encoding="utf-8") as file:
+            return json.load(file)["segments"]
+
+    def put(self, key, segments, video_id=None, backend=None, model_name=None, language=None, options=None):
+        """
+        Stores the segments (dicts with start/end/text) under `key`.
+        """
+        segments = [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
+            for segment in segments
+        ]
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"video_id": video_id, "segments": segments}, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO transcripts
+                    (key, video_id, backend, model, language, options, path, size, created, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (key, video_id, backend, model_name, language,
+                 json.dumps(options or {}, sort_keys=True), path, os.path.getsize(path), now, now),
+            )
+            self._evict_locked()
+
+    def _evict_locked(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._db.execute(
+            "SELECT key, path, size FROM transcripts ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM transcripts WHERE key = ?", (key,))
+            if os.path.exists(path):
+                os.remove(path)
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": total,
+        }
@@ -0,0 +1,149 @@
+import os
+
+TRANSCRIPT_COLUMNS = ["Video ID", "Start Time (s)", "End Time (s)", "Transcript"]
+
+# -----------------------------
+# 1. Streaming XLSX Writers
+# -----------------------------
+class OpenpyxlSheetWriter:
+    """
+    Multi-sheet XLSX writer using openpyxl's write-only mode: each sheet's
+    rows are streamed to a temporary file instead of being kept in memory.
+    """
+
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self._workbook = Workbook(write_only=True)
+
+    def add_video(self, video_id, sheet_name, rows):
+        sheet = self._workbook.create_sheet(title=sheet_name)
+        sheet.append(TRANSCRIPT_COLUMNS)
+        for row in rows:
+            sheet.append(row)
+
+    def close(self):
+        # Saved under a temp name first so a crash never leaves a corrupt workbook
+        self._workbook.save(self.path + ".tmp")
+        os.replace(self.path + ".tmp", self.path)
+
+
+class XlsxwriterSheetWriter:
+    """
+    Multi-sheet XLSX writer using xlsxwriter's constant_memory mode: every
+    row is flushed to disk as soon as the next one is started.
+    """
+
+    def __init__(self, path):
+        import xlsxwriter
+
+        self.path = path
+        self._workbook = xlsxwriter.Workbook(path + ".tmp", {"constant_memory": True})
+
+    def add_video(self, video_id, sheet_name, rows):
+        sheet = self._workbook.add_worksheet(sheet_name)
+        sheet.write_row(0, 0, TRANSCRIPT_COLUMNS)
+        for row_index, row in enumerate(rows, start=1):
+            sheet.write_row(row_index, 0, row)
+
+    def close(self):
+        self._workbook.close()
+        os.replace(self.path + ".tmp", self.path)
+
+# -----------------------------
+# 2. Parquet Dataset Writer
+# -----------------------------
+class ParquetDatasetWriter:
+    """
+    Writes each video as its own Parquet file inside a dataset directory
+    (read it back with pandas.read_parquet(directory)). Every file is complete
+    as soon as its video finishes, so a crash only loses the video in flight.
+    """
+
+    def __init__(self, directory):
+        self.path = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def add_video(self, video_id, sheet_name, rows):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table(
+            {
+                "video_id": pa.array([row[0] for row in rows], pa.string()),
+                "start": pa.array([row[1] for row in rows], pa.float64()),
+                "end": pa.array([row[2] for row in rows], pa.float64()),
+                "text": pa.array([row[3] for row in rows], pa.string()),
+            }
+        )
+        part_path = os.path.join(self.path, f"{video_id}.parquet")
+        tmp_path = part_path + ".tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+
+    def close(self):
+        pass
+
+# -----------------------------
+# 3. Streaming Export Stage
+# -----------------------------
+class StreamingTranscriptExporter:
+    """
+    Appends each finished transcript to every configured output as soon as it
+    completes, so nothing has to be kept in memory until the end of the run.
+
+    formats: any of "xlsx" and "parquet". xlsx_engine: "openpyxl" (write-only)
+    or "xlsxwriter" (constant_memory).
+    """
+
+    def __init__(self, output_path, formats=("xlsx",), xlsx_engine="openpyxl"):
+        os.makedirs(output_path, exist_ok=True)
+        self.paths = {}
+        self._writers = []
+        self._sheet_names = set()
+        self.video_count = 0
+        self.row_count = 0
+
+        if "xlsx" in formats:
+            xlsx_path = os.path.join(output_path, "all_transcripts_multisheet.xlsx")
+            writer_class = XlsxwriterSheetWriter if xlsx_engine == "xlsxwriter" else OpenpyxlSheetWriter
+            self._writers.append(writer_class(xlsx_path))
+            self.paths["xlsx"] = xlsx_path
+        if "parquet" in formats:
+            parquet_path = os.path.join(output_path, "all_transcripts.parquet")
+            self._writers.append(ParquetDatasetWriter(parquet_path))
+            self.paths["parquet"] = parquet_path
+
+    def _unique_sheet_name(self, video_id):
+        # Excel limits sheet names to 31 characters and they must be unique
+        sheet_name = video_id[:31]
+        suffix = 1
+        while sheet_name in self._sheet_names:
+            tail = f"~{suffix}"
+            sheet_name = video_id[:31 - len(tail)] + tail
+            suffix += 1
+        self._sheet_names.add(sheet_name)
+        return sheet_name
+
+    def add_video(self, video_id, rows):
+        """
+        rows: [video_id, start, end, text] lists (e.g. df.itertuples(index=False)).
+        """
+        rows = [list(row) for row in rows]
+        sheet_name = self._unique_sheet_name(video_id)
+        for writer in self._writers:
+            writer.add_video(video_id, sheet_name, rows)
+        self.video_count += 1
+        self.row_count += len(rows)
+
+    def close(self):
+        for writer in self._writers:
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Always finish the files, even when the run is interrupted by an error
+        self.close()
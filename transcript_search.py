@@ -0,0 +1,306 @@
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import unicodedata
+
+DEFAULT_INDEX_PATH = os.path.join("audio_files", "transcript_index.sqlite3")
+
+# unicode61 splits words at combining marks, which breaks every Indic word
+# apart at its vowel signs and viramas (हिन्दी -> ह, द, न). Declaring the
+# marks of the Devanagari..Sinhala blocks (plus ZWJ/ZWNJ) as token
+# characters keeps whole words together.
+INDIC_TOKENCHARS = "".join(
+    chr(code) for code in range(0x0900, 0x0E00) if unicodedata.category(chr(code)).startswith("M")
+) + "\u200c\u200d"
+TOKENIZER = f"unicode61 remove_diacritics 1 tokenchars '{INDIC_TOKENCHARS}'"
+
+# -----------------------------
+# 1. Query Helpers
+# -----------------------------
+def normalize_text(text):
+    # Indic text can arrive composed or decomposed (e.g. nukta forms); index and query in NFC
+    return unicodedata.normalize("NFC", text or "")
+
+
+def build_match_query(text):
+    """
+    Turns free text into an FTS5 query that matches segments containing
+    every word. Words are quoted, so punctuation and FTS5 operators typed
+    by the user are taken literally; a trailing * keeps prefix search.
+    """
+    terms = []
+    for word in normalize_text(text).split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def deep_link(video_id, start):
+    # Opens the video at the segment (YouTube takes whole seconds)
+    return f"https://youtu.be/{video_id}?t={int(start)}"
+
+
+def rows_fingerprint(rows):
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(f"{row[1]}\x1f{row[2]}\x1f{row[3]}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+# -----------------------------
+# 2. Full-Text Index (SQLite FTS5)
+# -----------------------------
+class TranscriptIndex:
+    """
+    Incremental full-text index over every transcript segment.
+
+    Segments live in a plain table (video_id, start, end, text) with an
+    FTS5 index over the text (external content, so the text is stored
+    once). Adding a video replaces its earlier segments, and a video whose
+    rows have not changed since it was indexed is skipped, so the index can
+    be fed from every finished (or resumed) video without growing.
+    """
+
+    def __init__(self, db_path=DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    channel_id TEXT,
+                    language TEXT,
+                    segment_count INTEGER NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    indexed_at REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS segments (
+                    id INTEGER PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    start REAL NOT NULL,
+                    end REAL NOT NULL,
+                    text TEXT NOT NULL
+                )
+                """
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS segments_video ON segments (video_id)")
+            self._db.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                    text, content='segments', content_rowid='id', tokenize="{TOKENIZER}"
+                )
+                """
+            )
+
+    def add_video(self, video_id, rows, channel_id=None, language=None):
+        """
+        Indexes a video's [video_id, start, end, text] rows, replacing what
+        was indexed for it before. Returns False when nothing changed.
+        """
+        rows = [list(row) for row in rows]
+        fingerprint = rows_fingerprint(rows)
+        with self._lock, self._db:
+            current = self._db.execute("SELECT fingerprint FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if current and current[0] == fingerprint:
+                return False
+            self._delete_segments_locked(video_id)
+            for row in rows:
+                cursor = self._db.execute(
+                    "INSERT INTO segments (video_id, start, end, text) VALUES (?, ?, ?, ?)",
+                    (video_id, float(row[1]), float(row[2]), normalize_text(row[3])),
+                )
+                self._db.execute(
+                    "INSERT INTO segments_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, normalize_text(row[3]))
+                )
+            self._db.execute(
+                """
+                INSERT OR REPLACE INTO videos (video_id, channel_id, language, segment_count, fingerprint, indexed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (video_id, channel_id, language, len(rows), fingerprint, time.time()),
+            )
+        return True
+
+    def remove_video(self, video_id):
+        with self._lock, self._db:
+            self._delete_segments_locked(video_id)
+            self._db.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    def _delete_segments_locked(self, video_id):
+        # External-content FTS5 tables are told which text to forget with a 'delete' row
+        self._db.execute(
+            """
+            INSERT INTO segments_fts (segments_fts, rowid, text)
+            SELECT 'delete', id, text FROM segments WHERE video_id = ?
+            """,
+            (video_id,),
+        )
+        self._db.execute("DELETE FROM segments WHERE video_id = ?", (video_id,))
+
+    def search(self, text, limit=50, channel_id=None, language=None, highlight=("**", "**")):
+        """
+        Best-matching segments first (BM25). Returns dicts with video_id,
+        start, end, snippet (matches wrapped in `highlight`), text and link.
+        """
+        query = build_match_query(text)
+        if not query:
+            return []
+        sql = """
+            SELECT s.video_id, s.start, s.end, snippet(segments_fts, 0, ?, ?, '…', 16), s.text
+            FROM segments_fts
+            JOIN segments s ON s.id = segments_fts.rowid
+        """
+        params = [highlight[0], highlight[1], query]
+        filters = ["segments_fts MATCH ?"]
+        if channel_id or language:
+            sql += " JOIN videos v ON v.video_id = s.video_id"
+            if channel_id:
+                filters.append("v.channel_id = ?")
+                params.append(channel_id)
+            if language:
+                filters.append("v.language = ?")
+                params.append(language)
+        sql += " WHERE " + " AND ".join(filters) + " ORDER BY segments_fts.rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [
+            {
+                "video_id": video_id,
+                "start": start,
+                "end": end,
+                "snippet": snippet,
+                "text": segment_text,
+                "link": deep_link(video_id, start),
+            }
+            for video_id, start, end, snippet, segment_text in rows
+        ]
+
+    def is_indexed(self, video_id):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM videos WHERE video_id = ?", (video_id,)).fetchone() is not None
+
+    def channels(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT channel_id FROM videos WHERE channel_id IS NOT NULL ORDER BY channel_id"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self):
+        with self._lock:
+            videos, segments = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(segment_count), 0) FROM videos"
+            ).fetchone()
+        return {"videos": videos, "segments": segments}
+
+    def optimize(self):
+        # Merges the FTS5 b-trees; worth running after a large backfill
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO segments_fts (segments_fts) VALUES ('optimize')")
+
+# -----------------------------
+# 3. Backfill from Per-Video CSVs
+# -----------------------------
+def index_csv_directory(index, directory, channel_id=None, language=None):
+    """
+    Indexes every <video_id>_transcription.csv in `directory` (videos whose
+    rows are unchanged are skipped). Returns how many videos were (re)indexed.
+    """
+    indexed = 0
+    for path in sorted(glob.glob(os.path.join(directory, "*_transcription.csv"))):
+        video_id = os.path.basename(path)[:-len("_transcription.csv")]
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            rows = [row for row in reader if len(row) >= 4]
+        if index.add_video(video_id, rows, channel_id=channel_id, language=language):
+            indexed += 1
+    return indexed
+
+# -----------------------------
+# 4. Benchmark
+# -----------------------------
+def benchmark_search(db_path, segments=100_000, queries=200, seed=0):
+    """
+    Fills an index with synthetic Hindi segments and times random one- and
+    two-word queries. Returns median and p95 query latency in milliseconds.
+    """
+    rng = random.Random(seed)
+    vocabulary = [
+        "भारत", "सरकार", "किसान", "शिक्षा", "स्वास्थ्य", "पानी", "बिजली", "चुनाव", "संविधान", "अर्थव्यवस्था",
+        "विज्ञान", "इतिहास", "संस्कृति", "भाषा", "हिन्दी", "गाँव", "शहर", "नदी", "मौसम", "बाज़ार",
+    ] + [f"शब्द{index}" for index in range(2000)]
+    index = TranscriptIndex(db_path)
+    per_video = 200
+    for video_number in range(segments // per_video):
+        video_id = f"bench{video_number:06d}"
+        index.add_video(video_id, [
+            [video_id, position * 5.0, position * 5.0 + 5.0, " ".join(rng.choice(vocabulary) for _ in range(12))]
+            for position in range(per_video)
+        ])
+    index.optimize()
+
+    latencies = []
+    for _ in range(queries):
+        query = " ".join(rng.choice(vocabulary) for _ in range(rng.choice((1, 2))))
+        start = time.perf_counter()
+        index.search(query, limit=50)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        "segments": index.stats()["segments"],
+        "queries": queries,
+        "p50_ms": round(latencies[len(latencies) // 2], 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search over transcripts.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"Index database (default: {DEFAULT_INDEX_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = commands.add_parser("index", help="Index the per-video CSVs of a directory")
+    index_parser.add_argument("directory", nargs="?", default="audio_files")
+    index_parser.add_argument("--channel-id", default=None)
+    index_parser.add_argument("--language", default=None)
+
+    search_parser = commands.add_parser("search", help="Search the index")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+
+    benchmark_parser = commands.add_parser("benchmark", help="Time queries on a synthetic index")
+    benchmark_parser.add_argument("--segments", type=int, default=100_000)
+
+    args = parser.parse_args()
+    if args.command == "index":
+        transcript_index = TranscriptIndex(args.index)
+        count = index_csv_directory(transcript_index, args.directory, args.channel_id, args.language)
+        transcript_index.optimize()
+        print(f"Indexed {count} videos; {transcript_index.stats()}")
+    elif args.command == "search":
+        for hit in TranscriptIndex(args.index).search(args.query, limit=args.limit, highlight=("[", "]")):
+            print(f"{hit['link']}\t{hit['start']:.1f}-{hit['end']:.1f}\t{hit['snippet']}")
+    elif args.command == "benchmark":
+        benchmark_db = args.index + ".benchmark"
+        try:
+            print(benchmark_search(benchmark_db, args.segments))
+        finally:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(benchmark_db + suffix):
+                    os.remove(benchmark_db + suffix)
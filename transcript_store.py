@@ -0,0 +1,390 @@
+import argparse
+import csv
+import glob
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from job_store import atomic_write
+from transcript_export import TRANSCRIPT_COLUMNS, StreamingTranscriptExporter
+
+DEFAULT_STORE_PATH = os.path.join("audio_files", "transcript_store")
+
+# Column files of one generation; compact() writes the next generation
+COLUMNS = {
+    "starts": np.dtype("<f4"),     # segment start, seconds
+    "ends": np.dtype("<f4"),       # segment end, seconds
+    "text_ends": np.dtype("<u8"),  # end offset of each segment's text in the heap
+}
+HEAP_NAME = "text.heap"            # UTF-8 text of every segment, back to back
+
+# -----------------------------
+# 1. Columnar Transcript Store
+# -----------------------------
+class TranscriptStore:
+    """
+    Every transcript of every channel in one set of append-only column files:
+    start and end times as float32 arrays, the text as one UTF-8 heap with an
+    end offset per segment. An SQLite index (WAL) maps each video to its
+    segment range, so reading a video memory-maps just that slice of each
+    column, and the segment at a timestamp is a binary search over the
+    video's start times (segments are kept sorted by start).
+
+    Files only grow: a re-transcribed video is appended again and its index
+    entry moved, and compact() drops the old copies. Column files are
+    trimmed back to the committed sizes before each append, so a crash in
+    the middle of one never leaves a half-written video behind. Appends
+    from several processes are serialised by the index database's write lock.
+
+    Per-video CSVs and the combined XLSX/Parquet outputs are views generated
+    from the store (export_csv, export_videos).
+    """
+
+    def __init__(self, directory=DEFAULT_STORE_PATH):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    first INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    channel_id TEXT,
+                    language TEXT,
+                    added_at REAL NOT NULL
+                )
+                """
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)",
+                [("generation",), ("segments",), ("heap_bytes",)],
+            )
+
+    def _path(self, name, generation):
+        return os.path.join(self.directory, f"{name}.{generation}")
+
+    def _meta(self):
+        return dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+
+    def _map(self, name, dtype, generation, first, count):
+        # Only the requested slice is mapped; np.memmap cannot map zero bytes
+        if count <= 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(name, generation), dtype=dtype, mode="r", offset=first * dtype.itemsize, shape=(count,))
+
+    # 1a. Writes
+    def add_video(self, video_id, segments, channel_id=None, language=None):
+        """
+        Appends one video's segments (dicts with start/end/text, or
+        [video_id, start, end, text] rows) and points the index at them,
+        replacing any earlier copy. Returns the number of segments.
+        """
+        segments = [
+            (segment["start"], segment["end"], segment["text"]) if isinstance(segment, dict)
+            else (segment[1], segment[2], segment[3])
+            for segment in segments
+        ]
+        segments.sort(key=lambda segment: segment[0])
+        starts = np.array([segment[0] for segment in segments], dtype=COLUMNS["starts"])
+        ends = np.array([segment[1] for segment in segments], dtype=COLUMNS["ends"])
+        texts = [str(segment[2]).encode("utf-8") for segment in segments]
+        text_lengths = np.array([len(text) for text in texts], dtype=COLUMNS["text_ends"])
+
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock, so appends from other processes wait their turn
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                meta = self._meta()
+                generation, first, heap_bytes = meta["generation"], meta["segments"], meta["heap_bytes"]
+                text_ends = heap_bytes + np.cumsum(text_lengths, dtype=COLUMNS["text_ends"])
+                for name, values in (("starts", starts), ("ends", ends), ("text_ends", text_ends)):
+                    self._append(self._path(name, generation), first * COLUMNS[name].itemsize, values.tobytes())
+                self._append(self._path(HEAP_NAME, generation), heap_bytes, b"".join(texts))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO videos (video_id, first, count, channel_id, language, added_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (video_id, first, len(segments), channel_id, language, time.time()),
+                )
+                self._db.executemany(
+                    "UPDATE meta SET value = ? WHERE key = ?",
+                    [(first + len(segments), "segments"), (heap_bytes + int(text_lengths.sum()), "heap_bytes")],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(segments)
+
+    @staticmethod
+    def _append(path, committed_bytes, data):
+        # Anything past the committed size is left over from an append that never committed
+        with open(path, "ab") as file:
+            file.truncate(committed_bytes)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def compact(self):
+        """
+        Rewrites the live segments of every video into a new generation of
+        column files, dropping copies replaced by later appends. Readers of
+        the previous generation keep working; older ones are deleted.
+        Returns the bytes saved.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                meta = self._meta()
+                generation = meta["generation"]
+                old_bytes = self._generation_bytes(generation)
+                videos = self._db.execute("SELECT video_id, first, count FROM videos ORDER BY first").fetchall()
+                new_generation = generation + 1
+                outputs = {name: open(self._path(name, new_generation), "wb") for name in (*COLUMNS, HEAP_NAME)}
+                position = heap_bytes = 0
+                try:
+                    for video_id, first, count in videos:
+                        starts, ends, texts = self._read_columns(generation, first, count)
+                        encoded = [text.encode("utf-8") for text in texts]
+                        text_ends = heap_bytes + np.cumsum([len(text) for text in encoded], dtype=COLUMNS["text_ends"])
+                        outputs["starts"].write(starts.tobytes())
+                        outputs["ends"].write(ends.tobytes())
+                        outputs["text_ends"].write(text_ends.astype(COLUMNS["text_ends"]).tobytes())
+                        outputs[HEAP_NAME].write(b"".join(encoded))
+                        self._db.execute("UPDATE videos SET first = ? WHERE video_id = ?", (position, video_id))
+                        position += count
+                        heap_bytes += sum(len(text) for text in encoded)
+                    for file in outputs.values():
+                        file.flush()
+                        os.fsync(file.fileno())
+                finally:
+                    for file in outputs.values():
+                        file.close()
+                self._db.executemany(
+                    "UPDATE meta SET value = ? WHERE key = ?",
+                    [(new_generation, "generation"), (position, "segments"), (heap_bytes, "heap_bytes")],
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        for path in glob.glob(os.path.join(self.directory, "*.*")):
+            suffix = path.rsplit(".", 1)[-1]
+            if suffix.isdigit() and int(suffix) < generation:
+                os.remove(path)
+        return old_bytes - self._generation_bytes(new_generation)
+
+    def _generation_bytes(self, generation):
+        return sum(
+            os.path.getsize(self._path(name, generation)) for name in (*COLUMNS, HEAP_NAME)
+            if os.path.exists(self._path(name, generation))
+        )
+
+    # 1b. Reads
+    def _lookup(self, video_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT videos.first, videos.count, meta.value FROM videos, meta "
+                "WHERE videos.video_id = ? AND meta.key = 'generation'",
+                (video_id,),
+            ).fetchone()
+        return row  # (first, count, generation) or None
+
+    def _read_columns(self, generation, first, count):
+        starts = np.array(self._map("starts", COLUMNS["starts"], generation, first, count))
+        ends = np.array(self._map("ends", COLUMNS["ends"], generation, first, count))
+        # The segment before the first one gives where the first text starts
+        text_ends = self._map("text_ends", COLUMNS["text_ends"], generation, max(0, first - 1), count + (first > 0))
+        heap_start = int(text_ends[0]) if first > 0 else 0
+        offsets = [0] + (text_ends[-count:] - np.uint64(heap_start)).tolist() if count else [0]
+        heap = self._map(HEAP_NAME, np.dtype("u1"), generation, heap_start, offsets[-1]).tobytes()
+        texts = [heap[offsets[index]:offsets[index + 1]].decode("utf-8") for index in range(count)]
+        return starts, ends, texts
+
+    def has_video(self, video_id):
+        return self._lookup(video_id) is not None
+
+    def video_ids(self, channel_id=None):
+        with self._lock:
+            if channel_id is None:
+                rows = self._db.execute("SELECT video_id FROM videos ORDER BY added_at").fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT video_id FROM videos WHERE channel_id = ? ORDER BY added_at", (channel_id,)
+                ).fetchall()
+        return [row[0] for row in rows]
+
+    def columns(self, video_id):
+        """
+        (starts, ends, texts) of one video: float32 arrays and a list of
+        strings, or None if the video is not in the store.
+        """
+        location = self._lookup(video_id)
+        if location is None:
+            return None
+        first, count, generation = location
+        return self._read_columns(generation, first, count)
+
+    def rows(self, video_id):
+        """
+        [video_id, start, end, text] rows, as in the per-video CSV (times
+        rounded to 2 decimals), or None if the video is not in the store.
+        """
+        columns = self.columns(video_id)
+        if columns is None:
+            return None
+        starts, ends, texts = columns
+        return [
+            [video_id, start, end, text]
+            for start, end, text in zip(np.round(starts.astype(np.float64), 2).tolist(),
+                                        np.round(ends.astype(np.float64), 2).tolist(), texts)
+        ]
+
+    def segment_at(self, video_id, seconds):
+        """
+        The segment playing at `seconds` ({index, start, end, text}), found
+        by binary search over the video's start times; None between segments.
+        """
+        location = self._lookup(video_id)
+        if location is None:
+            return None
+        first, count, generation = location
+        starts = self._map("starts", COLUMNS["starts"], generation, first, count)
+        index = int(np.searchsorted(starts, seconds, side="right")) - 1
+        if index < 0:
+            return None
+        end = float(self._map("ends", COLUMNS["ends"], generation, first + index, 1)[0])
+        if seconds >= end:
+            return None
+        _, _, texts = self._read_columns(generation, first + index, 1)
+        return {"index": index, "start": float(starts[index]), "end": end, "text": texts[0]}
+
+    def segments_between(self, video_id, start, end):
+        """
+        Segments overlapping [start, end) as dicts with start/end/text.
+        """
+        location = self._lookup(video_id)
+        if location is None:
+            return []
+        first, count, generation = location
+        starts = self._map("starts", COLUMNS["starts"], generation, first, count)
+        low = max(0, int(np.searchsorted(starts, start, side="right")) - 1)
+        high = int(np.searchsorted(starts, end, side="left"))
+        if high <= low:
+            return []
+        starts, ends, texts = self._read_columns(generation, first + low, high - low)
+        return [
+            {"start": float(segment_start), "end": float(segment_end), "text": text}
+            for segment_start, segment_end, text in zip(starts, ends, texts)
+            if segment_end > start
+        ]
+
+    def stats(self):
+        with self._lock:
+            meta = self._meta()
+            videos, live_segments = self._db.execute("SELECT COUNT(*), COALESCE(SUM(count), 0) FROM videos").fetchone()
+        return {
+            "videos": videos,
+            "segments": live_segments,
+            "stale_segments": meta["segments"] - live_segments,
+            "size_bytes": self._generation_bytes(meta["generation"]),
+        }
+
+    # 1c. Export views
+    def export_csv(self, video_id, transcript_file_path):
+        """
+        Writes the per-video CSV view of a stored transcript; returns its rows.
+        """
+        rows = self.rows(video_id)
+        with atomic_write(transcript_file_path, mode="w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(TRANSCRIPT_COLUMNS)
+            writer.writerows(rows)
+        return rows
+
+
+def export_videos(store, video_ids, output_path, formats=("xlsx",), xlsx_engine="openpyxl"):
+    """
+    Builds the combined XLSX/Parquet outputs for `video_ids` straight from
+    the store, one video in memory at a time. Returns the output paths.
+    """
+    with StreamingTranscriptExporter(output_path, formats, xlsx_engine) as exporter:
+        for video_id in video_ids:
+            rows = store.rows(video_id)
+            if rows is not None:
+                exporter.add_video(video_id, rows)
+    return exporter.paths
+
+
+def import_csv_directory(store, directory, channel_id=None, language=None):
+    """
+    Adds every <video_id>_transcription.csv in `directory` that is not in
+    the store yet (transcripts made before the store existed). Returns how
+    many videos were added.
+    """
+    count = 0
+    for path in sorted(glob.glob(os.path.join(directory, "*_transcription.csv"))):
+        video_id = os.path.basename(path)[:-len("_transcription.csv")]
+        if store.has_video(video_id):
+            continue
+        with open(path, newline="", encoding="utf-8") as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            store.add_video(
+                video_id, [[video_id, float(start), float(end), text] for _, start, end, text in reader],
+                channel_id=channel_id, language=language,
+            )
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, fill and export the columnar transcript store.")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"Store directory (default: {DEFAULT_STORE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="Add existing per-video CSVs")
+    import_parser.add_argument("directory", nargs="?", default="audio_files")
+
+    at_parser = commands.add_parser("at", help="Print the segment playing at a timestamp")
+    at_parser.add_argument("video_id")
+    at_parser.add_argument("seconds", type=float)
+
+    export_parser = commands.add_parser("export", help="Write CSV/XLSX/Parquet views")
+    export_parser.add_argument("output_path")
+    export_parser.add_argument("--channel-id", default=None, help="Only this channel's videos")
+    export_parser.add_argument("--format", dest="formats", action="append", choices=["csv", "xlsx", "parquet"])
+    export_parser.add_argument("--xlsx-engine", choices=["openpyxl", "xlsxwriter"], default="openpyxl")
+
+    commands.add_parser("compact", help="Drop replaced copies of re-transcribed videos")
+    commands.add_parser("stats", help="Videos, segments and size on disk")
+
+    args = parser.parse_args()
+    store = TranscriptStore(args.store)
+
+    if args.command == "import":
+        print(f"Imported {import_csv_directory(store, args.directory)} videos")
+    elif args.command == "at":
+        print(store.segment_at(args.video_id, args.seconds))
+    elif args.command == "export":
+        formats = args.formats or ["xlsx"]
+        video_ids = store.video_ids(args.channel_id)
+        if "csv" in formats:
+            os.makedirs(args.output_path, exist_ok=True)
+            for video_id in video_ids:
+                store.export_csv(video_id, os.path.join(args.output_path, f"{video_id}_transcription.csv"))
+        paths = export_videos(store, video_ids, args.output_path, [fmt for fmt in formats if fmt != "csv"], args.xlsx_engine)
+        print(f"Exported {len(video_ids)} videos to {args.output_path} {paths}")
+    elif args.command == "compact":
+        print(f"Freed {store.compact()} bytes")
+    elif args.command == "stats":
+        print(store.stats())
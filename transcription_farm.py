@@ -0,0 +1,194 @@
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from audio_io import load_audio_array, load_audio_for_asr, probe_duration
+
+# ASR backend of the current worker process (set by _init_worker)
+_worker_backend = None
+
+# -----------------------------
+# 1. Worker Process
+# -----------------------------
+def _init_worker(backend_name, model_name, threads_per_worker, device):
+    global _worker_backend
+
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass  # backends without torch (e.g. faster-whisper) size their own thread pools
+
+    from asr_backends import get_backend
+    _worker_backend = get_backend(backend_name, model_name, device=device)
+
+
+def _transcribe_in_worker(audio_file, video_id, language_code, duration, vad_method=None):
+    start = time.perf_counter()
+    vad_stats = None
+    if vad_method:
+        from vad import transcribe_with_vad
+
+        segments, vad_stats = transcribe_with_vad(
+            lambda audio: _worker_backend.transcribe(audio, language_code), load_audio_array(audio_file), vad_method
+        )
+    else:
+        segments = _worker_backend.transcribe(load_audio_for_asr(audio_file), language_code)
+    wall_seconds = time.perf_counter() - start
+
+    # Only plain data goes back to the parent process
+    return {
+        "video_id": video_id,
+        "audio_file": audio_file,
+        "segments": segments,
+        "audio_seconds": duration,
+        "wall_seconds": wall_seconds,
+        "worker_pid": os.getpid(),
+        "vad": vad_stats,
+    }
+
+# -----------------------------
+# 2. Farm Scheduler
+# -----------------------------
+def _start_pool(backend_name, model_name, workers, threads_per_worker, device):
+    # "spawn" so workers never inherit torch/streamlit threads from the parent
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(backend_name, model_name, threads_per_worker, device),
+    )
+
+
+def run_farm(
+    jobs, language_code, model_name="turbo", workers=None, threads_per_worker=None, device="cpu", vad_method=None,
+    backend_name="whisper",
+):
+    """
+    Transcribes `jobs` (a list of (video_id, audio_file) pairs) on a pool of
+    worker processes, each holding its own cached model of `backend_name`.
+
+    Jobs are submitted longest-first by audio duration so a single long video
+    is started early instead of holding up the end of the run. Results are
+    yielded as soon as each video finishes; failed videos are yielded with an
+    "error" key instead of "segments".
+    """
+    workers = workers or os.cpu_count() or 1
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+
+    scheduled = sorted(
+        ((video_id, audio_file, probe_duration(audio_file)) for video_id, audio_file in jobs),
+        key=lambda job: job[2],
+        reverse=True,
+    )
+
+    with _start_pool(backend_name, model_name, workers, threads_per_worker, device) as executor:
+        futures = {
+            executor.submit(_transcribe_in_worker, audio_file, video_id, language_code, duration, vad_method): video_id
+            for video_id, audio_file, duration in scheduled
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"video_id": futures[future], "error": str(e)}
+
+
+class TranscriptionFarm:
+    """
+    Worker-process pools kept open for a whole channel run, so each file can
+    be handed over as soon as its download finishes instead of after all of
+    them (run_farm needs the complete job list up front).
+
+    A pool is started the first time a model is asked for and holds that
+    model in every worker; the language is chosen per file. transcribe() is
+    called from the pipeline's transcription threads and blocks until its
+    file is done, so the pipeline's bounded queue still limits how much
+    downloaded audio waits.
+    """
+
+    def __init__(self, backend_name="whisper", workers=None, threads_per_worker=None, device="cpu", vad_method=None):
+        self.backend_name = backend_name
+        self.workers = workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.device = device
+        self.vad_method = vad_method
+        self._pools = {}  # model name -> ProcessPoolExecutor
+        self._lock = threading.Lock()
+
+    def _pool(self, model_name):
+        with self._lock:
+            if model_name not in self._pools:
+                self._pools[model_name] = _start_pool(
+                    self.backend_name, model_name, self.workers, self.threads_per_worker, self.device
+                )
+            return self._pools[model_name]
+
+    def transcribe(self, audio_file, video_id, language_code, model_name):
+        """
+        Returns the worker's result dict (segments, audio_seconds,
+        wall_seconds, vad); a failed transcription raises its error.
+        """
+        future = self._pool(model_name).submit(
+            _transcribe_in_worker, audio_file, video_id, language_code, probe_duration(audio_file), self.vad_method
+        )
+        return future.result()
+
+    def close(self):
+        # Files not started yet are dropped (e.g. a cancelled run); running ones finish
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# -----------------------------
+# 3. Benchmark Mode
+# -----------------------------
+def benchmark(audio_files, language_code, model_name="turbo", max_workers=None, device="cpu", backend_name="whisper"):
+    """
+    Transcribes the same files with 1..max_workers processes and reports
+    audio-seconds processed per wall-clock second for each worker count.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    jobs = [(os.path.splitext(os.path.basename(path))[0], path) for path in audio_files]
+    total_audio = sum(probe_duration(path) for path in audio_files)
+
+    report = []
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        results = run_farm(jobs, language_code, model_name, workers, device=device, backend_name=backend_name)
+        failures = sum(1 for result in results if "error" in result)
+        wall_seconds = time.perf_counter() - start
+        report.append({
+            "workers": workers,
+            "threads_per_worker": max(1, (os.cpu_count() or 1) // workers),
+            "audio_seconds": round(total_audio, 2),
+            "wall_seconds": round(wall_seconds, 2),
+            "audio_seconds_per_second": round(total_audio / wall_seconds, 3) if wall_seconds else 0.0,
+            "failures": failures,
+        })
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the multi-process transcription farm.")
+    parser.add_argument("audio_files", nargs="+", help="Audio files to transcribe")
+    parser.add_argument("--language", default="hi", help="Whisper language code (default: hi)")
+    parser.add_argument("--model", default="turbo", help="Whisper model name (default: turbo)")
+    parser.add_argument("--max-workers", type=int, default=None, help="Benchmark 1..N worker processes")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--backend", default="whisper", help="ASR backend: whisper or faster-whisper")
+    args = parser.parse_args()
+
+    for row in benchmark(args.audio_files, args.language, args.model, args.max_workers, args.device, args.backend):
+        print(json.dumps(row))
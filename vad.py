@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# -----------------------------
+# 1. Speech Region Detection
+# -----------------------------
+def detect_speech_energy(
+    audio,
+    sample_rate=SAMPLE_RATE,
+    frame_ms=30,
+    margin_db=12.0,
+    min_level_db=-50.0,
+):
+    """
+    Energy-based VAD. A frame counts as speech when its RMS level is at least
+    `margin_db` above the recording's noise floor (its 10th-percentile frame
+    level) and above `min_level_db`. Returns (start, end) pairs in seconds.
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    frame_count = len(audio) // frame_length
+    if frame_count == 0:
+        return []
+
+    frames = np.asarray(audio[:frame_count * frame_length], dtype=np.float32).reshape(frame_count, frame_length)
+    levels_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    threshold = max(np.percentile(levels_db, 10) + margin_db, min_level_db)
+    is_speech = levels_db >= threshold
+
+    regions = []
+    start = None
+    for index, speech in enumerate(is_speech):
+        if speech and start is None:
+            start = index
+        elif not speech and start is not None:
+            regions.append((start * frame_ms / 1000, index * frame_ms / 1000))
+            start = None
+    if start is not None:
+        regions.append((start * frame_ms / 1000, frame_count * frame_ms / 1000))
+    return regions
+
+
+def detect_speech_silero(audio, sample_rate=SAMPLE_RATE):
+    """
+    Silero VAD (small CPU model, `pip install silero-vad`). Unlike the energy
+    VAD it also rejects music beds, not just silence.
+    """
+    import torch
+    from silero_vad import get_speech_timestamps, load_silero_vad
+
+    model = load_silero_vad()
+    timestamps = get_speech_timestamps(
+        torch.from_numpy(np.ascontiguousarray(audio, dtype=np.float32)), model, sampling_rate=sample_rate
+    )
+    return [(ts["start"] / sample_rate, ts["end"] / sample_rate) for ts in timestamps]
+
+
+def clean_regions(regions, duration, min_speech=0.25, min_silence=0.5, padding=0.2):
+    """
+    Pads each region, merges regions separated by less than `min_silence`
+    and drops blips shorter than `min_speech`.
+    """
+    merged = []
+    for start, end in regions:
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if merged and start - merged[-1][1] < min_silence:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return [(start, end) for start, end in merged if end - start >= min_speech]
+
+
+def detect_speech_regions(audio, method="energy", sample_rate=SAMPLE_RATE):
+    duration = len(audio) / sample_rate
+    if method == "silero":
+        regions = detect_speech_silero(audio, sample_rate)
+    else:
+        regions = detect_speech_energy(audio, sample_rate)
+    return clean_regions(regions, duration)
+
+# -----------------------------
+# 2. Speech-Only Transcription
+# -----------------------------
+def map_to_original_time(t, joins):
+    """
+    Maps a time on the concatenated speech-only timeline back to the original
+    audio. `joins` is a list of (concat_start, original_start) per region.
+    """
+    for concat_start, original_start in reversed(joins):
+        if t >= concat_start:
+            return original_start + (t - concat_start)
+    return t
+
+
+def transcribe_with_vad(transcribe_fn, audio, method="energy", gap_seconds=0.3):
+    """
+    Runs VAD, concatenates only the speech regions (with a short silent gap
+    between them), transcribes that in one call and maps segment timestamps
+    back onto the original timeline.
+
+    transcribe_fn(audio_array) must return a list of segment dicts
+    (e.g. an ASRBackend's transcribe with the language bound).
+
+    Returns (segments, stats) where stats has the audio/speech durations, the
+    skipped fraction and the estimated ASR speedup.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    duration = len(audio) / SAMPLE_RATE
+
+    vad_start = time.perf_counter()
+    regions = detect_speech_regions(audio, method)
+    vad_seconds = time.perf_counter() - vad_start
+
+    speech_seconds = sum(end - start for start, end in regions)
+    stats = {
+        "audio_seconds": round(duration, 2),
+        "speech_seconds": round(speech_seconds, 2),
+        "skipped_fraction": round(1 - speech_seconds / duration, 3) if duration else 0.0,
+        "estimated_speedup": round(duration / speech_seconds, 2) if speech_seconds else None,
+        "vad_seconds": round(vad_seconds, 2),
+        "regions": len(regions),
+    }
+    if not regions:
+        return [], stats
+
+    gap = np.zeros(int(gap_seconds * SAMPLE_RATE), dtype=np.float32)
+    pieces = []
+    joins = []
+    concat_position = 0.0
+    for start, end in regions:
+        piece = audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+        joins.append((concat_position, start))
+        pieces.extend([piece, gap])
+        concat_position += (len(piece) + len(gap)) / SAMPLE_RATE
+
+    segments = transcribe_fn(np.concatenate(pieces))
+    for segment in segments:
+        segment["start"] = map_to_original_time(segment["start"], joins)
+        segment["end"] = map_to_original_time(segment["end"], joins)
+    return segments, stats
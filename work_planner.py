@@ -0,0 +1,205 @@
+import re
+
+# The Data API has no "is a Short" flag: anything up to a minute, or tagged
+# #shorts in its title, is treated as one
+SHORTS_MAX_SECONDS = 60
+
+PRIORITY_POLICIES = ("newest", "shortest", "listed")
+
+# Not downloadable until the stream has ended (or the premiere has aired)
+UNAVAILABLE_LIVE_STATUSES = ("live", "upcoming")
+
+# -----------------------------
+# 1. Filters
+# -----------------------------
+def is_short(video):
+    duration = video.get("duration_seconds")
+    return (duration is not None and duration <= SHORTS_MAX_SECONDS) \
+        or "#shorts" in (video.get("title") or "").lower()
+
+
+def skip_reason(video, settings, title_pattern=None):
+    """
+    Why a video (a manifest dict with duration_seconds, published_at, title
+    and live_status) is left out of the run, or None to keep it. Videos whose
+    metadata is unknown are only skipped by filters that don't need it.
+    """
+    duration = video.get("duration_seconds")
+    published = (video.get("published_at") or "")[:10]  # ISO 8601, so dates compare as strings
+    live_status = video.get("live_status")
+    if live_status in UNAVAILABLE_LIVE_STATUSES:
+        return "not available yet"
+    if settings["exclude_live"] and live_status == "replay":
+        return "live replay"
+    if settings["exclude_shorts"] and is_short(video):
+        return "short"
+    if duration is not None:
+        if settings["min_duration_seconds"] and duration < settings["min_duration_seconds"]:
+            return "too short"
+        if settings["max_duration_seconds"] and duration > settings["max_duration_seconds"]:
+            return "too long"
+    if published:
+        if settings["published_after"] and published < settings["published_after"]:
+            return "published before window"
+        if settings["published_before"] and published > settings["published_before"]:
+            return "published after window"
+    if title_pattern and not title_pattern.search(video.get("title") or ""):
+        return "title does not match"
+    return None
+
+
+def filter_videos(videos, settings):
+    """
+    Applies the duration, publish-date, Shorts/live and title filters of
+    `settings`. Returns (kept videos, {reason: count of skipped videos}).
+    """
+    title_pattern = re.compile(settings["title_regex"], re.IGNORECASE) if settings["title_regex"] else None
+    kept = []
+    skipped = {}
+    for video in videos:
+        reason = skip_reason(video, settings, title_pattern)
+        if reason is None:
+            kept.append(video)
+        else:
+            skipped[reason] = skipped.get(reason, 0) + 1
+    return kept, skipped
+
+# -----------------------------
+# 2. Priority and Audio Budget
+# -----------------------------
+def prioritize(videos, policy="newest", audio_hours_budget=0):
+    """
+    Orders videos for processing and, with an audio-hours budget, keeps
+    only as many as fit (a video that would overshoot, or whose length is
+    unknown, is deferred and shorter ones after it are still tried).
+
+    - "newest": latest uploads first
+    - "shortest": shortest first, for the most finished transcripts early
+    - "listed": the order the videos were given in
+
+    Returns (videos to process, deferred videos).
+    """
+    if policy not in PRIORITY_POLICIES:
+        raise ValueError(f"priority must be one of {PRIORITY_POLICIES}, not {policy!r}")
+    if policy == "newest":
+        videos = sorted(videos, key=lambda video: video.get("published_at") or "", reverse=True)
+    elif policy == "shortest":
+        # Unknown durations go last: they might be multi-hour streams
+        videos = sorted(videos, key=lambda video: (video.get("duration_seconds") is None,
+                                                   video.get("duration_seconds") or 0))
+    else:
+        videos = list(videos)
+    if not audio_hours_budget:
+        return videos, []
+
+    budget_seconds = audio_hours_budget * 3600
+    selected, deferred = [], []
+    used = 0.0
+    for video in videos:
+        duration = video.get("duration_seconds")
+        if duration is None or used + duration > budget_seconds:
+            deferred.append(video)
+        else:
+            selected.append(video)
+            used += duration
+    return selected, deferred
+
+# -----------------------------
+# 3. Run Time Estimate
+# -----------------------------
+def measure_rates(video_jobs, manifest, run_key):
+    """
+    Download and transcription real-time factors (wall seconds per audio
+    second) measured on videos finished with the same configuration in
+    earlier runs. Returns None until there is a measurement.
+    """
+    timings = video_jobs.transcribed_timings(run_key)
+    durations = manifest.get_durations(video_id for video_id, _, _ in timings)
+    audio_seconds = download_seconds = transcribe_seconds = 0.0
+    videos = 0
+    for video_id, download, transcribe in timings:
+        if durations.get(video_id):
+            videos += 1
+            audio_seconds += durations[video_id]
+            download_seconds += download or 0.0
+            transcribe_seconds += transcribe
+    if not audio_seconds:
+        return None
+    return {
+        "videos": videos,
+        "audio_seconds": audio_seconds,
+        "download_rtf": download_seconds / audio_seconds,
+        "transcribe_rtf": transcribe_seconds / audio_seconds,
+    }
+
+
+def estimate_run_seconds(audio_seconds, rates, download_workers=1, transcribe_workers=1):
+    """
+    Downloads overlap with transcription, so the run takes about as long as
+    the slower of the two stages spread over its workers.
+    """
+    if rates is None:
+        return None
+    return max(
+        audio_seconds * rates["download_rtf"] / max(1, download_workers),
+        audio_seconds * rates["transcribe_rtf"] / max(1, transcribe_workers),
+    )
+
+
+def format_hours(seconds):
+    minutes = int(round(seconds / 60))
+    return f"{minutes // 60}h{minutes % 60:02d}m" if minutes >= 60 else f"{minutes}m"
+
+
+def describe_plan(plan):
+    """
+    One line for the progress log: what will be processed, what was left
+    out and the estimated run time.
+    """
+    text = f"Plan: {plan['videos']} videos, {format_hours(plan['audio_seconds'])} of audio"
+    if plan["unknown_duration"]:
+        text += f" (+{plan['unknown_duration']} of unknown length)"
+    left_out = [f"{count} {reason}" for reason, count in plan["skipped"].items()]
+    if plan["deferred"]:
+        left_out.append(f"{plan['deferred']} over the audio budget")
+    if left_out:
+        text += "; skipped " + ", ".join(left_out)
+    if plan["estimated_seconds"] is None:
+        text += ". No run time estimate yet (nothing measured with these settings)."
+    else:
+        text += (
+            f". Estimated run time ~{format_hours(plan['estimated_seconds'])} "
+            f"(transcription RTF {plan['transcribe_rtf']:.3f} measured on {plan['measured_videos']} videos)."
+        )
+    return text
+
+
+def plan_work(videos, settings, done_ids=(), rates=None):
+    """
+    Filters and orders a channel's videos before anything is downloaded.
+
+    `videos` are manifest dicts; `done_ids` are already transcribed (they
+    pass through the filters but cost nothing, so they are neither
+    scheduled nor counted against the budget). Returns (video IDs kept by
+    the filters, video IDs to process in order, plan dict for the report).
+    """
+    kept, skipped = filter_videos(videos, settings)
+    done_ids = set(done_ids)
+    todo, deferred = prioritize(
+        [video for video in kept if video["video_id"] not in done_ids],
+        settings["priority"], settings["audio_hours_budget"],
+    )
+    audio_seconds = sum(video.get("duration_seconds") or 0 for video in todo)
+    estimated = estimate_run_seconds(audio_seconds, rates, settings["download_workers"], settings["transcribe_workers"])
+    plan = {
+        "videos": len(todo),
+        "audio_seconds": round(audio_seconds, 1),
+        "unknown_duration": sum(1 for video in todo if video.get("duration_seconds") is None),
+        "skipped": skipped,
+        "deferred": len(deferred),
+        "priority": settings["priority"],
+        "estimated_seconds": round(estimated, 1) if estimated is not None else None,
+        "transcribe_rtf": round(rates["transcribe_rtf"], 4) if rates else None,
+        "measured_videos": rates["videos"] if rates else 0,
+    }
+    return [video["video_id"] for video in kept], [video["video_id"] for video in todo], plan
@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# -----------------------------
+# 1. Shared Work Scheduler
+# -----------------------------
+class WorkScheduler:
+    """
+    Process-wide scheduler for work that several sessions (Streamlit
+    sessions, or channel runs on threads of one process) may ask for at the
+    same time.
+
+    - run(key, fn) runs fn(slot) at most once per key at a time: a caller
+      asking for a key that is already queued or running attaches to that
+      task and gets its result (or its exception) instead of doing the work
+      again.
+    - At most `max_running` tasks run at once (0 = no limit); the rest wait
+      in the queue. The limit can be changed while work is running.
+    - Each running task gets the lowest free slot number (0, 1, ...), so
+      work that needs its own resource per concurrent task (e.g. a model
+      replica) can index it by slot: no two running tasks share a slot,
+      whichever session submitted them. Tasks run with capped=False (e.g.
+      clips that only wait on a shared batcher) skip the limit and get no
+      slot.
+    - stats() and tasks() report queue depth, attached callers and how busy
+      the slots have been, for status pages.
+    """
+
+    def __init__(self, max_running=0):
+        self.max_running = max(0, max_running)
+        self._cond = threading.Condition()
+        self._tasks = {}  # key -> task dict, while queued or running
+        self._slots = set()  # slot numbers of the running capped tasks
+        self._busy_seconds = 0.0
+        self._started = time.monotonic()
+        self._stats = {"submitted": 0, "attached": 0, "completed": 0, "failed": 0}
+
+    def set_max_running(self, max_running):
+        with self._cond:
+            self.max_running = max(0, max_running)
+            self._cond.notify_all()
+
+    def run(self, key, fn, capped=True, **info):
+        """
+        Returns fn(slot)'s result for `key`, running it only if no identical
+        task is in flight. `info` (video_id, language, ...) is shown by tasks().
+        """
+        with self._cond:
+            task = self._tasks.get(key)
+            owner = task is None
+            if not owner:
+                task["attached"] += 1
+                self._stats["attached"] += 1
+            else:
+                task = self._tasks[key] = dict(
+                    info, key=key, state="queued", slot=None, attached=0, submitted_at=time.time(),
+                    started_at=None, future=Future(),
+                )
+                self._stats["submitted"] += 1
+        if not owner:
+            return task["future"].result()
+
+        with self._cond:
+            if capped:
+                while self.max_running and len(self._slots) >= self.max_running:
+                    self._cond.wait()
+                task["slot"] = min(set(range(len(self._slots) + 1)) - self._slots)
+                self._slots.add(task["slot"])
+            task["state"] = "running"
+            task["started_at"] = time.time()
+        start = time.perf_counter()
+        try:
+            result = fn(task["slot"])
+        except BaseException as e:
+            task["future"].set_exception(e)
+            raise
+        else:
+            task["future"].set_result(result)
+            return result
+        finally:
+            with self._cond:
+                if task["slot"] is not None:
+                    self._slots.discard(task["slot"])
+                    self._busy_seconds += time.perf_counter() - start
+                self._stats["failed" if task["future"].exception() else "completed"] += 1
+                del self._tasks[key]
+                self._cond.notify_all()
+
+    def tasks(self):
+        """
+        Queued and running tasks, oldest first, without their futures.
+        """
+        with self._cond:
+            tasks = [{name: value for name, value in task.items() if name != "future"} for task in self._tasks.values()]
+        return sorted(tasks, key=lambda task: task["submitted_at"])
+
+    def stats(self):
+        """
+        Queue depth, running tasks, callers attached to other callers' tasks
+        and slot utilization (now, and averaged since the scheduler started).
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            running = sum(1 for task in self._tasks.values() if task["state"] == "running")
+            busy_slots = len(self._slots)
+            queued = sum(1 for task in self._tasks.values() if task["state"] == "queued")
+            waiting_callers = sum(task["attached"] for task in self._tasks.values())
+            busy_seconds = self._busy_seconds
+            max_running = self.max_running
+        uptime = time.monotonic() - self._started
+        stats.update(
+            max_running=max_running,
+            running=running,
+            queued=queued,
+            waiting_callers=waiting_callers,
+            utilization=round(busy_slots / max_running, 3) if max_running else None,
+            busy_seconds=round(busy_seconds, 1),
+            # With no limit the average is in running tasks rather than a fraction of the slots
+            mean_busy=round(busy_seconds / uptime / (max_running or 1), 3) if uptime else 0.0,
+        )
+        return stats
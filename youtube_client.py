@@ -0,0 +1,150 @@
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+# Quota units charged per call (list calls cost the same whatever `part` asks for)
+QUOTA_COSTS = {
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "videos.list": 1,
+    "search.list": 100,
+}
+
+# Rate limits and server errors are worth retrying; a spent daily quota is not
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_403_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+QUOTA_403_REASONS = ("quotaExceeded", "dailyLimitExceeded")
+
+# googleapiclient resources share one httplib2 connection and are not
+# thread-safe, so each thread gets its own client per API key.
+_local = threading.local()
+
+# -----------------------------
+# 1. Pooled Client
+# -----------------------------
+def get_youtube_client(api_key):
+    """
+    Returns a pooled YouTube Data API client for this thread and API key,
+    building it only the first time instead of on every call.
+    """
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+    if api_key not in clients:
+        clients[api_key] = build('youtube', 'v3', developerKey=api_key, cache_discovery=False)
+    return clients[api_key]
+
+# -----------------------------
+# 2. Quota-Budgeted API Calls
+# -----------------------------
+class QuotaExceeded(Exception):
+    pass
+
+
+def http_error_reason(error):
+    # The reason ('quotaExceeded', 'rateLimitExceeded', ...) is in the JSON body
+    try:
+        return json.loads(error.content)["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+
+class YouTubeAPI:
+    """
+    Runs Data API requests for one run: at most `max_workers` in flight at
+    once (from any thread), charged against `quota_budget` units (0 = no
+    budget) before they are sent, and retried with exponential backoff on
+    429/5xx and rate-limit 403s. A spent budget, or a 403 saying the
+    project's daily quota is gone, raises QuotaExceeded instead.
+
+    map() runs on one thread pool kept for the object's lifetime, so the
+    per-thread clients its threads build are reused by every later map()
+    call; close() (or leaving a `with` block) shuts it down.
+
+    stats() reports calls, retries and quota units spent.
+    """
+
+    def __init__(self, api_key, quota_budget=0, max_workers=8, max_retries=5, backoff_seconds=1.0):
+        self.api_key = api_key
+        self.quota_budget = quota_budget
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._executor = None  # started by the first map() that needs threads
+        self._stats = {"calls": 0, "quota_used": 0, "retries": 0, "errors": 0, "by_method": {}}
+
+    def _charge(self, method):
+        cost = QUOTA_COSTS.get(method, 1)
+        with self._lock:
+            if self.quota_budget and self._stats["quota_used"] + cost > self.quota_budget:
+                raise QuotaExceeded(
+                    f"{method} would exceed the quota budget ({self._stats['quota_used']}/{self.quota_budget} units used)"
+                )
+            self._stats["calls"] += 1
+            self._stats["quota_used"] += cost
+            self._stats["by_method"][method] = self._stats["by_method"].get(method, 0) + 1
+
+    def call(self, method, make_request):
+        """
+        Executes make_request(youtube) (e.g. lambda youtube:
+        youtube.videos().list(...)) on this thread's client and returns the
+        response. `method` ('videos.list', ...) decides the quota cost.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._charge(method)  # failed attempts are charged too
+            try:
+                with self._slots:
+                    return make_request(get_youtube_client(self.api_key)).execute()
+            except HttpError as e:
+                status = e.resp.status
+                reason = http_error_reason(e)
+                if status == 403 and reason in QUOTA_403_REASONS:
+                    raise QuotaExceeded(f"{method}: the API key's daily quota is used up") from e
+                retriable = status in RETRY_STATUSES or (status == 403 and reason in RETRY_403_REASONS)
+                if not retriable or attempt == self.max_retries:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                    raise
+            with self._lock:
+                self._stats["retries"] += 1
+            # Exponential backoff with jitter so parallel callers don't retry in step
+            time.sleep(self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.0))
+
+    def map(self, fn, items):
+        """
+        Runs fn(item) for every item on up to max_workers threads and returns
+        the results in order (the first exception is raised).
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="youtube-api")
+            executor = self._executor
+        return list(executor.map(fn, items))
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, by_method=dict(self._stats["by_method"]))
+        stats["quota_budget"] = self.quota_budget
+        return stats